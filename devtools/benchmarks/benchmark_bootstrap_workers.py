@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+"""
+Compares the cost of bootstrapping an MBAR reweighted average serially, over a
+pool of threads and over a pool of processes.
+"""
+import argparse
+import json
+import os
+
+from simtk import unit
+
+from propertyestimator.utils.statistics import bootstrap
+from propertyestimator.workflow.protocols import ReweightWithMBARProtocol
+
+from benchmark_suite import time_function
+from synthetic_data import generate_reweighting_data
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description='Benchmarks the bootstrap worker pools on an MBAR '
+                                                 'reweighting workload.')
+
+    parser.add_argument('--frames', type=int, default=2000, help='The number of frames per reference state.')
+    parser.add_argument('--iterations', type=int, default=50, help='The number of bootstrap iterations.')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='The number of workers per pool.')
+    parser.add_argument('--repeats', type=int, default=3, help='The number of times to repeat each benchmark.')
+
+    args = parser.parse_args()
+
+    reference_potentials, target_potentials, observables, frame_counts = \
+        generate_reweighting_data(args.frames)
+
+    reweight_protocol = ReweightWithMBARProtocol('mbar')
+
+    reweight_protocol.reference_observables = [observables[:frame_count] * unit.kelvin
+                                               for frame_count in frame_counts]
+
+    def run_bootstrap(number_of_workers, use_processes):
+
+        return bootstrap(reweight_protocol._bootstrap_function,
+                         args.iterations,
+                         1.0,
+                         frame_counts,
+                         random_seed=0,
+                         number_of_workers=number_of_workers,
+                         use_processes=use_processes,
+                         reference_reduced_potentials=reference_potentials.T,
+                         target_reduced_potentials=target_potentials.T,
+                         observables=observables[:, None])
+
+    results = {
+        'cpu_count': os.cpu_count(),
+        'serial': time_function(lambda: run_bootstrap(1, False), args.repeats),
+        'threads': time_function(lambda: run_bootstrap(args.workers, False), args.repeats),
+        'processes': time_function(lambda: run_bootstrap(args.workers, True), args.repeats)
+    }
+
+    print(json.dumps(results, indent=4))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+"""
+Compares the cost of detecting equilibration when considering every possible
+time origin, against only considering a geometric grid of origins.
+"""
+import argparse
+import time
+
+from propertyestimator.utils import timeseries
+
+from synthetic_data import generate_ar1_series
+
+
+def time_detection(series, **kwargs):
+    """Times a call to `timeseries.detect_equilibration`.
+
+    Returns
+    -------
+    float
+        The wall clock time taken in seconds.
+    tuple
+        The results of the detection.
+    """
+    start_time = time.perf_counter()
+    results = timeseries.detect_equilibration(series, **kwargs)
+
+    return time.perf_counter() - start_time, results
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description='Benchmark the equilibration detection modes.')
+
+    parser.add_argument('--lengths', type=int, nargs='+', default=[1000, 10000, 100000, 1000000],
+                        help='The series lengths to benchmark.')
+    parser.add_argument('--nskip', type=int, default=1,
+                        help='The spacing between the first two time origins of the geometric grid.')
+    parser.add_argument('--maximum_reference_length', type=int, default=1000,
+                        help='The longest series to analyse using the reference (direct summation) '
+                             'implementation while considering every time origin.')
+    parser.add_argument('--maximum_exhaustive_length', type=int, default=10000,
+                        help='The longest series to analyse by considering every time origin.')
+
+    args = parser.parse_args()
+
+    print(f'{"length":>10} {"mode":>12} {"time (s)":>12} {"t0":>8} {"g":>10} {"Neff":>12}')
+
+    for length in args.lengths:
+
+        series = generate_ar1_series(length)
+
+        modes = [('geometric', dict(nskip=args.nskip, geometric_origins=True))]
+
+        if length <= args.maximum_exhaustive_length:
+            modes.insert(0, ('exhaustive', dict(nskip=1, geometric_origins=False)))
+
+        if length <= args.maximum_reference_length:
+            modes.insert(0, ('reference', dict(nskip=1, geometric_origins=False, fft=False)))
+
+        for mode_name, mode_kwargs in modes:
+
+            elapsed_time, (t0, g, effective_samples) = time_detection(series, **mode_kwargs)
+            print(f'{length:>10} {mode_name:>12} {elapsed_time:>12.4f} {t0:>8} {g:>10.3f} {effective_samples:>12.1f}')
+
+
+if __name__ == "__main__":
+    main()
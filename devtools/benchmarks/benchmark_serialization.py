@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+"""
+Benchmarks the cost of serializing and deserializing a large
+`PropertyEstimatorSubmission` in each of the available formats.
+"""
+import argparse
+import time
+
+from simtk import unit
+
+from propertyestimator.client import PropertyEstimatorSubmission, PropertyEstimatorOptions
+from propertyestimator.properties import PropertyPhase, CalculationSource
+from propertyestimator.properties.density import Density
+from propertyestimator.substances import Mixture
+from propertyestimator.thermodynamics import ThermodynamicState
+from propertyestimator.utils.serialization import SerializationFormat, is_serialization_format_available
+
+
+def generate_submission(number_of_properties):
+    """Generates a submission containing a set of synthetic density measurements.
+
+    Parameters
+    ----------
+    number_of_properties: int
+        The number of properties to include in the submission.
+
+    Returns
+    -------
+    PropertyEstimatorSubmission
+        The generated submission.
+    """
+
+    properties = []
+
+    for index in range(number_of_properties):
+
+        substance = Mixture()
+        substance.add_component('C', 0.5)
+        substance.add_component('CO', 0.5)
+
+        thermodynamic_state = ThermodynamicState(temperature=(298.0 + index % 50) * unit.kelvin,
+                                                 pressure=1.0 * unit.atmosphere)
+
+        physical_property = Density(thermodynamic_state=thermodynamic_state,
+                                    phase=PropertyPhase.Liquid,
+                                    substance=substance,
+                                    value=(1.0 + index * 1e-5) * unit.gram / unit.milliliter,
+                                    uncertainty=0.01 * unit.gram / unit.milliliter)
+
+        physical_property.source = CalculationSource(fidelity='synthetic', provenance={})
+
+        properties.append(physical_property)
+
+    return PropertyEstimatorSubmission(properties=properties, options=PropertyEstimatorOptions())
+
+
+def time_function(function, repeats):
+    """Returns the minimum wall clock time (in seconds) of repeated calls to a function."""
+
+    timings = []
+
+    for _ in range(repeats):
+
+        start_time = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start_time)
+
+    return min(timings)
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description='Benchmark the serialization of large submissions.')
+
+    parser.add_argument('--number_of_properties', type=int, nargs='+', default=[1000, 10000],
+                        help='The number of properties in the submissions to benchmark.')
+    parser.add_argument('--repeats', type=int, default=3,
+                        help='The number of times to repeat each benchmark.')
+
+    args = parser.parse_args()
+
+    print(f'{"format":>10} {"properties":>12} {"size (MB)":>12} {"encode (s)":>12} {"decode (s)":>12}')
+
+    for number_of_properties in args.number_of_properties:
+
+        submission = generate_submission(number_of_properties)
+
+        for serialization_format in SerializationFormat:
+
+            if not is_serialization_format_available(serialization_format):
+                continue
+
+            contents = submission.serialize(serialization_format)
+
+            encode_time = time_function(lambda: submission.serialize(serialization_format), args.repeats)
+            decode_time = time_function(lambda: PropertyEstimatorSubmission.deserialize(contents), args.repeats)
+
+            print(f'{serialization_format.value:>10} {number_of_properties:>12} {len(contents) / 1e6:>12.2f} '
+                  f'{encode_time:>12.4f} {decode_time:>12.4f}')
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+#!/usr/bin/env python
+"""
+A reproducible benchmark suite for the statistics and time series utilities,
+whose results are written as JSON so that they can be compared between releases.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import tempfile
+import time
+
+import numpy as np
+from simtk import unit
+
+import propertyestimator
+from propertyestimator.utils import timeseries
+from propertyestimator.utils.statistics import StatisticsArray, bootstrap
+
+from synthetic_data import generate_ar1_series, generate_dipole_series, generate_reweighting_data, \
+    generate_statistics_array, write_openmm_csv
+
+
+def time_function(function, repeats):
+    """Times repeated calls to a function.
+
+    Parameters
+    ----------
+    function: function
+        The function (which takes no arguments) to time.
+    repeats: int
+        The number of times to call the function.
+
+    Returns
+    -------
+    dict of str and float
+        The minimum, median and maximum wall clock time (in seconds) of the calls.
+    """
+
+    timings = []
+
+    for _ in range(repeats):
+
+        start_time = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start_time)
+
+    return {
+        'minimum': float(np.min(timings)),
+        'median': float(np.median(timings)),
+        'maximum': float(np.max(timings))
+    }
+
+
+def _mean_bootstrap_function(values):
+    return values.mean()
+
+
+def _batched_mean_bootstrap_function(values):
+    return values.reshape(values.shape[0], -1).mean(axis=1)
+
+
+def _reweighting_bootstrap_function(reference_reduced_potentials, target_reduced_potentials, observables):
+    """A simple (single iteration, equal free energy) exponential reweighting
+    estimator which mimics the data access pattern of the MBAR bootstrap functions."""
+
+    log_weights = -target_reduced_potentials[:, 0] + reference_reduced_potentials.min(axis=1)
+    log_weights -= log_weights.max()
+
+    weights = np.exp(log_weights)
+    return (weights * observables).sum() / weights.sum()
+
+
+def get_benchmarks(length, dimensions, bootstrap_iterations):
+    """Builds the set of benchmarks to run for a given data size.
+
+    Parameters
+    ----------
+    length: int
+        The number of frames in the synthetic data sets.
+    dimensions: int
+        The number of dimensions of the multidimensional AR(1) series.
+    bootstrap_iterations: int
+        The number of bootstrap iterations to perform.
+
+    Returns
+    -------
+    dict of str and function
+        The benchmarks to run, keyed by name.
+    """
+
+    scalar_series = generate_ar1_series(length)
+    vector_series = generate_ar1_series(length, dimensions)
+    dipole_series = generate_dipole_series(length)
+
+    reference_potentials, target_potentials, observables, frame_counts = \
+        generate_reweighting_data(max(1, length // 3))
+
+    benchmarks = {
+        'calculate_statistical_inefficiency/scalar':
+            lambda: timeseries.calculate_statistical_inefficiency(scalar_series),
+        'calculate_statistical_inefficiency/vector':
+            lambda: timeseries.calculate_statistical_inefficiency(vector_series),
+        'detect_equilibration/scalar/geometric':
+            lambda: timeseries.detect_equilibration(scalar_series, geometric_origins=True),
+        'detect_equilibration/dipole/geometric':
+            lambda: timeseries.detect_equilibration(dipole_series, geometric_origins=True),
+        'decorrelate_time_series/dipole/geometric':
+            lambda: timeseries.decorrelate_time_series(dipole_series, geometric_origins=True),
+        'bootstrap/scalar':
+            lambda: bootstrap(_mean_bootstrap_function, bootstrap_iterations, 1.0,
+                              random_seed=0, values=scalar_series),
+        'bootstrap/scalar/batched':
+            lambda: bootstrap(_batched_mean_bootstrap_function, bootstrap_iterations, 1.0,
+                              batched=True, random_seed=0, values=scalar_series),
+        'bootstrap/reweighting/stratified':
+            lambda: bootstrap(_reweighting_bootstrap_function, bootstrap_iterations, 1.0, frame_counts,
+                              random_seed=0,
+                              reference_reduced_potentials=reference_potentials.T,
+                              target_reduced_potentials=target_potentials.T,
+                              observables=observables)
+    }
+
+    # Only analyse every time origin for short series, as the cost grows quadratically.
+    if length <= 10000:
+
+        benchmarks['detect_equilibration/scalar/exhaustive'] = \
+            lambda: timeseries.detect_equilibration(scalar_series)
+
+    return benchmarks
+
+
+def get_io_benchmarks(length, directory):
+    """Builds the set of benchmarks of the `StatisticsArray` I/O paths.
+
+    Parameters
+    ----------
+    length: int
+        The number of frames in the synthetic statistics.
+    directory: str
+        The directory in which to write the files.
+
+    Returns
+    -------
+    dict of str and function
+        The benchmarks to run, keyed by name.
+    """
+
+    statistics_array = generate_statistics_array(length)
+
+    openmm_path = os.path.join(directory, 'openmm.csv')
+    pandas_path = os.path.join(directory, 'statistics.csv')
+    numpy_path = os.path.join(directory, 'statistics.npy')
+    converted_path = os.path.join(directory, 'converted.npy')
+
+    write_openmm_csv(statistics_array, openmm_path)
+
+    statistics_array.save_as_pandas_csv(pandas_path)
+    statistics_array.save_as_numpy(numpy_path)
+
+    uncorrelated_indices = timeseries.get_uncorrelated_indices(length, 5.0)
+
+    return {
+        'statistics/from_openmm_csv': lambda: StatisticsArray.from_openmm_csv(openmm_path, 1.0 * unit.atmosphere),
+        'statistics/convert_openmm_csv': lambda: StatisticsArray.convert_openmm_csv(openmm_path, converted_path,
+                                                                                    1.0 * unit.atmosphere),
+        'statistics/save_as_pandas_csv': lambda: statistics_array.save_as_pandas_csv(pandas_path),
+        'statistics/from_pandas_csv': lambda: StatisticsArray.from_pandas_csv(pandas_path),
+        'statistics/save_as_numpy': lambda: statistics_array.save_as_numpy(numpy_path),
+        'statistics/from_numpy': lambda: StatisticsArray.from_numpy(numpy_path),
+        'statistics/from_statistics_array':
+            lambda: StatisticsArray.from_statistics_array(statistics_array, uncorrelated_indices),
+    }
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description='Benchmark the statistics and time series utilities.')
+
+    parser.add_argument('--lengths', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help='The number of frames in the synthetic data sets.')
+    parser.add_argument('--dimensions', type=int, default=3,
+                        help='The number of dimensions of the multidimensional AR(1) series.')
+    parser.add_argument('--bootstrap_iterations', type=int, default=250,
+                        help='The number of bootstrap iterations to perform.')
+    parser.add_argument('--repeats', type=int, default=3,
+                        help='The number of times to repeat each benchmark.')
+    parser.add_argument('--filter', type=str, default=None,
+                        help='Only run the benchmarks whose name contains this string.')
+    parser.add_argument('--output', type=str, default='benchmark_results.json',
+                        help='The path to save the JSON results to.')
+
+    args = parser.parse_args()
+
+    results = {
+        'metadata': {
+            'propertyestimator_version': propertyestimator.__version__,
+            'numpy_version': np.__version__,
+            'python_version': platform.python_version(),
+            'platform': platform.platform(),
+            'processor': platform.processor(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'arguments': vars(args)
+        },
+        'benchmarks': []
+    }
+
+    working_directory = tempfile.mkdtemp()
+
+    try:
+
+        for length in args.lengths:
+
+            benchmarks = get_benchmarks(length, args.dimensions, args.bootstrap_iterations)
+            benchmarks.update(get_io_benchmarks(length, working_directory))
+
+            for name, function in benchmarks.items():
+
+                if args.filter is not None and args.filter not in name:
+                    continue
+
+                timings = time_function(function, args.repeats)
+
+                results['benchmarks'].append({'name': name, 'length': length, **timings})
+                print(f'{name:<50} {length:>10} {timings["median"]:>12.5f} s')
+
+    finally:
+        shutil.rmtree(working_directory)
+
+    with open(args.output, 'w') as file:
+        json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
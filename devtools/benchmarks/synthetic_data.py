@@ -0,0 +1,194 @@
+"""
+A collection of generators of reproducible, synthetic data sets which mimic
+the data analysed by the statistics and time series utilities.
+"""
+import numpy as np
+from simtk import unit
+
+from propertyestimator.utils.statistics import StatisticsArray, ObservableType
+
+
+def generate_ar1_series(length, dimensions=None, phi=0.95, initial_offset=50.0, seed=0):
+    """Generates a synthetic AR(1) time series which starts away from equilibrium.
+
+    Parameters
+    ----------
+    length: int
+        The length of the series to generate.
+    dimensions: int, optional
+        The number of dimensions of each data point. If None, a one
+        dimensional series of shape=(length,) is returned.
+    phi: float
+        The autoregressive coefficient, which controls the correlation
+        time (the statistical inefficiency is (1 + phi) / (1 - phi)).
+    initial_offset: float
+        The value of the first data point, from which the series relaxes to zero.
+    seed: int
+        The seed of the random number generator.
+
+    Returns
+    -------
+    np.ndarray, shape=(length, dimensions), dtype=float
+        The generated series.
+    """
+    random_generator = np.random.default_rng(seed)
+
+    shape = (length,) if dimensions is None else (length, dimensions)
+    noise = random_generator.standard_normal(shape)
+
+    series = np.empty(shape)
+    series[0] = initial_offset
+
+    for index in range(1, length):
+        series[index] = phi * series[index - 1] + noise[index]
+
+    return series
+
+
+def generate_dipole_series(length, phi=0.98, seed=0):
+    """Generates a synthetic series of 3D dipole moments (in e nm) whose
+    fluctuations resemble those of a small box of liquid water.
+
+    Parameters
+    ----------
+    length: int
+        The length of the series to generate.
+    phi: float
+        The autoregressive coefficient of each component.
+    seed: int
+        The seed of the random number generator.
+
+    Returns
+    -------
+    np.ndarray, shape=(length, 3), dtype=float
+        The generated dipole moments.
+    """
+    return 2.0 * generate_ar1_series(length, 3, phi, initial_offset=0.0, seed=seed)
+
+
+def generate_reweighting_data(frames_per_state, number_of_states=3, seed=0):
+    """Generates a set of stratified reweighting data, as would be
+    produced by concatenating the data from several reference states.
+
+    Parameters
+    ----------
+    frames_per_state: int
+        The number of (uncorrelated) frames sampled from each reference state.
+    number_of_states: int
+        The number of reference states.
+    seed: int
+        The seed of the random number generator.
+
+    Returns
+    -------
+    np.ndarray, shape=(number_of_states, num_frames), dtype=float
+        The reduced potentials of each frame evaluated at each reference state.
+    np.ndarray, shape=(1, num_frames), dtype=float
+        The reduced potentials of each frame evaluated at the target state.
+    np.ndarray, shape=(num_frames,), dtype=float
+        The observable sampled at each frame.
+    np.ndarray, shape=(number_of_states,), dtype=int
+        The number of frames sampled from each reference state.
+    """
+    random_generator = np.random.default_rng(seed)
+
+    frame_counts = np.full(number_of_states, frames_per_state)
+    number_of_frames = frame_counts.sum()
+
+    # Treat each state as a harmonic well, with slightly shifted centres.
+    centres = np.linspace(0.0, 0.5, number_of_states)
+
+    positions = np.concatenate([random_generator.normal(centre, 1.0, frames_per_state) for centre in centres])
+
+    reference_reduced_potentials = 0.5 * (positions[np.newaxis, :] - centres[:, np.newaxis]) ** 2
+    target_reduced_potentials = 0.5 * (positions[np.newaxis, :] - 0.25) ** 2
+
+    observables = positions.copy()
+
+    assert reference_reduced_potentials.shape == (number_of_states, number_of_frames)
+
+    return reference_reduced_potentials, target_reduced_potentials, observables, frame_counts
+
+
+def generate_statistics_array(length, seed=0):
+    """Generates a synthetic `StatisticsArray` of NPT simulation statistics.
+
+    Parameters
+    ----------
+    length: int
+        The number of frames to generate.
+    seed: int
+        The seed of the random number generator.
+
+    Returns
+    -------
+    StatisticsArray
+        The generated array.
+    """
+
+    potential_energies = -40000.0 + 200.0 * generate_ar1_series(length, phi=0.9, initial_offset=5.0, seed=seed)
+    kinetic_energies = 7500.0 + 100.0 * generate_ar1_series(length, phi=0.5, initial_offset=0.0, seed=seed + 1)
+    volumes = 27.0 + 0.1 * generate_ar1_series(length, phi=0.99, initial_offset=0.0, seed=seed + 2)
+
+    total_energies = potential_energies + kinetic_energies
+    temperatures = kinetic_energies / 25.0
+    densities = 16.0 / volumes
+
+    pressure_factor = (1.0 * unit.atmosphere * unit.nanometer ** 3 *
+                       unit.AVOGADRO_CONSTANT_NA).value_in_unit(unit.kilojoule_per_mole)
+
+    enthalpies = total_energies + volumes * pressure_factor
+
+    observable_units = {
+        ObservableType.PotentialEnergy: unit.kilojoule_per_mole,
+        ObservableType.KineticEnergy: unit.kilojoule_per_mole,
+        ObservableType.TotalEnergy: unit.kilojoule_per_mole,
+        ObservableType.Temperature: unit.kelvin,
+        ObservableType.Volume: unit.nanometer ** 3,
+        ObservableType.Density: unit.gram / unit.milliliter,
+        ObservableType.Enthalpy: unit.kilojoule_per_mole
+    }
+
+    values = np.column_stack([potential_energies, kinetic_energies, total_energies,
+                              temperatures, volumes, densities, enthalpies])
+
+    return StatisticsArray(values, observable_units)
+
+
+def write_openmm_csv(statistics_array, file_path):
+    """Writes a `StatisticsArray` in the format produced by the
+    OpenMM StateDataReporter.
+
+    Parameters
+    ----------
+    statistics_array: StatisticsArray
+        The array to write.
+    file_path: str
+        The path to write the csv file to.
+    """
+
+    observable_types = [
+        ObservableType.PotentialEnergy,
+        ObservableType.KineticEnergy,
+        ObservableType.TotalEnergy,
+        ObservableType.Temperature,
+        ObservableType.Volume,
+        ObservableType.Density
+    ]
+
+    headers = ['"Step"'] + ['"{}"'.format(StatisticsArray._observable_headers[observable_type])
+                            for observable_type in observable_types]
+
+    columns = [np.arange(1, len(statistics_array) + 1) * 500]
+
+    for observable_type in observable_types:
+
+        observable = statistics_array.get_observable(observable_type)
+        columns.append(observable.value_in_unit(StatisticsArray._default_units[observable_type]))
+
+    data = np.column_stack(columns)
+
+    with open(file_path, 'w') as file:
+
+        file.write('#' + ','.join(headers) + '\n')
+        np.savetxt(file, data, delimiter=',', fmt=['%d'] + ['%.12g'] * len(observable_types))
@@ -14,7 +14,9 @@ from tornado.tcpclient import TCPClient
 
 from propertyestimator.layers import SurrogateLayer, ReweightingLayer, SimulationLayer
 from propertyestimator.properties.plugins import registered_properties
-from propertyestimator.utils.serialization import TypedBaseModel
+from propertyestimator.utils.exceptions import PropertyEstimatorException
+from propertyestimator.utils.serialization import TypedBaseModel, SerializationFormat, \
+    is_serialization_format_available, deserialize
 from propertyestimator.utils.tcp import PropertyEstimatorMessageTypes, pack_int, unpack_int
 
 
@@ -241,6 +243,11 @@ class ConnectionOptions(TypedBaseModel):
         The address of the server to connect to.
     server_port: int
         The port number that the server is listening on.
+    serialization_format: SerializationFormat
+        The format in which to send submissions to the server. Submissions
+        are sent as JSON instead if either the client or server does not support
+        the format. The server will reply to any queries about a submission in
+        the format it was accepted in.
 
     Warnings
     --------
@@ -250,7 +257,10 @@ class ConnectionOptions(TypedBaseModel):
     server_address: str = 'localhost'
     server_port: int = 8000
 
-    def __init__(self, server_address='localhost', server_port=8000):
+    serialization_format: SerializationFormat = SerializationFormat.Json
+
+    def __init__(self, server_address='localhost', server_port=8000,
+                 serialization_format=SerializationFormat.Json):
         """Constructs a new ConnectionOptions object.
 
         Parameters
@@ -259,16 +269,24 @@ class ConnectionOptions(TypedBaseModel):
             The address of the server to connect to.
         server_port: int
             The port number that the server is listening on.
+        serialization_format: SerializationFormat
+            The format in which to send submissions to the server. If
+            either the client or server does not support the chosen format,
+            the submission will instead be sent as JSON.
         """
 
         self.server_address = server_address
         self.server_port = server_port
 
+        self.serialization_format = serialization_format
+
     def __getstate__(self):
 
         return {
             'server_address': self.server_address,
             'server_port': self.server_port,
+
+            'serialization_format': self.serialization_format
         }
 
     def __setstate__(self, state):
@@ -276,6 +294,8 @@ class ConnectionOptions(TypedBaseModel):
         self.server_address = state['server_address']
         self.server_port = state['server_port']
 
+        self.serialization_format = state.get('serialization_format', SerializationFormat.Json)
+
 
 class PropertyEstimatorClient:
     """The PropertyEstimatorClient is the main object that users of the
@@ -716,34 +736,61 @@ class PropertyEstimatorClient:
 
             stream.set_nodelay(True)
 
-            # Encode the submission json into an encoded
-            # packet ready to submit to the server. The
-            # Length of the packet is encoded in the first
-            # four bytes.
-            message_type = pack_int(PropertyEstimatorMessageTypes.Submission)
+            serialization_format = self._connection_options.serialization_format
 
-            encoded_json = submission.json().encode()
-            length = pack_int(len(encoded_json))
+            if not is_serialization_format_available(serialization_format):
 
-            await stream.write(message_type + length + encoded_json)
+                logging.warning('The {} serialization format is not available, falling back '
+                                'to JSON.'.format(serialization_format.value))
 
-            logging.info("Sent calculations to {}:{}. Waiting for a response from"
-                         " the server...".format(self._connection_options.server_address,
-                                                 self._connection_options.server_port))
+                serialization_format = SerializationFormat.Json
 
-            # Wait for confirmation that the server has submitted
-            # the jobs. The first four bytes of the response should
-            # be the length of the message being sent.
-            header = await stream.read_bytes(4)
-            length = unpack_int(header)[0]
+            while request_id is None:
 
-            # Decode the response from the server. If everything
-            # went well, this should be a list of ids of the submitted
-            # calculations.
-            encoded_json = await stream.read_bytes(length)
-            request_id = json.loads(encoded_json.decode())
+                # Encode the submission into an encoded
+                # packet ready to submit to the server. The
+                # Length of the packet is encoded in the first
+                # four bytes.
+                message_type = pack_int(PropertyEstimatorMessageTypes.Submission)
+
+                encoded_submission = submission.serialize(serialization_format, binary_arrays=True,
+                                                          compact_units=True)
+                length = pack_int(len(encoded_submission))
+
+                await stream.write(message_type + length + encoded_submission)
+
+                logging.info("Sent calculations to {}:{}. Waiting for a response from"
+                             " the server...".format(self._connection_options.server_address,
+                                                     self._connection_options.server_port))
+
+                # Wait for confirmation that the server has submitted
+                # the jobs. The first four bytes of the response should
+                # be the length of the message being sent.
+                header = await stream.read_bytes(4)
+                length = unpack_int(header)[0]
+
+                # Decode the (JSON) response from the server. If everything
+                # went well, this should be the id of the submitted calculations,
+                # otherwise it will be the reason the submission was rejected.
+                encoded_json = await stream.read_bytes(length)
+                response = deserialize(encoded_json)
+
+                if not isinstance(response, PropertyEstimatorException):
+
+                    request_id = response
+                    logging.info('Received job id from server: {}'.format(request_id))
+
+                    break
+
+                logging.info('The server rejected the submission: {}'.format(response.message))
+
+                if serialization_format == SerializationFormat.Json:
+                    break
+
+                # The server may not support the requested format, so
+                # fall back to JSON which every server supports.
+                serialization_format = SerializationFormat.Json
 
-            logging.info('Received job id from server: {}'.format(request_id))
             stream.close()
             self._tcp_client.close()
 
@@ -803,9 +850,7 @@ class PropertyEstimatorClient:
             # Decode the response from the server. If everything
             # went well, this should be the finished calculation.
             if length > 0:
-
-                encoded_json = await stream.read_bytes(length)
-                server_response = encoded_json.decode()
+                server_response = await stream.read_bytes(length)
 
             stream.close()
             self._tcp_client.close()
@@ -818,7 +863,7 @@ class PropertyEstimatorClient:
                                                                              self._connection_options.server_port, e))
 
         if server_response is not None:
-            server_response = TypedBaseModel.parse_json(server_response)
+            server_response = TypedBaseModel.deserialize(server_response)
 
         # Return the ids of the submitted jobs.
         return server_response
@@ -177,7 +177,7 @@ class PropertyCalculationLayer:
                                     data_object.force_field_id = server_request.force_field_id
 
                             with open(data_file, 'w') as file:
-                                json.dump(data_object, file, cls=TypedJSONEncoder)
+                                json.dump(data_object, file, cls=TypedJSONEncoder, binary_arrays=True)
 
                             substance_id = data_object.substance.identifier
                             storage_backend.store_simulation_data(substance_id, data_directory)
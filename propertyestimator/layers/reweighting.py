@@ -7,13 +7,27 @@ import logging
 import pickle
 from os import path
 
+import numpy as np
+from simtk import unit
+
 from propertyestimator.layers import register_calculation_layer, PropertyCalculationLayer
 from propertyestimator.substances import Mixture
 from propertyestimator.utils.serialization import serialize_force_field, TypedJSONDecoder
+from propertyestimator.utils.statistics import StatisticsArray, ObservableType
 from propertyestimator.utils.utils import SubhookedABCMeta
 from propertyestimator.workflow import WorkflowGraph, Workflow
+from propertyestimator.workflow.plugins import available_protocols
+from propertyestimator.workflow.protocols import ReweightWithMBARProtocol, UnpackStoredSimulationData, \
+    ExtractUncorrelatedTrajectoryData, ConcatenateTrajectories, BuildSmirnoffSystem, CalculateReducedPotentialOpenMM
+from propertyestimator.workflow.utils import ProtocolPath
 from propertyestimator.workflow.workflow import IWorkflowProperty
 
+# The factor by which the estimated number of effective samples of stored data
+# is scaled up before it is compared to the number required by a reweighting
+# protocol, to allow for the estimates being made for each piece of data in
+# isolation rather than from all of the data combined.
+_effective_samples_safety_factor = 2.0
+
 
 class IReweightable(SubhookedABCMeta):
 
@@ -46,11 +60,18 @@ class ReweightingLayer(PropertyCalculationLayer):
         stored_data_paths = ReweightingLayer._retrieve_stored_data(data_model.queued_properties,
                                                                    storage_backend, layer_directory)
 
+        # Quantities derived from the stored data are cached in a directory which is
+        # shared by all requests handled by this layer, rather than in the stored data
+        # itself, which is owned by (and may be read-only in) the storage backend.
+        cache_directory = path.join(path.dirname(path.abspath(layer_directory)), 'cache')
+
         workflow_graph = ReweightingLayer._build_workflow_graph(layer_directory,
                                                                 data_model.queued_properties,
                                                                 target_force_field_path,
                                                                 stored_data_paths,
-                                                                data_model.options)
+                                                                data_model.options,
+                                                                data_model.force_field_id,
+                                                                cache_directory)
 
         reweighting_futures = workflow_graph.submit(calculation_backend)
 
@@ -125,9 +146,543 @@ class ReweightingLayer(PropertyCalculationLayer):
 
         return data_paths
 
+    @staticmethod
+    def _get_required_effective_samples(schema):
+        """Finds the minimum number of effective samples which the reweighting
+        protocols of a workflow schema require for their estimates to be trusted.
+
+        Parameters
+        ----------
+        schema: WorkflowSchema
+            The schema to search.
+
+        Returns
+        -------
+        int
+            The largest number of effective samples required by any of
+            the reweighting protocols in the schema, or zero if the schema
+            does not contain any.
+        """
+        required_effective_samples = 0
+
+        for protocol_schema in schema.protocols.values():
+
+            protocol_type = available_protocols.get(protocol_schema.type, None)
+
+            if protocol_type is None or not issubclass(protocol_type, ReweightWithMBARProtocol):
+                continue
+
+            protocol = protocol_type(protocol_schema.id)
+            protocol.schema = protocol_schema
+
+            if not isinstance(protocol.required_effective_samples, int):
+                continue
+
+            required_effective_samples = max(required_effective_samples, protocol.required_effective_samples)
+
+        return required_effective_samples
+
+    @staticmethod
+    def _load_stored_data_object(data_directory, data_object_cache):
+        """Loads the `StoredSimulationData` object which describes a stored
+        data directory.
+
+        Parameters
+        ----------
+        data_directory: str
+            The path to the stored simulation data directory.
+        data_object_cache: dict of str and StoredSimulationData
+            A cache of the previously loaded data objects.
+
+        Returns
+        -------
+        StoredSimulationData
+            The loaded data object.
+        """
+
+        if data_directory not in data_object_cache:
+
+            with open(path.join(data_directory, 'data.json'), 'r') as file:
+                data_object_cache[data_directory] = json.load(file, cls=TypedJSONDecoder)
+
+        return data_object_cache[data_directory]
+
+    @staticmethod
+    def _estimate_effective_samples(data_directory, data_object, thermodynamic_state, target_force_field_id):
+        """Cheaply estimates the number of effective samples which a piece of
+        stored simulation data will contribute when reweighted to a target state.
+
+        The stored statistics have already been decorrelated (see
+        `ExtractUncorrelatedStatisticsData`), and so each stored frame is treated
+        as an uncorrelated sample. If the data was generated using the target force
+        field, the number of samples is scaled by the (Kish) effective sample fraction
+        of the weights between the stored and target states, which may be computed
+        directly from the stored potential energies and volumes. Otherwise the number
+        of samples is used as the estimate.
+
+        Parameters
+        ----------
+        data_directory: str
+            The path to the stored simulation data directory.
+        data_object: StoredSimulationData
+            The object which describes the stored data.
+        thermodynamic_state: ThermodynamicState
+            The target state.
+        target_force_field_id: str
+            The id of the target force field.
+
+        Returns
+        -------
+        int
+            The number of samples in the stored data.
+        float
+            The estimated number of effective samples.
+        """
+
+        statistics = StatisticsArray.from_file(path.join(data_directory, data_object.statistics_file_name))
+        number_of_samples = len(statistics)
+
+        if (number_of_samples == 0 or target_force_field_id is None or
+            data_object.force_field_id != target_force_field_id or
+            not statistics.has_observable(ObservableType.PotentialEnergy)):
+
+            return number_of_samples, float(number_of_samples)
+
+        stored_state = data_object.thermodynamic_state
+
+        requires_volume = stored_state.pressure is not None or thermodynamic_state.pressure is not None
+
+        if requires_volume and not statistics.has_observable(ObservableType.Volume):
+            return number_of_samples, float(number_of_samples)
+
+        potential_energies = statistics.get_observable(ObservableType.PotentialEnergy)
+        potential_energies = potential_energies.value_in_unit(unit.kilojoules_per_mole)
+
+        volumes = None
+
+        if requires_volume:
+            volumes = statistics.get_observable(ObservableType.Volume).value_in_unit(unit.nanometer ** 3)
+
+        def reduced_potentials(state):
+
+            beta = 1.0 / (unit.MOLAR_GAS_CONSTANT_R * state.temperature).value_in_unit(unit.kilojoules_per_mole)
+
+            if state.pressure is None:
+                return beta * potential_energies
+
+            pressure = (state.pressure * unit.nanometer ** 3 *
+                        unit.AVOGADRO_CONSTANT_NA).value_in_unit(unit.kilojoules_per_mole)
+
+            return beta * (potential_energies + pressure * volumes)
+
+        log_weights = reduced_potentials(stored_state) - reduced_potentials(thermodynamic_state)
+        weights = np.exp(log_weights - log_weights.max())
+
+        effective_samples = weights.sum() ** 2 / (weights ** 2).sum()
+
+        return number_of_samples, effective_samples
+
+    @staticmethod
+    def _get_sample_estimates(data_path, thermodynamic_state, target_force_field_id,
+                              data_object_cache, estimates_cache):
+        """Returns the (cached) number of samples, and estimated number of effective
+        samples, of a piece of stored data. See `_estimate_effective_samples`.
+
+        Parameters
+        ----------
+        data_path: tuple(str, str)
+            A tuple of a path to the stored data directory and a path
+            to its corresponding force field.
+        thermodynamic_state: ThermodynamicState
+            The state to which the data will be reweighted.
+        target_force_field_id: str
+            The id of the force field to which the data will be reweighted.
+        data_object_cache: dict of str and StoredSimulationData
+            A cache of the previously loaded stored data objects.
+        estimates_cache: dict of tuple and tuple(int, float)
+            A cache of the previous estimates.
+
+        Returns
+        -------
+        int
+            The number of samples in the stored data.
+        float
+            The estimated number of effective samples.
+        """
+
+        data_directory = data_path[0]
+        pressure = thermodynamic_state.pressure
+
+        cache_key = (data_directory,
+                     target_force_field_id,
+                     thermodynamic_state.temperature.value_in_unit(unit.kelvin),
+                     None if pressure is None else pressure.value_in_unit(unit.atmosphere))
+
+        if cache_key not in estimates_cache:
+
+            data_object = ReweightingLayer._load_stored_data_object(data_directory, data_object_cache)
+
+            estimates_cache[cache_key] = ReweightingLayer._estimate_effective_samples(data_directory,
+                                                                                      data_object,
+                                                                                      thermodynamic_state,
+                                                                                      target_force_field_id)
+
+        return estimates_cache[cache_key]
+
+    @staticmethod
+    def _screen_stored_data(stored_data_paths, thermodynamic_state, target_force_field_id,
+                            required_effective_samples, data_object_cache, estimates_cache):
+        """Removes any stored data which contains no samples, and checks whether the
+        remaining data is likely to yield the required number of effective samples.
+
+        Notes
+        -----
+        Each piece of data is screened on its (Kish) estimate of the number of effective
+        samples at the target state (see `_estimate_effective_samples`). These estimates
+        are made for each piece of data in isolation, while the `ReweightWithMBARProtocol`
+        judges the MBAR effective samples of all of the data combined, which may exceed
+        the sum of the individual estimates. Data is therefore only rejected when the sum
+        of the estimates, scaled up by a safety factor of `_effective_samples_safety_factor`,
+        still falls short of the requirement.
+
+        Parameters
+        ----------
+        stored_data_paths: list of tuple(str, str)
+            The stored data to screen, as tuples of a path to the stored data
+            directory and a path to its corresponding force field.
+        thermodynamic_state: ThermodynamicState
+            The state to which the data will be reweighted.
+        target_force_field_id: str
+            The id of the force field to which the data will be reweighted.
+        required_effective_samples: int
+            The number of effective samples required.
+        data_object_cache: dict of str and StoredSimulationData
+            A cache of the previously loaded stored data objects.
+        estimates_cache: dict of tuple and tuple(int, float)
+            A cache of the previously estimated number of effective samples.
+
+        Returns
+        -------
+        list of tuple(str, str), optional
+            The stored data which passed the screen, or None if all of the
+            data combined cannot reach the required number of effective samples.
+        """
+
+        screened_data_paths = []
+        total_effective_samples = 0.0
+
+        for data_path in stored_data_paths:
+
+            number_of_samples, effective_samples = ReweightingLayer._get_sample_estimates(data_path,
+                                                                                          thermodynamic_state,
+                                                                                          target_force_field_id,
+                                                                                          data_object_cache,
+                                                                                          estimates_cache)
+
+            if number_of_samples == 0:
+                continue
+
+            screened_data_paths.append(data_path)
+            total_effective_samples += effective_samples
+
+        if (len(screened_data_paths) == 0 or
+            total_effective_samples * _effective_samples_safety_factor < required_effective_samples):
+
+            return None
+
+        return screened_data_paths
+
+    @staticmethod
+    def _select_stored_data(stored_data_paths, thermodynamic_state, target_force_field_id,
+                            maximum_reference_states, data_object_cache, estimates_cache):
+        """Ranks a set of stored data by how similar the force field and state that
+        it was generated with are to the target ones, and selects only the most similar.
+
+        Data generated using the target force field is always ranked ahead of data
+        which was not. The similarity of force fields is reduced to an equality check
+        on their ids - data generated using any other force field is treated as being
+        equally dissimilar. Within each of these groups, the data is then ranked by the
+        (log) ratio of its temperature to the target temperature, then by the (log)
+        ratio of the pressures, and finally by its estimated number of effective samples.
+
+        Parameters
+        ----------
+        stored_data_paths: list of tuple(str, str)
+            The stored data to select from, as tuples of a path to the stored
+            data directory and a path to its corresponding force field.
+        thermodynamic_state: ThermodynamicState
+            The state to which the data will be reweighted.
+        target_force_field_id: str
+            The id of the force field to which the data will be reweighted.
+        maximum_reference_states: int, optional
+            The maximum number of stored data to select. If None, all of the
+            data is selected.
+        data_object_cache: dict of str and StoredSimulationData
+            A cache of the previously loaded stored data objects.
+        estimates_cache: dict of tuple and tuple(int, float)
+            A cache of the previously estimated number of effective samples.
+
+        Returns
+        -------
+        list of tuple(str, str)
+            The selected stored data, ordered from most to least similar.
+        """
+
+        if maximum_reference_states is None or len(stored_data_paths) <= maximum_reference_states:
+            return stored_data_paths
+
+        def log_ratio(value, target_value):
+
+            if value is None and target_value is None:
+                return 0.0
+            elif value is None or target_value is None:
+                return np.inf
+
+            return abs(np.log(value / target_value))
+
+        def rank_key(data_path):
+
+            data_object = ReweightingLayer._load_stored_data_object(data_path[0], data_object_cache)
+            stored_state = data_object.thermodynamic_state
+
+            _, effective_samples = ReweightingLayer._get_sample_estimates(data_path, thermodynamic_state,
+                                                                          target_force_field_id,
+                                                                          data_object_cache, estimates_cache)
+
+            return (data_object.force_field_id != target_force_field_id,
+                    log_ratio(stored_state.temperature, thermodynamic_state.temperature),
+                    log_ratio(stored_state.pressure, thermodynamic_state.pressure),
+                    -effective_samples)
+
+        return sorted(stored_data_paths, key=rank_key)[:maximum_reference_states]
+
+    @staticmethod
+    def _find_reference_data(stored_data_paths, thermodynamic_state, target_force_field_id,
+                             required_effective_samples, maximum_reference_states,
+                             data_object_cache, estimates_cache):
+        """Screens a set of stored data (see `_screen_stored_data`) and selects
+        the data most similar to the target (see `_select_stored_data`) to
+        reweight from.
+
+        The selected data is screened again, so that data is only returned
+        if the selected subset can still reach the required number of
+        effective samples.
+
+        Parameters
+        ----------
+        stored_data_paths: list of tuple(str, str)
+            The stored data to select from, as tuples of a path to the stored
+            data directory and a path to its corresponding force field.
+        thermodynamic_state: ThermodynamicState
+            The state to which the data will be reweighted.
+        target_force_field_id: str
+            The id of the force field to which the data will be reweighted.
+        required_effective_samples: int
+            The number of effective samples required.
+        maximum_reference_states: int, optional
+            The maximum number of stored data to select. If None, all of the
+            data which passes the screen is selected.
+        data_object_cache: dict of str and StoredSimulationData
+            A cache of the previously loaded stored data objects.
+        estimates_cache: dict of tuple and tuple(int, float)
+            A cache of the previously estimated number of effective samples.
+
+        Returns
+        -------
+        list of tuple(str, str), optional
+            The selected stored data, or None if no suitable data was found.
+        """
+
+        screened_data_paths = ReweightingLayer._screen_stored_data(stored_data_paths, thermodynamic_state,
+                                                                   target_force_field_id,
+                                                                   required_effective_samples,
+                                                                   data_object_cache, estimates_cache)
+
+        if screened_data_paths is None:
+            return None
+
+        selected_data_paths = ReweightingLayer._select_stored_data(screened_data_paths, thermodynamic_state,
+                                                                   target_force_field_id,
+                                                                   maximum_reference_states,
+                                                                   data_object_cache, estimates_cache)
+
+        if len(selected_data_paths) == len(screened_data_paths):
+            return selected_data_paths
+
+        # Make sure that discarding the less similar data has not
+        # dropped the samples below the required amount.
+        return ReweightingLayer._screen_stored_data(selected_data_paths, thermodynamic_state,
+                                                    target_force_field_id, required_effective_samples,
+                                                    data_object_cache, estimates_cache)
+
+    @staticmethod
+    def _find_stored_data(workflow, protocol_path, data_object_cache):
+        """Finds the stored data which is unpacked by the protocol at
+        the head of a path.
+
+        Parameters
+        ----------
+        workflow: Workflow
+            The workflow which contains the protocol.
+        protocol_path: ProtocolPath or Any
+            The path to the output of the protocol.
+        data_object_cache: dict of str and StoredSimulationData
+            A cache of the previously loaded stored data objects.
+
+        Returns
+        -------
+        UnpackStoredSimulationData, optional
+            The protocol which unpacks the data, or None if the
+            path does not point to such a protocol.
+        StoredSimulationData, optional
+            The object which describes the stored data.
+        """
+
+        if (not isinstance(protocol_path, ProtocolPath) or
+            protocol_path.start_protocol not in workflow.protocols):
+
+            return None, None
+
+        protocol = workflow.protocols[protocol_path.start_protocol]
+
+        if not isinstance(protocol, UnpackStoredSimulationData):
+            return None, None
+
+        data_directory = protocol.simulation_data_path[0]
+        return protocol, ReweightingLayer._load_stored_data_object(data_directory, data_object_cache)
+
+    @staticmethod
+    def _find_source_trajectories(workflow, trajectory_path, data_object_cache):
+        """Finds the stored trajectories which the frames of a (possibly
+        decorrelated and concatenated) trajectory in a workflow are drawn from.
+
+        Parameters
+        ----------
+        workflow: Workflow
+            The workflow which produces the trajectory.
+        trajectory_path: ProtocolPath or Any
+            The path to the protocol output which is the trajectory.
+        data_object_cache: dict of str and StoredSimulationData
+            A cache of the previously loaded stored data objects.
+
+        Returns
+        -------
+        list of str, optional
+            The paths to the stored trajectories, or None if they could not be found.
+        """
+
+        unpack_protocol, data_object = ReweightingLayer._find_stored_data(workflow, trajectory_path,
+                                                                          data_object_cache)
+
+        if unpack_protocol is not None:
+            return [path.join(unpack_protocol.simulation_data_path[0], data_object.trajectory_file_name)]
+
+        if (not isinstance(trajectory_path, ProtocolPath) or
+            trajectory_path.start_protocol not in workflow.protocols):
+
+            return None
+
+        protocol = workflow.protocols[trajectory_path.start_protocol]
+
+        if isinstance(protocol, ExtractUncorrelatedTrajectoryData):
+
+            return ReweightingLayer._find_source_trajectories(workflow, protocol.input_trajectory_path,
+                                                              data_object_cache)
+
+        if not isinstance(protocol, ConcatenateTrajectories):
+            return None
+
+        source_trajectories = []
+
+        for input_trajectory_path in protocol.input_trajectory_paths:
+
+            input_source_trajectories = ReweightingLayer._find_source_trajectories(workflow, input_trajectory_path,
+                                                                                   data_object_cache)
+
+            if input_source_trajectories is None:
+                return None
+
+            source_trajectories.extend(input_source_trajectories)
+
+        return source_trajectories
+
+    @staticmethod
+    def _prune_cached_protocols(workflow, data_object_cache):
+        """Removes the protocols which build the system of a piece of stored data and
+        evaluate its reduced potentials from a workflow, when all of those reduced
+        potentials have already been cached (see `CalculateReducedPotentialOpenMM`).
+
+        Parameters
+        ----------
+        workflow: Workflow
+            The workflow to prune.
+        data_object_cache: dict of str and StoredSimulationData
+            A cache of the previously loaded stored data objects.
+        """
+
+        for protocol in list(workflow.protocols.values()):
+
+            if (not isinstance(protocol, CalculateReducedPotentialOpenMM) or
+                not isinstance(protocol.system_path, ProtocolPath) or
+                len(protocol.additional_system_paths) > 0):
+
+                continue
+
+            build_protocol = workflow.protocols.get(protocol.system_path.start_protocol)
+
+            if not isinstance(build_protocol, BuildSmirnoffSystem):
+                continue
+
+            unpack_protocol, data_object = ReweightingLayer._find_stored_data(workflow, protocol.cache_directory,
+                                                                              data_object_cache)
+
+            if unpack_protocol is None or not unpack_protocol.cache_root_directory:
+                continue
+
+            state_protocol, _ = ReweightingLayer._find_stored_data(workflow, protocol.thermodynamic_state,
+                                                                   data_object_cache)
+
+            if state_protocol is not unpack_protocol:
+                continue
+
+            source_trajectories = ReweightingLayer._find_source_trajectories(workflow,
+                                                                             protocol.trajectory_file_path,
+                                                                             data_object_cache)
+
+            if source_trajectories is None or not all([path.isfile(source) for source in source_trajectories]):
+                continue
+
+            data_directory, force_field_path = unpack_protocol.simulation_data_path
+
+            cache_directory = UnpackStoredSimulationData.get_cache_directory(unpack_protocol.cache_root_directory,
+                                                                             data_directory, data_object,
+                                                                             force_field_path)
+
+            is_cached = all([path.isfile(CalculateReducedPotentialOpenMM.get_cached_potentials_path(
+                cache_directory, data_object.thermodynamic_state, 1, source_trajectory))
+                for source_trajectory in source_trajectories])
+
+            if not is_cached:
+                continue
+
+            logging.info('The reduced potentials of {} are cached, and so its system '
+                         'will not be built.'.format(data_directory))
+
+            # The system is only loaded if the reduced potentials are not cached.
+            protocol.system_path = ''
+
+            # Only remove the system building protocol if no other protocol needs the system.
+            if any([dependency.start_protocol == build_protocol.id
+                    for other_protocol in workflow.protocols.values()
+                    for dependency in other_protocol.dependencies]):
+
+                continue
+
+            workflow.remove_protocol(build_protocol)
+
     @staticmethod
     def _build_workflow_graph(working_directory, properties, target_force_field_path,
-                              stored_data_paths, options):
+                              stored_data_paths, options, target_force_field_id=None, cache_directory=None):
         """Construct a workflow graph, containing all of the workflows which should
         be followed to estimate a set of properties by reweighting.
 
@@ -146,9 +701,20 @@ class ReweightingLayer(PropertyCalculationLayer):
             its corresponding force field path.
         options: PropertyEstimatorOptions
             The options to run the workflows with.
+        target_force_field_id: str, optional
+            The id of the target force field. When stored data was generated
+            with this force field, the overlap with the target state may be
+            estimated directly from the stored energies.
+        cache_directory: str, optional
+            The directory in which to cache any quantities derived from
+            the stored data, such as the reference reduced potentials. If
+            None, no caching will be performed.
         """
         workflow_graph = WorkflowGraph(working_directory)
 
+        data_object_cache = {}
+        estimates_cache = {}
+
         for property_to_calculate in properties:
 
             if (not isinstance(property_to_calculate, IReweightable) or
@@ -177,7 +743,31 @@ class ReweightingLayer(PropertyCalculationLayer):
             if property_to_calculate.substance.identifier not in stored_data_paths:
                 continue
 
-            global_metadata['full_system_data'] = stored_data_paths[property_to_calculate.substance.identifier]
+            # Cheaply screen out any workflows which could not possibly reach the
+            # required number of effective samples before scheduling them.
+            required_effective_samples = ReweightingLayer._get_required_effective_samples(schema)
+
+            # Only reweight from the stored data closest to the target state and force field.
+            maximum_reference_states = None
+
+            if options.workflow_options is not None and property_type in options.workflow_options:
+                maximum_reference_states = options.workflow_options[property_type].maximum_reference_states
+
+            full_system_data = ReweightingLayer._find_reference_data(
+                stored_data_paths[property_to_calculate.substance.identifier],
+                property_to_calculate.thermodynamic_state, target_force_field_id,
+                required_effective_samples, maximum_reference_states,
+                data_object_cache, estimates_cache)
+
+            if full_system_data is None:
+
+                logging.info('The stored data for {} is not expected to yield enough effective '
+                             'samples to be reweighted.'.format(property_to_calculate.id))
+
+                continue
+
+            global_metadata['full_system_data'] = full_system_data
+            global_metadata['cache_directory'] = cache_directory
             global_metadata['component_data'] = []
 
             if property_to_calculate.multi_component_property:
@@ -195,7 +785,18 @@ class ReweightingLayer(PropertyCalculationLayer):
                         has_data_for_property = False
                         break
 
-                    global_metadata['component_data'].append(stored_data_paths[temporary_component.identifier])
+                    component_data = ReweightingLayer._find_reference_data(
+                        stored_data_paths[temporary_component.identifier],
+                        property_to_calculate.thermodynamic_state, target_force_field_id,
+                        required_effective_samples, maximum_reference_states,
+                        data_object_cache, estimates_cache)
+
+                    if component_data is None:
+
+                        has_data_for_property = False
+                        break
+
+                    global_metadata['component_data'].append(component_data)
 
                 if not has_data_for_property:
                     continue
@@ -203,6 +804,8 @@ class ReweightingLayer(PropertyCalculationLayer):
             workflow = Workflow(property_to_calculate, global_metadata)
             workflow.schema = schema
 
+            ReweightingLayer._prune_cached_protocols(workflow, data_object_cache)
+
             from propertyestimator.properties import CalculationSource
             workflow.physical_property.source = CalculationSource(fidelity=ReweightingLayer.__name__,
                                                                            provenance={})
@@ -151,11 +151,15 @@ class ExtractAverageDielectric(protocols.AverageTrajectoryProperty):
         self._uncorrelated_values = unit.Quantity(dipole_moments, None)
         self._uncorrelated_volumes = volumes * unit.nanometer ** 3
 
-        value, uncertainty = bootstrap(self._bootstrap_function,
-                                       self._bootstrap_iterations,
-                                       self._bootstrap_sample_size,
-                                       dipoles=dipole_moments,
-                                       volumes=volumes)
+        value, uncertainty, self._bootstrap_iterations_performed = \
+            bootstrap(self._bootstrap_function,
+                      self._bootstrap_iterations,
+                      self._bootstrap_sample_size,
+                      convergence_tolerance=self._bootstrap_convergence_tolerance,
+                      random_seed=None if self._bootstrap_random_seed < 0 else self._bootstrap_random_seed,
+                      return_iterations=True,
+                      dipoles=dipole_moments,
+                      volumes=volumes)
 
         self._value = EstimatedQuantity(unit.Quantity(value, None),
                                         unit.Quantity(uncertainty, None), self.id)
@@ -254,7 +258,7 @@ class ReweightDielectricConstant(protocols.ReweightWithMBARProtocol):
                                                                            'not match the number of reference volumes.')
 
         dipole_moments = self._prepare_observables_array(self._reference_observables)
-        dipole_moments_sqr = np.array([[np.dot(dipole, dipole) for dipole in np.transpose(dipole_moments)]])
+        dipole_moments_sqr = (dipole_moments * dipole_moments).sum(axis=0)[np.newaxis, :]
 
         volumes = self._prepare_observables_array(self._reference_volumes)
 
@@ -265,22 +269,28 @@ class ReweightDielectricConstant(protocols.ReweightWithMBARProtocol):
 
             frame_counts = np.array([len(observable) for observable in self._reference_observables])
 
-            # Construct an mbar object to get out the number of effective samples.
-            import pymbar
-            mbar = pymbar.MBAR(self._reference_reduced_potentials,
-                               frame_counts, verbose=False, relative_tolerance=1e-12)
+            # Construct an mbar object to get out the number of effective samples,
+            # caching the converged free energies to warm start the bootstrap solves.
+            self._reference_free_energies = None
+
+            mbar = self._construct_mbar(self._reference_reduced_potentials, frame_counts)
+            self._reference_free_energies = mbar.f_k
 
             effective_samples = mbar.computeEffectiveSampleNumber().max()
 
-            value, uncertainty = bootstrap(self._bootstrap_function,
-                                           self._bootstrap_iterations,
-                                           self._bootstrap_sample_size,
-                                           frame_counts,
-                                           reference_reduced_potentials=reference_potentials,
-                                           target_reduced_potentials=target_potentials,
-                                           dipoles=np.transpose(dipole_moments),
-                                           dipoles_sqr=np.transpose(dipole_moments_sqr),
-                                           volumes=np.transpose(volumes))
+            value, uncertainty, self._bootstrap_iterations_performed = \
+                bootstrap(self._bootstrap_function,
+                          self._bootstrap_iterations,
+                          self._bootstrap_sample_size,
+                          frame_counts,
+                          convergence_tolerance=self._bootstrap_convergence_tolerance,
+                          random_seed=None if self._bootstrap_random_seed < 0 else self._bootstrap_random_seed,
+                          return_iterations=True,
+                          reference_reduced_potentials=reference_potentials,
+                          target_reduced_potentials=target_potentials,
+                          dipoles=np.transpose(dipole_moments),
+                          dipoles_sqr=np.transpose(dipole_moments_sqr),
+                          volumes=np.transpose(volumes))
 
             if effective_samples < self._required_effective_samples:
                 uncertainty = sys.float_info.max
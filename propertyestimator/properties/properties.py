@@ -152,7 +152,8 @@ class PropertyWorkflowOptions:
 
     def __init__(self,
                  convergence_mode=ConvergenceMode.RelativeUncertainty,
-                 relative_uncertainty_fraction=1.0, absolute_uncertainty=None):
+                 relative_uncertainty_fraction=1.0, absolute_uncertainty=None,
+                 maximum_reference_states=None):
         """Constructs a new DefaultPropertyWorkflowOptions object.
 
         Parameters
@@ -170,6 +171,11 @@ class PropertyWorkflowOptions:
             If the convergence mode is set to `AbsoluteUncertainty`, then workflows
             will by default run simulations until the estimated uncertainty is less
             than the `absolute_uncertainty`
+        maximum_reference_states: int, optional
+            The maximum number of sets of stored simulation data (i.e. reference
+            states) which will be reweighted when estimating a property. The stored
+            data closest to the target state and force field will be used. If None,
+            all of the available stored data will be used.
         """
 
         self.convergence_mode = convergence_mode
@@ -177,6 +183,8 @@ class PropertyWorkflowOptions:
         self.absolute_uncertainty = absolute_uncertainty
         self.relative_uncertainty_fraction = relative_uncertainty_fraction
 
+        self.maximum_reference_states = maximum_reference_states
+
         if (self.convergence_mode is self.ConvergenceMode.RelativeUncertainty and
             self.relative_uncertainty_fraction is None):
 
@@ -189,13 +197,18 @@ class PropertyWorkflowOptions:
             raise ValueError('The absolute uncertainty must be set when the convergence '
                              'mode is set to AbsoluteUncertainty.')
 
+        if self.maximum_reference_states is not None and self.maximum_reference_states < 1:
+            raise ValueError('The maximum number of reference states must be at least one.')
+
     def __getstate__(self):
 
         return {
             'convergence_mode': self.convergence_mode,
 
             'absolute_uncertainty': self.absolute_uncertainty,
-            'relative_uncertainty_fraction': self.relative_uncertainty_fraction
+            'relative_uncertainty_fraction': self.relative_uncertainty_fraction,
+
+            'maximum_reference_states': self.maximum_reference_states
         }
 
     def __setstate__(self, state):
@@ -205,6 +218,8 @@ class PropertyWorkflowOptions:
         self.absolute_uncertainty = state['absolute_uncertainty']
         self.relative_uncertainty_fraction = state['relative_uncertainty_fraction']
 
+        self.maximum_reference_states = state['maximum_reference_states']
+
 
 class PhysicalProperty(TypedBaseModel):
     """Represents the value of any physical property and it's uncertainty.
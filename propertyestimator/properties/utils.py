@@ -52,6 +52,7 @@ def generate_base_reweighting_protocols(analysis_protocol, replicator_id='data_r
     # Unpack all the of the stored data.
     unpack_stored_data = protocols.UnpackStoredSimulationData('unpack_data{}'.format(replicator_suffix))
     unpack_stored_data.simulation_data_path = ReplicatorValue(replicator_id)
+    unpack_stored_data.cache_root_directory = ProtocolPath('cache_directory', 'global')
 
     # The autocorrelation time of each of the stored files will be calculated for this property
     # using the passed in analysis protocol.
@@ -84,6 +85,7 @@ def generate_base_reweighting_protocols(analysis_protocol, replicator_id='data_r
     build_reference_system.substance = ProtocolPath('substance', unpack_stored_data.id)
     build_reference_system.coordinate_file_path = ProtocolPath('coordinate_file_path',
                                                                unpack_stored_data.id)
+    build_reference_system.cache_directory = ProtocolPath('cache_directory', unpack_stored_data.id)
 
     reduced_reference_potential = protocols.CalculateReducedPotentialOpenMM('reduced_potential{}'.format(
                                                                             replicator_suffix))
@@ -96,6 +98,10 @@ def generate_base_reweighting_protocols(analysis_protocol, replicator_id='data_r
     reduced_reference_potential.trajectory_file_path = ProtocolPath('output_trajectory_path',
                                                                     concatenate_trajectories.id)
 
+    # Cache the reference potentials of the stored data, so that they need not be
+    # recomputed when the same data is reweighted again.
+    reduced_reference_potential.cache_directory = ProtocolPath('cache_directory', unpack_stored_data.id)
+
     # Calculate the reduced potential of the target state.
     build_target_system = protocols.BuildSmirnoffSystem('build_system_target' + id_suffix)
 
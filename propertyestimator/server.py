@@ -2,6 +2,7 @@
 Property calculator 'server' side API.
 """
 
+import hashlib
 import json
 import logging
 import uuid
@@ -14,7 +15,8 @@ from tornado.tcpserver import TCPServer
 from propertyestimator.client import PropertyEstimatorSubmission, PropertyEstimatorResult, PropertyEstimatorOptions
 from propertyestimator.layers import available_layers
 from propertyestimator.utils.exceptions import PropertyEstimatorException
-from propertyestimator.utils.serialization import TypedBaseModel
+from propertyestimator.utils.serialization import TypedBaseModel, SerializationFormat, get_serialization_format, \
+    is_serialization_format_available
 from propertyestimator.utils.tcp import PropertyEstimatorMessageTypes, pack_int, unpack_int
 
 
@@ -150,6 +152,10 @@ class PropertyEstimatorServer(TCPServer):
         self._queued_calculations = {}
         self._finished_calculations = {}
 
+        # The id of each queued or finished server request, keyed by a hash
+        # of the request as it was originally submitted.
+        self._server_request_ids_by_hash = {}
+
         # Each client request id (i.e an id relating to a client requesting
         # that an entire data set of properties is estimated) is matched to
         # a set of server set request ids.
@@ -159,6 +165,10 @@ class PropertyEstimatorServer(TCPServer):
         # properties per substance.
         self._server_request_ids_per_client_id = {}
 
+        # The format which each client submitted their request in, and
+        # hence the format in which any queries will be responded to.
+        self._serialization_format_per_client_id = {}
+
         super().__init__()
 
         self.bind(self._port)
@@ -186,12 +196,34 @@ class PropertyEstimatorServer(TCPServer):
         # Read the incoming request from the server. The first four bytes
         # of the response should be the length of the message being sent.
 
-        # Decode the client submission json.
-        encoded_json = await stream.read_bytes(message_length)
-        json_model = encoded_json.decode()
+        # Decode the client submission, which may be in any of the supported formats.
+        encoded_submission = await stream.read_bytes(message_length)
+        serialization_format = get_serialization_format(encoded_submission)
+
+        error_message = None
+        client_data_model = None
+
+        if not is_serialization_format_available(serialization_format):
+
+            error_message = 'The server does not support the {} serialization ' \
+                            'format.'.format(serialization_format.value)
+
+        else:
+
+            try:
+                client_data_model = PropertyEstimatorSubmission.deserialize(encoded_submission)
+            except Exception as e:
+                error_message = 'The submission could not be deserialized: {}'.format(e)
+
+        if error_message is not None:
 
-        # TODO: Add exception handling so the server can gracefully reject bad json.
-        client_data_model = PropertyEstimatorSubmission.parse_json(json_model)
+            logging.info('Rejected estimation request from {}: {}'.format(address, error_message))
+
+            # Reject the submission in JSON, which every client can decode.
+            encoded_exception = PropertyEstimatorException(directory='', message=error_message).serialize()
+            await stream.write(pack_int(len(encoded_exception)) + encoded_exception)
+
+            return
 
         client_request_id = str(uuid.uuid4())
 
@@ -199,6 +231,7 @@ class PropertyEstimatorServer(TCPServer):
             client_request_id = str(uuid.uuid4())
 
         self._server_request_ids_per_client_id[client_request_id] = []
+        self._serialization_format_per_client_id[client_request_id] = serialization_format
 
         # Pass the ids of the submitted requests back to the
         # client.
@@ -235,6 +268,9 @@ class PropertyEstimatorServer(TCPServer):
 
         response = None
 
+        serialization_format = self._serialization_format_per_client_id.get(client_request_id,
+                                                                            SerializationFormat.Json)
+
         if client_request_id not in self._server_request_ids_per_client_id:
 
             response = PropertyEstimatorException(directory='',
@@ -244,7 +280,7 @@ class PropertyEstimatorServer(TCPServer):
         else:
             response = self._query_client_request_status(client_request_id)
 
-        encoded_response = response.json().encode()
+        encoded_response = response.serialize(serialization_format, binary_arrays=True, compact_units=True)
         length = pack_int(len(encoded_response))
 
         await stream.write(length + encoded_response)
@@ -307,46 +343,49 @@ class PropertyEstimatorServer(TCPServer):
             # logging.info("Lost connection to {}:{} : {}.".format(address, self._port, e))
             pass
 
-    def _find_server_estimation_request(self, request):
-        """Checks whether the server is currently, or has previously completed
-        a request to estimate a set of properties for a particular substance
-        using the same force field parameters and estimation options.
+    @staticmethod
+    def _get_server_request_hash(request):
+        """Computes a hash of the contents of a request, ignoring
+        its id.
 
         Parameters
         ----------
         request: PropertyEstimatorServer.ServerEstimationRequest
-            The request to check for.
+            The request to hash.
 
         Returns
         -------
-        str, optional
-            The id of the existing request if one exists, otherwise None.
+        str
+            The sha256 hex digest of the serialized request.
         """
 
         cached_request_id = request.id
+        request.id = ''
 
-        for existing_id in self._queued_calculations:
-
-            request.id = existing_id
-
-            if request.json() != self._queued_calculations[existing_id].json():
-                continue
-
+        try:
+            serialized_request = request.serialize(binary_arrays=True, compact_units=True)
+        finally:
             request.id = cached_request_id
-            return existing_id
-
-        for existing_id in self._finished_calculations:
 
-            request.id = existing_id
+        return hashlib.sha256(serialized_request).hexdigest()
 
-            if request.json() != self._finished_calculations[existing_id].json():
-                continue
+    def _find_server_estimation_request(self, request_hash):
+        """Checks whether the server is currently, or has previously completed
+        a request to estimate a set of properties for a particular substance
+        using the same force field parameters and estimation options.
 
-            request.id = cached_request_id
-            return existing_id
+        Parameters
+        ----------
+        request_hash: str
+            The hash of the request to check for, as computed by
+            `_get_server_request_hash`.
 
-        request.id = cached_request_id
-        return None
+        Returns
+        -------
+        str, optional
+            The id of the existing request if one exists, otherwise None.
+        """
+        return self._server_request_ids_by_hash.get(request_hash)
 
     def _prepare_server_requests(self, client_data_model, client_request_id):
         """Turns a client estimation submission request into a form more useful
@@ -370,12 +409,15 @@ class PropertyEstimatorServer(TCPServer):
         """
 
         force_field = client_data_model.force_field
-        force_field_id = self._storage_backend.has_force_field(force_field)
+
+        # Only hash the force field once per submission.
+        force_field_hash = self._storage_backend.get_force_field_hash(force_field)
+        force_field_id = self._storage_backend.has_force_field(force_field, force_field_hash)
 
         if force_field_id is None:
 
             force_field_id = str(uuid.uuid4())
-            self._storage_backend.store_force_field(force_field_id, force_field)
+            self._storage_backend.store_force_field(force_field_id, force_field, force_field_hash)
 
         server_requests = {}
 
@@ -420,7 +462,9 @@ class PropertyEstimatorServer(TCPServer):
         for server_request_id in server_requests:
 
             server_request = server_requests[server_request_id]
-            existing_id = self._find_server_estimation_request(server_request)
+
+            request_hash = self._get_server_request_hash(server_request)
+            existing_id = self._find_server_estimation_request(request_hash)
 
             if existing_id is None:
 
@@ -428,6 +472,7 @@ class PropertyEstimatorServer(TCPServer):
                 existing_id = server_request_id
 
                 self._queued_calculations[server_request_id] = server_request
+                self._server_request_ids_by_hash[request_hash] = server_request_id
 
             self._server_request_ids_per_client_id[client_request_id].append(existing_id)
 
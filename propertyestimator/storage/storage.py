@@ -34,6 +34,10 @@ class PropertyEstimatorStorage:
         self._force_field_id_map = {}
         self._force_field_id_map_file = 'internal_force_field_map'
 
+        # The reverse map, between a force field hash and the
+        # ids of the force fields with that hash.
+        self._force_field_ids_by_hash = {}
+
         self._simulation_data_by_substance = {}
         self._simulation_data_by_substance_file = 'internal_simulation_data_map'
 
@@ -133,7 +137,7 @@ class PropertyEstimatorStorage:
                 # The force field file does not exist, so skip the entry.
                 continue
 
-            self._force_field_id_map[unique_id] = force_field_id_map[unique_id]
+            self._set_force_field_hash(unique_id, force_field_id_map[unique_id])
 
         # Store a fresh copy of the hashes so that only force fields that
         # exist are actually referenced.
@@ -144,10 +148,58 @@ class PropertyEstimatorStorage:
         """
         self.store_object(self._force_field_id_map_file, self._force_field_id_map)
 
+    def _set_force_field_hash(self, unique_id, hash_string):
+        """Sets the hash of a stored force field, keeping the
+        map of hashes to ids in sync.
+
+        Parameters
+        ----------
+        unique_id: str
+            The unique id of the force field.
+        hash_string: str
+            The hash of the force field.
+        """
+
+        existing_hash = self._force_field_id_map.get(unique_id)
+
+        if existing_hash is not None and unique_id in self._force_field_ids_by_hash.get(existing_hash, []):
+            self._force_field_ids_by_hash[existing_hash].remove(unique_id)
+
+        self._force_field_id_map[unique_id] = hash_string
+
+        if hash_string not in self._force_field_ids_by_hash:
+            self._force_field_ids_by_hash[hash_string] = []
+
+        self._force_field_ids_by_hash[hash_string].append(unique_id)
+
     @staticmethod
-    def _force_field_to_hash(force_field):
-        """Converts a ForceField object to a hash
-        string.
+    def _serialized_force_field_to_hash(serialized_force_field):
+        """Converts a force field which has been serialized by
+        `serialize_force_field` to a hash string.
+
+        Parameters
+        ----------
+        serialized_force_field: dict of int and str
+            The serialized force field to hash.
+
+        Returns
+        -------
+        str
+            The hash key of the force field.
+        """
+        force_field_pickle = pickle.dumps(serialized_force_field)
+        return hashlib.sha256(force_field_pickle).hexdigest()
+
+    @staticmethod
+    def get_force_field_hash(force_field):
+        """Converts a ForceField object to a hash string.
+
+        Notes
+        -----
+        Computing the hash requires the full force field to be serialized. When
+        the same force field will be checked for and / or stored multiple times,
+        the hash should be computed once using this method, and passed to
+        `has_force_field` and `store_force_field`.
 
         Parameters
         ----------
@@ -159,10 +211,9 @@ class PropertyEstimatorStorage:
         str
             The hash key of the force field.
         """
-        force_field_pickle = pickle.dumps(serialize_force_field(force_field))
-        return hashlib.sha256(force_field_pickle).hexdigest()
+        return PropertyEstimatorStorage._serialized_force_field_to_hash(serialize_force_field(force_field))
 
-    def has_force_field(self, force_field):
+    def has_force_field(self, force_field, force_field_hash=None):
         """Checks whether the force field has been previously
         stored in the force field directory.
 
@@ -170,6 +221,9 @@ class PropertyEstimatorStorage:
         ----------
         force_field: ForceField
             The force field to check for.
+        force_field_hash: str, optional
+            The precomputed hash of the force field (see `get_force_field_hash`).
+            If `None`, the hash will be computed from the `force_field`.
 
         Returns
         -------
@@ -178,14 +232,10 @@ class PropertyEstimatorStorage:
             the unique id of the cached force field.
         """
 
-        hash_string = self._force_field_to_hash(force_field)
-
-        for unique_id in self._force_field_id_map:
+        if force_field_hash is None:
+            force_field_hash = self.get_force_field_hash(force_field)
 
-            existing_hash = self._force_field_id_map[unique_id]
-
-            if hash_string != existing_hash:
-                continue
+        for unique_id in self._force_field_ids_by_hash.get(force_field_hash, []):
 
             force_field_key = 'force_field_{}'.format(unique_id)
 
@@ -213,7 +263,7 @@ class PropertyEstimatorStorage:
         force_field_key = 'force_field_{}'.format(unique_id)
         return deserialize_force_field(self.retrieve_object(force_field_key))
 
-    def store_force_field(self, unique_id, force_field):
+    def store_force_field(self, unique_id, force_field, force_field_hash=None):
         """Store the force field in the cached force field
         directory.
 
@@ -227,16 +277,23 @@ class PropertyEstimatorStorage:
             The unique id assigned to the force field.
         force_field: ForceField
             The force field to cache.
+        force_field_hash: str, optional
+            The precomputed hash of the force field (see `get_force_field_hash`).
+            If `None`, the hash will be computed from the `force_field`.
         """
 
-        hash_string = self._force_field_to_hash(force_field)
+        serialized_force_field = serialize_force_field(force_field)
+
+        if force_field_hash is None:
+            force_field_hash = self._serialized_force_field_to_hash(serialized_force_field)
+
         force_field_key = 'force_field_{}'.format(unique_id)
 
-        self.store_object(force_field_key, serialize_force_field(force_field))
+        self.store_object(force_field_key, serialized_force_field)
 
-        if unique_id not in self._force_field_id_map or hash_string != self._force_field_id_map[unique_id]:
+        if unique_id not in self._force_field_id_map or force_field_hash != self._force_field_id_map[unique_id]:
 
-            self._force_field_id_map[unique_id] = hash_string
+            self._set_force_field_hash(unique_id, force_field_hash)
             self._save_force_field_hashes()
 
     def _load_simulation_data_map(self):
@@ -352,7 +409,7 @@ class PropertyEstimatorStorage:
             data_to_store.unique_id = simulation_data_key
 
             with open(path.join(simulation_data_directory, 'data.json'), 'w') as file:
-                json.dump(data_to_store, file, cls=TypedJSONEncoder)
+                json.dump(data_to_store, file, cls=TypedJSONEncoder, binary_arrays=True)
 
         self.store_object(simulation_data_key, data_to_store)
 
@@ -4,8 +4,11 @@ Units tests for propertyestimator.client and server
 import tempfile
 from os import path
 
+import pytest
+
 from propertyestimator.backends import DaskLocalClusterBackend, ComputeResources
-from propertyestimator.client import PropertyEstimatorClient, PropertyEstimatorOptions
+from propertyestimator import server
+from propertyestimator.client import PropertyEstimatorClient, PropertyEstimatorOptions, ConnectionOptions
 from propertyestimator.datasets import PhysicalPropertyDataSet
 from propertyestimator.layers import register_calculation_layer, PropertyCalculationLayer
 from propertyestimator.properties import Density
@@ -14,6 +17,7 @@ from propertyestimator.storage import LocalFileStorage
 from propertyestimator.tests.utils import create_dummy_property
 from propertyestimator.utils import get_data_filename
 from propertyestimator.utils.exceptions import PropertyEstimatorException
+from propertyestimator.utils.serialization import SerializationFormat
 
 
 @register_calculation_layer()
@@ -68,3 +72,66 @@ def test_estimate_request():
         result = request.results(synchronous=True, polling_interval=0)
 
         assert not isinstance(result, PropertyEstimatorException)
+
+
+def test_unsupported_serialization_format(monkeypatch):
+    """Test that a submission in a format which the server does not
+    support is rejected, and then resubmitted as JSON by the client."""
+
+    pytest.importorskip('msgpack')
+
+    from openforcefield.typing.engines import smirnoff
+
+    # Make the server believe that it cannot decode MessagePack.
+    monkeypatch.setattr(server, 'is_serialization_format_available',
+                        lambda serialization_format: serialization_format == SerializationFormat.Json)
+
+    with tempfile.TemporaryDirectory() as temporary_directory:
+
+        storage_directory = path.join(temporary_directory, 'storage')
+        working_directory = path.join(temporary_directory, 'working')
+
+        dummy_property = create_dummy_property(Density)
+
+        dummy_data_set = PhysicalPropertyDataSet()
+        dummy_data_set.properties[dummy_property.substance.identifier] = [dummy_property]
+
+        force_field = smirnoff.ForceField(get_data_filename('forcefield/smirnoff99Frosst.offxml'))
+
+        calculation_backend = DaskLocalClusterBackend(1, ComputeResources())
+        storage_backend = LocalFileStorage(storage_directory)
+
+        PropertyEstimatorServer(calculation_backend, storage_backend, port=8001,
+                                working_directory=working_directory)
+
+        connection_options = ConnectionOptions(server_port=8001,
+                                               serialization_format=SerializationFormat.MessagePack)
+
+        property_estimator = PropertyEstimatorClient(connection_options)
+        options = PropertyEstimatorOptions(allowed_calculation_layers=[TestCalculationLayer])
+
+        request = property_estimator.request_estimate(dummy_data_set, force_field, options)
+        assert request.id is not None
+
+        result = request.results(synchronous=True, polling_interval=0)
+        assert not isinstance(result, PropertyEstimatorException)
+
+
+def test_server_request_hash():
+    """Test that server requests are compared on their contents
+    rather than on their ids."""
+
+    dummy_property = create_dummy_property(Density)
+
+    options = PropertyEstimatorOptions(allowed_calculation_layers=[TestCalculationLayer])
+
+    request_a = PropertyEstimatorServer.ServerEstimationRequest('a', [dummy_property], options, 'force_field_id')
+    request_b = PropertyEstimatorServer.ServerEstimationRequest('b', [dummy_property], options, 'force_field_id')
+
+    request_hash = PropertyEstimatorServer._get_server_request_hash(request_a)
+
+    assert request_a.id == 'a'
+    assert request_hash == PropertyEstimatorServer._get_server_request_hash(request_b)
+
+    request_b.force_field_id = 'other_force_field_id'
+    assert request_hash != PropertyEstimatorServer._get_server_request_hash(request_b)
@@ -0,0 +1,282 @@
+"""
+Units tests for propertyestimator.layers.reweighting
+"""
+import json
+import tempfile
+from os import path, makedirs, remove
+
+import numpy as np
+from simtk import unit
+
+from propertyestimator.client import PropertyEstimatorOptions
+from propertyestimator.layers.reweighting import ReweightingLayer, _effective_samples_safety_factor
+from propertyestimator.properties.density import Density
+from propertyestimator.properties.properties import PropertyWorkflowOptions
+from propertyestimator.storage import StoredSimulationData
+from propertyestimator.tests.utils import create_dummy_property
+from propertyestimator.thermodynamics import ThermodynamicState
+from propertyestimator.utils.serialization import TypedJSONEncoder
+from propertyestimator.utils.statistics import StatisticsArray, ObservableType
+from propertyestimator.workflow import Workflow
+from propertyestimator.workflow.protocols import UnpackStoredSimulationData, CalculateReducedPotentialOpenMM
+
+
+def _create_stored_data(directory, name, number_of_frames, temperature=298.0,
+                        pressure=1.0, force_field_id='ff_id', statistical_inefficiency=1.0):
+    """Creates a directory of dummy stored simulation data.
+
+    Returns
+    -------
+    tuple(str, str)
+        A tuple of the path to the stored data directory and
+        a path to its (non-existent) force field.
+    """
+
+    from mdtraj.formats import DCDTrajectoryFile
+
+    data_directory = path.join(directory, name)
+    makedirs(data_directory)
+
+    with DCDTrajectoryFile(path.join(data_directory, 'trajectory.dcd'), 'w') as dcd_file:
+        dcd_file.write(np.random.rand(max(number_of_frames, 1), 1, 3))
+
+    statistics = StatisticsArray(np.column_stack([np.random.normal(-1000.0, 10.0, number_of_frames),
+                                                  np.random.normal(30.0, 0.1, number_of_frames)]),
+                                 {ObservableType.PotentialEnergy: unit.kilojoules_per_mole,
+                                  ObservableType.Volume: unit.nanometer ** 3})
+
+    statistics.save_as_numpy(path.join(data_directory, 'statistics.npy'))
+
+    data_object = StoredSimulationData()
+
+    data_object.unique_id = name
+
+    data_object.thermodynamic_state = ThermodynamicState(temperature * unit.kelvin,
+                                                         None if pressure is None else pressure * unit.atmosphere)
+
+    data_object.statistics_file_name = 'statistics.npy'
+    data_object.trajectory_file_name = 'trajectory.dcd'
+    data_object.statistical_inefficiency = statistical_inefficiency
+    data_object.force_field_id = force_field_id
+
+    with open(path.join(data_directory, 'data.json'), 'w') as file:
+        json.dump(data_object, file, cls=TypedJSONEncoder)
+
+    return data_directory, path.join(directory, force_field_id)
+
+
+def test_estimate_effective_samples():
+    """Tests that the stored (already decorrelated) frames are all
+    counted when estimating the number of effective samples."""
+
+    target_state = ThermodynamicState(298.0 * unit.kelvin, 1.0 * unit.atmosphere)
+
+    with tempfile.TemporaryDirectory() as temporary_directory:
+
+        data_path = _create_stored_data(temporary_directory, 'data', 100, statistical_inefficiency=5.0)
+        data_object = ReweightingLayer._load_stored_data_object(data_path[0], {})
+
+        # The weights are all equal at the stored state.
+        number_of_samples, effective_samples = ReweightingLayer._estimate_effective_samples(data_path[0],
+                                                                                            data_object,
+                                                                                            target_state,
+                                                                                            'ff_id')
+
+        assert number_of_samples == 100
+        assert np.isclose(effective_samples, 100.0)
+
+        # The overlap can only be estimated for the target force field.
+        shifted_state = ThermodynamicState(350.0 * unit.kelvin, 1.0 * unit.atmosphere)
+
+        _, effective_samples = ReweightingLayer._estimate_effective_samples(data_path[0], data_object,
+                                                                            shifted_state, 'other_ff_id')
+        assert np.isclose(effective_samples, 100.0)
+
+        _, effective_samples = ReweightingLayer._estimate_effective_samples(data_path[0], data_object,
+                                                                            shifted_state, 'ff_id')
+        assert effective_samples <= 100.0
+
+
+def test_screen_stored_data():
+    """Tests that stored data is rejected when its estimated number of
+    effective samples cannot reach the required number."""
+
+    target_state = ThermodynamicState(298.0 * unit.kelvin, 1.0 * unit.atmosphere)
+
+    with tempfile.TemporaryDirectory() as temporary_directory:
+
+        data_paths = [
+            _create_stored_data(temporary_directory, 'data_a', 30, statistical_inefficiency=10.0),
+            _create_stored_data(temporary_directory, 'data_b', 40, temperature=1000.0),
+            _create_stored_data(temporary_directory, 'data_c', 0)
+        ]
+
+        data_object_cache = {}
+        estimates_cache = {}
+
+        _, effective_samples_b = ReweightingLayer._get_sample_estimates(data_paths[1], target_state, 'ff_id',
+                                                                         data_object_cache, estimates_cache)
+
+        maximum_samples = int((30.0 + effective_samples_b) * _effective_samples_safety_factor)
+
+        # Data without any samples should be removed.
+        screened_paths = ReweightingLayer._screen_stored_data(data_paths, target_state, 'ff_id',
+                                                              maximum_samples, data_object_cache,
+                                                              estimates_cache)
+
+        assert screened_paths == data_paths[:2]
+
+        assert ReweightingLayer._screen_stored_data(data_paths, target_state, 'ff_id', maximum_samples + 1,
+                                                    data_object_cache, estimates_cache) is None
+
+        assert ReweightingLayer._screen_stored_data(data_paths[2:], target_state, 'ff_id', 0,
+                                                    data_object_cache, estimates_cache) is None
+
+        # Data with a poor overlap with the target state should be rejected,
+        # even though it contains enough frames.
+        assert ReweightingLayer._screen_stored_data(data_paths[1:2], target_state, 'ff_id', 40,
+                                                    data_object_cache, estimates_cache) is None
+
+        # Data generated with a different force field cannot be screened
+        # on its overlap, and so all of its frames are counted.
+        assert ReweightingLayer._screen_stored_data(data_paths[1:2], target_state, 'other_ff_id', 40,
+                                                    data_object_cache, estimates_cache) == data_paths[1:2]
+
+        # The estimates should now be served from the cache.
+        assert len(estimates_cache) == 4
+
+        for data_directory, _ in data_paths:
+            remove(path.join(data_directory, 'statistics.npy'))
+
+        assert ReweightingLayer._screen_stored_data(data_paths, target_state, 'ff_id', maximum_samples,
+                                                    data_object_cache, estimates_cache) == data_paths[:2]
+
+
+def test_select_stored_data():
+    """Tests that stored data is ranked by the similarity of its
+    force field, temperature and pressure to the target ones."""
+
+    target_state = ThermodynamicState(300.0 * unit.kelvin, 1.0 * unit.atmosphere)
+
+    with tempfile.TemporaryDirectory() as temporary_directory:
+
+        data_paths = [
+            _create_stored_data(temporary_directory, 'data_a', 10, temperature=350.0),
+            _create_stored_data(temporary_directory, 'data_b', 10, temperature=300.0, pressure=2.0),
+            _create_stored_data(temporary_directory, 'data_c', 10, temperature=300.0, force_field_id='other'),
+            _create_stored_data(temporary_directory, 'data_d', 10, temperature=290.0),
+            _create_stored_data(temporary_directory, 'data_e', 10, temperature=300.0, pressure=1.0),
+        ]
+
+        data_object_cache = {}
+        estimates_cache = {}
+
+        selected_paths = ReweightingLayer._select_stored_data(data_paths, target_state, 'ff_id', 4,
+                                                              data_object_cache, estimates_cache)
+
+        # Data from a different force field should be ranked last,
+        # regardless of how close its state is to the target.
+        assert selected_paths == [data_paths[4], data_paths[1], data_paths[3], data_paths[0]]
+
+        selected_paths = ReweightingLayer._select_stored_data(data_paths, target_state, 'ff_id', 2,
+                                                              data_object_cache, estimates_cache)
+
+        assert selected_paths == [data_paths[4], data_paths[1]]
+
+        # All of the data should be kept when no maximum is set.
+        assert ReweightingLayer._select_stored_data(data_paths, target_state, 'ff_id', None,
+                                                    data_object_cache, estimates_cache) == data_paths
+
+
+def test_find_reference_data():
+    """Tests that the data selected to reweight from must still reach the
+    required number of effective samples once the least similar is removed."""
+
+    target_state = ThermodynamicState(300.0 * unit.kelvin, 1.0 * unit.atmosphere)
+
+    with tempfile.TemporaryDirectory() as temporary_directory:
+
+        data_paths = [
+            _create_stored_data(temporary_directory, 'data_a', 20, temperature=300.0),
+            _create_stored_data(temporary_directory, 'data_b', 40, temperature=320.0),
+            _create_stored_data(temporary_directory, 'data_c', 40, temperature=350.0),
+        ]
+
+        data_object_cache = {}
+        estimates_cache = {}
+
+        # Reweight to a different force field, so that the overlap is not
+        # estimated and all of the frames of each piece of data are counted.
+        maximum_samples = int(60 * _effective_samples_safety_factor)
+
+        selected_paths = ReweightingLayer._find_reference_data(data_paths, target_state, 'other_ff_id',
+                                                               maximum_samples, 2,
+                                                               data_object_cache, estimates_cache)
+
+        assert selected_paths == data_paths[:2]
+
+        assert ReweightingLayer._find_reference_data(data_paths, target_state, 'other_ff_id',
+                                                     maximum_samples + 1, 2,
+                                                     data_object_cache, estimates_cache) is None
+
+        assert ReweightingLayer._find_reference_data(data_paths, target_state, 'other_ff_id',
+                                                     maximum_samples + 1, None,
+                                                     data_object_cache, estimates_cache) == data_paths
+
+
+def test_prune_cached_protocols():
+    """Tests that the protocols which build the reference systems are only removed
+    from a workflow when all of the reference reduced potentials have been cached."""
+
+    dummy_property = create_dummy_property(Density)
+
+    with tempfile.TemporaryDirectory() as temporary_directory:
+
+        data_paths = [
+            _create_stored_data(temporary_directory, 'data_a', 10),
+            _create_stored_data(temporary_directory, 'data_b', 10)
+        ]
+
+        with open(data_paths[0][1], 'w') as file:
+            file.write('dummy force field')
+
+        cache_directory = path.join(temporary_directory, 'cache')
+
+        global_metadata = Workflow.generate_default_metadata(dummy_property, data_paths[0][1],
+                                                             PropertyEstimatorOptions())
+
+        global_metadata['full_system_data'] = data_paths
+        global_metadata['component_data'] = []
+        global_metadata['cache_directory'] = cache_directory
+
+        # Cache the reduced potentials of the system of the first piece of data
+        # for all of the frames which the reference potentials are evaluated over.
+        data_object = ReweightingLayer._load_stored_data_object(data_paths[0][0], {})
+
+        data_cache_directory = UnpackStoredSimulationData.get_cache_directory(cache_directory, data_paths[0][0],
+                                                                              data_object, data_paths[0][1])
+        makedirs(data_cache_directory)
+
+        for data_directory, _ in data_paths:
+
+            cached_potentials_path = CalculateReducedPotentialOpenMM.get_cached_potentials_path(
+                data_cache_directory, data_object.thermodynamic_state, 1,
+                path.join(data_directory, 'trajectory.dcd'))
+
+            np.save(cached_potentials_path, np.zeros((1, 10)))
+
+        workflow = Workflow(dummy_property, global_metadata)
+        workflow.schema = Density.get_default_workflow_schema('ReweightingLayer', PropertyWorkflowOptions())
+
+        ReweightingLayer._prune_cached_protocols(workflow, {})
+
+        protocol_ids = [protocol_id.split('|')[-1] for protocol_id in workflow.protocols]
+
+        assert 'build_system_0' not in protocol_ids
+        assert 'build_system_1' in protocol_ids
+        assert 'build_system_target' in protocol_ids
+
+        assert workflow.protocols[workflow.uuid + '|reduced_potential_0'].system_path == ''
+
+        for dependants in workflow.dependants_graph.values():
+            assert workflow.uuid + '|build_system_0' not in dependants
@@ -37,6 +37,38 @@ def test_local_force_field_storage():
         local_storage_new = LocalFileStorage(temporary_directory)
         assert local_storage_new.has_force_field(force_field)
 
+        force_field_hash = local_storage_new.get_force_field_hash(force_field)
+        assert local_storage_new.has_force_field(force_field, force_field_hash) == 'tmp_id'
+
+
+def test_force_field_hash_lookup():
+    """A test that force fields can be looked up by
+    their precomputed hash."""
+
+    with tempfile.TemporaryDirectory() as temporary_directory:
+
+        local_storage = LocalFileStorage(temporary_directory)
+
+        for unique_id, hash_string in [('id_1', 'hash_1'), ('id_2', 'hash_2'), ('id_3', 'hash_1')]:
+
+            local_storage.store_object('force_field_{}'.format(unique_id), {0: unique_id})
+            local_storage._set_force_field_hash(unique_id, hash_string)
+
+        local_storage._save_force_field_hashes()
+
+        # Updating the hash of a force field should remove its old entry.
+        local_storage._set_force_field_hash('id_1', 'hash_3')
+        local_storage._save_force_field_hashes()
+
+        assert local_storage.has_force_field(None, 'hash_1') == 'id_3'
+        assert local_storage.has_force_field(None, 'hash_2') == 'id_2'
+        assert local_storage.has_force_field(None, 'hash_4') is None
+
+        local_storage_new = LocalFileStorage(temporary_directory)
+
+        assert local_storage_new.has_force_field(None, 'hash_3') == 'id_1'
+        assert local_storage_new.has_force_field(None, 'hash_1') == 'id_3'
+
 
 def test_local_simulation_storage():
     """A simple test to that force fields can be stored and
@@ -11,7 +11,9 @@ from simtk import unit
 
 from propertyestimator.utils import get_data_filename
 from propertyestimator.utils.serialization import serialize_force_field, deserialize_force_field, \
-    TypedBaseModel, TypedJSONEncoder, TypedJSONDecoder
+    TypedBaseModel, TypedJSONEncoder, TypedJSONDecoder, SerializationFormat, is_serialization_format_available, \
+    get_serialization_format, serialize_quantity, deserialize_quantity, serialize, deserialize, \
+    _get_unit_code, _unit_codes
 
 
 class Foo:
@@ -282,3 +284,174 @@ def test_numpy_array_serialization():
     deserialized_value = json.loads(serialized_value, cls=TypedJSONDecoder)
 
     assert np.allclose(two_dimensional_quantity_array, deserialized_value)
+
+
+@pytest.mark.parametrize("binary_arrays", [True, False])
+@pytest.mark.parametrize("dtype", [np.float32, np.float64, np.int64, np.bool_])
+def test_numpy_array_encoding(binary_arrays, dtype):
+
+    original_array = (np.random.random((3, 4, 5)) * 10.0).astype(dtype)
+
+    serialized_value = json.dumps(original_array, cls=TypedJSONEncoder, binary_arrays=binary_arrays)
+    deserialized_value = json.loads(serialized_value, cls=TypedJSONDecoder)
+
+    assert ('data' in json.loads(serialized_value)) == binary_arrays
+
+    assert deserialized_value.shape == original_array.shape
+    assert np.array_equal(original_array, deserialized_value)
+
+    if binary_arrays:
+        # Binary encoding should exactly preserve the dtype and be writeable.
+        assert deserialized_value.dtype == original_array.dtype
+        deserialized_value[0, 0, 0] = 0
+
+    # Non-contiguous arrays should be handled correctly.
+    transposed_array = original_array.transpose()
+
+    serialized_value = json.dumps(transposed_array, cls=TypedJSONEncoder, binary_arrays=binary_arrays)
+    assert np.array_equal(transposed_array, json.loads(serialized_value, cls=TypedJSONDecoder))
+
+
+def test_numpy_array_encoding_opt_in():
+    """Arrays should only be encoded as raw buffers when explicitly
+    requested, so that the output may be read by older decoders."""
+
+    original_array = np.arange(6.0).reshape(2, 3)
+
+    assert 'data' not in json.loads(json.dumps(original_array, cls=TypedJSONEncoder))
+    assert 'data' not in json.loads(serialize(original_array))
+
+    assert 'data' in json.loads(serialize(original_array, binary_arrays=True))
+
+
+def test_message_pack_raw_arrays():
+    """Arrays should be carried as raw bytes, rather than as base64
+    encoded strings, by the MessagePack format."""
+
+    pytest.importorskip('msgpack')
+    import msgpack
+
+    original_array = np.arange(6.0).reshape(2, 3)
+
+    serialized_value = serialize(original_array, SerializationFormat.MessagePack)
+    assert isinstance(msgpack.unpackb(serialized_value, raw=False)['data'], bytes)
+
+    deserialized_value = deserialize(serialized_value)
+
+    assert np.array_equal(original_array, deserialized_value)
+    deserialized_value[0, 0] = 1.0
+
+
+def test_type_resolution_cache():
+
+    test_object = FooInherited()
+    test_object.field3 = 5
+
+    serialized_value = json.dumps([test_object, test_object], cls=TypedJSONEncoder)
+
+    assert FooInherited in TypedJSONEncoder._resolved_types
+
+    deserialized_value = json.loads(serialized_value, cls=TypedJSONDecoder)
+    type_string = json.loads(serialized_value)[0]['@type']
+
+    assert type_string in TypedJSONDecoder._resolved_types
+    assert TypedJSONDecoder._resolved_types[type_string][0] == FooInherited
+
+    assert all(isinstance(value, FooInherited) and value.field3 == 5 for value in deserialized_value)
+
+
+@pytest.mark.parametrize("serialization_format", [SerializationFormat.Json, SerializationFormat.MessagePack])
+def test_serialization_formats(serialization_format):
+
+    if not is_serialization_format_available(serialization_format):
+        pytest.skip('The {} serialization format is not available.'.format(serialization_format.value))
+
+    test_object = TestClass(inputs={
+        "test_str": 'test1',
+        "test_float": 1.0,
+        "test_tuple": (1, 'a'),
+        "test_Foo": Foo(),
+        "test_Baz": Baz.Option1,
+        "test_Qux": Qux.Option1,
+        "test_quantity": 5.0 * unit.kelvin,
+        "test_array": np.arange(6.0).reshape(2, 3),
+        "test_List": [Foo(), Bar(), 1, 'Hello World'],
+        "test_Complex": ComplexObject()
+    })
+
+    serialized_object = test_object.serialize(serialization_format)
+    assert get_serialization_format(serialized_object) == serialization_format
+
+    recreated_object = TypedBaseModel.deserialize(serialized_object)
+
+    # Each format should encode exactly the same typed structure.
+    assert test_object.json() == recreated_object.json()
+
+
+@pytest.mark.parametrize("quantity", [
+    1.0 * unit.kelvin,
+    1.0 * unit.atmosphere,
+    2.5 * unit.gram / unit.milliliter,
+    -3.0 * unit.elementary_charge * unit.nanometer,
+    np.arange(3.0) * unit.kilojoules_per_mole
+])
+def test_quantity_serialization(quantity):
+
+    # By default, the unit should be stored as a list of base units
+    # which older versions are able to read.
+    legacy_quantity = serialize_quantity(quantity)
+    assert isinstance(legacy_quantity['unit'], list)
+
+    deserialized_quantity = deserialize_quantity(dict(legacy_quantity))
+
+    assert deserialized_quantity.unit.is_compatible(quantity.unit)
+    assert np.allclose(deserialized_quantity.value_in_unit(quantity.unit), quantity.value_in_unit(quantity.unit))
+
+    # The unit should only be stored as a compact code when requested.
+    serialized_quantity = serialize_quantity(quantity, compact_unit=True)
+    assert isinstance(serialized_quantity['unit'], str)
+
+    deserialized_quantity = deserialize_quantity(dict(serialized_quantity))
+
+    assert deserialized_quantity.unit.is_compatible(quantity.unit)
+    assert np.allclose(deserialized_quantity.value_in_unit(quantity.unit), quantity.value_in_unit(quantity.unit))
+
+
+def test_quantity_encoding_opt_in():
+    """Units should only be encoded as compact codes when explicitly
+    requested, so that the output may be read by older decoders."""
+
+    quantity = 1.0 * unit.kelvin
+
+    assert isinstance(json.loads(json.dumps(quantity, cls=TypedJSONEncoder))['unit'], list)
+    assert isinstance(json.loads(serialize(quantity))['unit'], list)
+
+    assert isinstance(json.loads(serialize(quantity, compact_units=True))['unit'], str)
+
+
+@pytest.mark.parametrize("unit_a, unit_b", [
+    (unit.kilojoule / unit.mole, unit.kilojoules_per_mole),
+    (unit.nanometer ** 2, unit.nanometer * unit.nanometer),
+    (unit.kelvin * unit.nanometer, unit.nanometer * unit.kelvin),
+    (unit.mole ** -1 * unit.kilojoule, unit.kilojoule / unit.mole),
+    (unit.elementary_charge * unit.nanometer, unit.nanometer * unit.elementary_charge),
+    (unit.kilojoule / unit.nanometer ** 2, unit.kilojoule / unit.nanometer / unit.nanometer)
+])
+def test_equal_unit_codes(unit_a, unit_b):
+    """Equal units which were built in different ways should
+    share the same compact code."""
+
+    assert unit_a == unit_b
+    assert _get_unit_code(unit_a) == _get_unit_code(unit_b)
+
+    # The code should not depend on which of the units was cached first.
+    _unit_codes.clear()
+    code_b = _get_unit_code(unit_b)
+    _unit_codes.clear()
+
+    assert _get_unit_code(unit_a) == code_b
+
+    serialized_a = serialize_quantity(1.0 * unit_a, compact_unit=True)
+    serialized_b = serialize_quantity(1.0 * unit_b, compact_unit=True)
+
+    assert serialized_a == serialized_b
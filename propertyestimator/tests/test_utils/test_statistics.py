@@ -7,8 +7,8 @@ import numpy as np
 
 from simtk import unit
 
-from propertyestimator.utils import get_data_filename
-from propertyestimator.utils.statistics import StatisticsArray, bootstrap
+from propertyestimator.utils import get_data_filename, statistics
+from propertyestimator.utils.statistics import StatisticsArray, bootstrap, ObservableType
 
 
 def test_statistics_object():
@@ -26,6 +26,100 @@ def test_statistics_object():
     assert subsampled_array is not None and len(subsampled_array) == 3
 
 
+def test_statistics_numpy_format():
+
+    statistics_object = StatisticsArray.from_openmm_csv(get_data_filename('properties/stats_openmm.csv'),
+                                                        1 * unit.atmosphere)
+
+    statistics_object.save_as_numpy('stats_numpy.npy')
+    statistics_object.save_as_pandas_csv('stats_pandas.csv')
+
+    numpy_object = StatisticsArray.from_file('stats_numpy.npy')
+    pandas_object = StatisticsArray.from_file('stats_pandas.csv')
+
+    assert isinstance(np.load('stats_numpy.npy', mmap_mode='r'), np.memmap)
+
+    for observable_type in ObservableType:
+
+        expected_values = statistics_object.get_observable(observable_type)
+        expected_unit = expected_values.unit
+
+        assert np.allclose(numpy_object.get_observable(observable_type).value_in_unit(expected_unit),
+                           expected_values.value_in_unit(expected_unit))
+        assert np.allclose(pandas_object.get_observable(observable_type).value_in_unit(expected_unit),
+                           expected_values.value_in_unit(expected_unit))
+
+    subsampled_array = StatisticsArray.from_statistics_array(numpy_object, [1, 2, 3])
+    assert len(subsampled_array) == 3
+
+    del numpy_object
+
+    for file_path in ['stats_numpy.npy', 'stats_pandas.csv']:
+
+        if os.path.isfile(file_path):
+            os.unlink(file_path)
+
+
+def test_chunked_openmm_conversion():
+
+    file_path = get_data_filename('properties/stats_openmm.csv')
+    statistics_object = StatisticsArray.from_openmm_csv(file_path, 1 * unit.atmosphere)
+
+    chunks = list(StatisticsArray.iterate_openmm_csv(file_path, 1 * unit.atmosphere, chunk_size=3))
+
+    assert len(chunks) == int(np.ceil(len(statistics_object) / 3))
+    assert sum(len(chunk) for chunk in chunks) == len(statistics_object)
+
+    number_of_frames = StatisticsArray.convert_openmm_csv(file_path, 'stats_converted.npy',
+                                                          1 * unit.atmosphere, chunk_size=3)
+
+    converted_object = StatisticsArray.from_file('stats_converted.npy')
+
+    assert number_of_frames == len(statistics_object) == len(converted_object)
+
+    for observable_type in ObservableType:
+
+        expected_values = statistics_object.get_observable(observable_type)
+        expected_unit = expected_values.unit
+
+        assert np.allclose(converted_object.get_observable(observable_type).value_in_unit(expected_unit),
+                           expected_values.value_in_unit(expected_unit))
+
+    del converted_object
+
+    if os.path.isfile('stats_converted.npy'):
+        os.unlink('stats_converted.npy')
+
+
+def test_statistics_array_columns():
+
+    statistics_object = StatisticsArray.from_openmm_csv(get_data_filename('properties/stats_openmm.csv'),
+                                                        1 * unit.atmosphere)
+
+    total_energies = statistics_object.get_observable(ObservableType.TotalEnergy)
+    volumes = statistics_object.get_observable(ObservableType.Volume)
+    enthalpies = statistics_object.get_observable(ObservableType.Enthalpy)
+
+    expected_enthalpies = total_energies + volumes * (1 * unit.atmosphere) * unit.AVOGADRO_CONSTANT_NA
+
+    assert np.allclose(enthalpies.value_in_unit(unit.kilojoule_per_mole),
+                       expected_enthalpies.value_in_unit(unit.kilojoule_per_mole))
+
+    sliced_array = StatisticsArray.from_statistics_array(statistics_object, slice(2, 5))
+
+    assert len(sliced_array) == 3
+    assert np.shares_memory(sliced_array._values, statistics_object._values)
+
+    assert np.allclose(sliced_array.get_observable(ObservableType.Density).value_in_unit(unit.gram / unit.milliliter),
+                       statistics_object.get_observable(ObservableType.Density)[2:5].value_in_unit(unit.gram /
+                                                                                                   unit.milliliter))
+
+    nvt_statistics = StatisticsArray.from_openmm_csv(get_data_filename('properties/stats_openmm.csv'))
+
+    assert not nvt_statistics.has_observable(ObservableType.Enthalpy)
+    assert nvt_statistics.get_observable(ObservableType.Enthalpy) is None
+
+
 def test_bootstrap():
 
     simple_data = np.array([1.0, 1.0, 1.0, 1.0])
@@ -51,3 +145,97 @@ def test_bootstrap():
     ])
     value, uncertainty = bootstrap(bootstrap_function, 5, 1.0, np.array([2, 3, 4]), values=vector_sub_data)
     assert np.isclose(value, vector_sub_data.mean())
+
+
+def test_batched_bootstrap():
+
+    def bootstrap_function(values):
+        return values.mean()
+
+    def batched_bootstrap_function(values):
+        return values.reshape(values.shape[0], -1).mean(axis=1)
+
+    sub_data = np.array([1.0, 1.0, 2.0, 2.0, 2.0, 3.0, 3.0, 3.0, 3.0])
+    data_sub_counts = np.array([2, 3, 4])
+
+    value, uncertainty = bootstrap(bootstrap_function, 10, 1.0, data_sub_counts, random_seed=0, values=sub_data)
+
+    batched_value, batched_uncertainty = bootstrap(batched_bootstrap_function, 10, 1.0, data_sub_counts,
+                                                   batched=True, random_seed=0, values=sub_data)
+
+    assert np.isclose(value, batched_value)
+    assert np.isclose(uncertainty, batched_uncertainty)
+
+    vector_data = np.random.rand(20, 3)
+
+    value, _ = bootstrap(batched_bootstrap_function, 10, 0.5, batched=True, values=vector_data)
+    assert np.isclose(value, vector_data.mean())
+
+    seed_sequence = np.random.SeedSequence(0)
+    sample_indices = statistics._generate_bootstrap_indices(seed_sequence, 0, 100, data_sub_counts, 1.0)
+
+    assert sample_indices.shape == (100, 9)
+    assert np.all((sample_indices[:, :2] >= 0) & (sample_indices[:, :2] < 2))
+    assert np.all((sample_indices[:, 2:5] >= 2) & (sample_indices[:, 2:5] < 5))
+    assert np.all((sample_indices[:, 5:] >= 5) & (sample_indices[:, 5:] < 9))
+
+    # The samples of any range of iterations should match those drawn all at once.
+    for start_iteration, end_iteration in [(0, 1), (5, 40), (16, 32), (99, 100)]:
+
+        range_indices = statistics._generate_bootstrap_indices(seed_sequence, start_iteration, end_iteration,
+                                                               data_sub_counts, 1.0)
+
+        assert np.array_equal(range_indices, sample_indices[start_iteration:end_iteration])
+
+
+def _mean_bootstrap_function(values):
+    return values.mean()
+
+
+def test_parallel_bootstrap():
+
+    bootstrap_function = _mean_bootstrap_function
+
+    data = np.random.rand(50, 3)
+    data_sub_counts = np.array([20, 30])
+
+    serial_value, serial_uncertainty = bootstrap(bootstrap_function, 20, 1.0, data_sub_counts,
+                                                 random_seed=12345, values=data)
+
+    for number_of_workers, use_processes in [(2, False), (3, False), (2, True)]:
+
+        parallel_value, parallel_uncertainty = bootstrap(bootstrap_function, 20, 1.0, data_sub_counts,
+                                                         random_seed=12345, number_of_workers=number_of_workers,
+                                                         use_processes=use_processes, values=data)
+
+        assert serial_value == parallel_value
+        assert serial_uncertainty == parallel_uncertainty
+
+
+def test_adaptive_bootstrap():
+
+    def bootstrap_function(values):
+        return values.mean()
+
+    data = np.random.RandomState(0).rand(100)
+
+    _, full_uncertainty, iterations = bootstrap(bootstrap_function, 200, 1.0, random_seed=0,
+                                                return_iterations=True, values=data)
+
+    assert iterations == 200
+
+    _, adaptive_uncertainty, adaptive_iterations = bootstrap(bootstrap_function, 200, 1.0, random_seed=0,
+                                                             convergence_tolerance=0.05, convergence_batch_size=20,
+                                                             return_iterations=True, values=data)
+
+    assert 40 <= adaptive_iterations <= 200
+    assert adaptive_iterations % 20 == 0
+    assert np.isclose(adaptive_uncertainty, full_uncertainty, rtol=0.25)
+
+    constant_data = np.ones(10)
+
+    _, uncertainty, iterations = bootstrap(bootstrap_function, 200, 1.0, convergence_tolerance=0.01,
+                                           convergence_batch_size=10, return_iterations=True,
+                                           values=constant_data)
+
+    assert uncertainty == 0.0 and iterations == 20
@@ -27,3 +27,123 @@ def test_statistical_inefficiency():
     print('utils: {}, pymbar: {}', statistical_inefficiency, pymbar_statistical_inefficiency)
 
     assert abs(statistical_inefficiency - pymbar_statistical_inefficiency) < 0.00001
+
+
+def test_statistical_inefficiency_fft():
+    """Test that the FFT based statistical inefficiency matches the direct implementation."""
+
+    data_size = 2000
+
+    one_dimensional_data = np.zeros(data_size)
+    three_dimensional_data = np.zeros((data_size, 3))
+
+    for i in range(1, data_size):
+
+        one_dimensional_data[i] = 0.9 * one_dimensional_data[i - 1] + np.random.normal()
+        three_dimensional_data[i] = 0.9 * three_dimensional_data[i - 1] + np.random.normal(size=3)
+
+    for data in [one_dimensional_data, one_dimensional_data.reshape(-1, 1), three_dimensional_data]:
+
+        reference_inefficiency = timeseries.calculate_statistical_inefficiency(data, minimum_samples=3, fft=False)
+        fft_inefficiency = timeseries.calculate_statistical_inefficiency(data, minimum_samples=3, fft=True)
+
+        assert np.isclose(reference_inefficiency, fft_inefficiency, rtol=1.0e-5)
+
+
+def test_detect_equilibration_origins():
+    """Test that the strided and geometric grids of time origins give
+    consistent estimates of the equilibration time."""
+
+    data_size = 1000
+    random_state = np.random.RandomState(1)
+
+    data = np.zeros(data_size)
+    data[0] = 50.0
+
+    for i in range(1, data_size):
+        data[i] = 0.9 * data[i - 1] + random_state.normal()
+
+    full_index, full_inefficiency, full_samples = timeseries.detect_equilibration(data)
+
+    for nskip, geometric_origins in [(1, True), (5, False), (5, True)]:
+
+        equilibration_index, statistical_inefficiency, effective_samples = \
+            timeseries.detect_equilibration(data, nskip=nskip, geometric_origins=geometric_origins)
+
+        assert equilibration_index in timeseries._get_equilibration_origins(data_size, nskip, geometric_origins)
+        assert effective_samples <= full_samples
+        assert np.isclose(effective_samples, full_samples, rtol=0.25)
+
+    assert list(timeseries._get_equilibration_origins(20, 2, True)) == [0, 2, 6, 14]
+    assert list(timeseries._get_equilibration_origins(10, 3, False)) == [0, 3, 6]
+
+
+def test_block_averaging_accumulator():
+    """Test that the streaming statistical inefficiency accumulator
+    agrees with the analysis of the full time series."""
+
+    data_size = 20000
+    random_state = np.random.RandomState(0)
+
+    data = np.zeros(data_size)
+
+    for i in range(1, data_size):
+        data[i] = 0.9 * data[i - 1] + random_state.normal()
+
+    accumulator = timeseries.BlockAveragingAccumulator(maximum_blocks=64)
+
+    for chunk in np.array_split(data, 13):
+        accumulator.add_samples(chunk)
+
+    assert accumulator.number_of_samples == data_size
+    assert len(accumulator.block_averages) <= 64
+
+    block_size = accumulator.block_size
+    number_of_blocks = len(accumulator.block_averages)
+
+    expected_averages = data[:number_of_blocks * block_size].reshape(number_of_blocks, block_size).mean(axis=1)
+    assert np.allclose(accumulator.block_averages[:, 0], expected_averages)
+
+    equilibration_index, statistical_inefficiency, effective_samples = accumulator.detect_equilibration()
+    expected_inefficiency = timeseries.calculate_statistical_inefficiency(data)
+
+    # The block estimate of the statistical inefficiency is only approximate.
+    assert np.isclose(statistical_inefficiency, expected_inefficiency, rtol=0.5)
+    assert np.isclose(effective_samples, (data_size - equilibration_index) / statistical_inefficiency)
+
+    # The merged block statistics should exactly reproduce those of the full series.
+    assert np.allclose(accumulator.mean, np.mean(data))
+    assert np.allclose(accumulator.variance, np.var(data))
+
+    constant_accumulator = timeseries.BlockAveragingAccumulator()
+    constant_accumulator.add_samples(np.ones((1000, 3)))
+
+    assert constant_accumulator.detect_equilibration() == (0, 1.0, 1000.0)
+
+    # Adding the samples one at a time, through a reused buffer, should
+    # give the same blocks as adding them all at once.
+    single_accumulator = timeseries.BlockAveragingAccumulator(maximum_blocks=64)
+    single_accumulator.add_samples(data)
+
+    buffer_accumulator = timeseries.BlockAveragingAccumulator(maximum_blocks=64)
+    sample_buffer = np.zeros(8)
+
+    for chunk in np.array_split(data, len(data) // 7):
+
+        sample_buffer[:len(chunk)] = chunk
+        buffer_accumulator.add_samples(sample_buffer[:len(chunk)])
+
+    assert buffer_accumulator.block_size == single_accumulator.block_size
+    assert np.allclose(buffer_accumulator.block_averages, single_accumulator.block_averages)
+    assert np.allclose(buffer_accumulator._block_deviations, single_accumulator._block_deviations)
+    assert np.allclose(buffer_accumulator.detect_equilibration(), single_accumulator.detect_equilibration())
+
+    # Including multidimensional series whose length is not a multiple of the block size.
+    multidimensional_data = random_state.normal(size=(1001, 3)) * np.array([1.0, 5.0, 10.0])
+    multidimensional_accumulator = timeseries.BlockAveragingAccumulator(maximum_blocks=16)
+
+    for chunk in np.array_split(multidimensional_data, 17):
+        multidimensional_accumulator.add_samples(chunk)
+
+    assert np.allclose(multidimensional_accumulator.mean, np.mean(multidimensional_data, axis=0))
+    assert np.allclose(multidimensional_accumulator.variance, np.var(multidimensional_data, axis=0))
@@ -0,0 +1,101 @@
+"""
+Units tests for propertyestimator.utils.trajectory
+"""
+import tempfile
+from os import path
+
+import mdtraj
+import numpy as np
+
+from propertyestimator.utils.trajectory import TrajectorySegment, VirtualTrajectory, load_trajectory, \
+    iterate_trajectory
+
+
+def _create_dummy_trajectory(directory, number_of_frames):
+    """Creates a single atom trajectory, where the x coordinate
+    of the atom in each frame is the index of the frame."""
+
+    topology = mdtraj.Topology()
+
+    chain = topology.add_chain()
+    residue = topology.add_residue('UNK', chain)
+    topology.add_atom('C', mdtraj.element.carbon, residue)
+
+    coordinates = np.zeros((number_of_frames, 1, 3), dtype=np.float32)
+    coordinates[:, 0, 0] = np.arange(number_of_frames)
+
+    trajectory = mdtraj.Trajectory(coordinates, topology,
+                                   unitcell_lengths=np.full((number_of_frames, 3), 2.0),
+                                   unitcell_angles=np.full((number_of_frames, 3), 90.0))
+
+    coordinate_path = path.join(directory, 'coordinates.pdb')
+    trajectory_path = path.join(directory, 'trajectory.dcd')
+
+    trajectory[0].save_pdb(coordinate_path)
+    trajectory.save_dcd(trajectory_path)
+
+    return coordinate_path, trajectory_path
+
+
+def test_virtual_trajectory():
+
+    with tempfile.TemporaryDirectory() as temporary_directory:
+
+        coordinate_path, trajectory_path = _create_dummy_trajectory(temporary_directory, 20)
+
+        virtual_trajectory = VirtualTrajectory([TrajectorySegment(trajectory_path, 3, 15, 4),
+                                                TrajectorySegment(trajectory_path)])
+
+        index_path = path.join(temporary_directory, 'trajectory.json')
+        virtual_trajectory.to_file(index_path)
+
+        assert VirtualTrajectory.from_file(index_path).source_paths == [trajectory_path]
+
+        expected_frames = np.concatenate([np.arange(3, 15, 4), np.arange(20)])
+
+        trajectory = load_trajectory(index_path, coordinate_path)
+
+        assert trajectory.n_frames == len(expected_frames)
+        assert np.allclose(trajectory.xyz[:, 0, 0], expected_frames)
+        assert np.allclose(trajectory.unitcell_lengths, 2.0)
+
+        chunks = list(iterate_trajectory(index_path, coordinate_path, chunk_size=7))
+
+        assert all(chunk.n_frames <= 7 for chunk in chunks)
+        assert np.allclose(np.concatenate([chunk.xyz[:, 0, 0] for chunk in chunks]), expected_frames)
+
+        # Plain DCD files should be treated as a single segment.
+        assert np.allclose(load_trajectory(trajectory_path, coordinate_path).xyz[:, 0, 0], np.arange(20))
+
+
+def test_subsample_virtual_trajectory():
+
+    with tempfile.TemporaryDirectory() as temporary_directory:
+
+        coordinate_path, trajectory_path = _create_dummy_trajectory(temporary_directory, 20)
+
+        virtual_trajectory = VirtualTrajectory([TrajectorySegment(trajectory_path, 0, 10),
+                                                TrajectorySegment(trajectory_path, 1, None, 2)])
+
+        all_frames = np.concatenate([np.arange(0, 10), np.arange(1, 20, 2)])
+
+        for start_frame, stride in [(0, 1), (3, 4), (12, 1), (5, 7), (25, 2)]:
+
+            subsampled_trajectory = virtual_trajectory.subsample(start_frame, stride)
+            expected_frames = all_frames[start_frame::stride]
+
+            assert subsampled_trajectory.get_number_of_frames() == len(expected_frames)
+
+            if len(expected_frames) == 0:
+                continue
+
+            trajectory = subsampled_trajectory.load(coordinate_path)
+            assert np.allclose(trajectory.xyz[:, 0, 0], expected_frames)
+
+        dcd_path = path.join(temporary_directory, 'subsampled.dcd')
+        virtual_trajectory.subsample(3, 4).save_as_dcd(coordinate_path, dcd_path)
+
+        trajectory = mdtraj.load_dcd(dcd_path, coordinate_path)
+
+        assert np.allclose(trajectory.xyz[:, 0, 0], all_frames[3::4])
+        assert np.allclose(trajectory.unitcell_lengths, 2.0)
@@ -2,6 +2,8 @@
 Units tests for propertyestimator.utils.exceptions
 """
 import abc
+import tempfile
+from os import path
 
 from propertyestimator.utils import utils
 from propertyestimator.utils.utils import SubhookedABCMeta
@@ -65,3 +67,23 @@ def test_interfaces():
     """Test that interface checking is working."""
     dummy_class = DummyDecoratedClass()
     assert isinstance(dummy_class, DummyInterface)
+
+
+def test_get_cache_key():
+
+    with tempfile.TemporaryDirectory() as temporary_directory:
+
+        file_path = path.join(temporary_directory, 'file.txt')
+
+        with open(file_path, 'w') as file:
+            file.write('contents')
+
+        cache_key = utils.get_cache_key([file_path], 298.0, 1.0)
+
+        assert cache_key == utils.get_cache_key([file_path], 298.0, 1.0)
+        assert cache_key != utils.get_cache_key([file_path], 298.0, None)
+
+        with open(file_path, 'w') as file:
+            file.write('new contents')
+
+        assert cache_key != utils.get_cache_key([file_path], 298.0, 1.0)
@@ -2,8 +2,10 @@
 Units tests for propertyestimator.workflow
 """
 import tempfile
-from os import path
+from os import path, makedirs
 
+import numpy as np
+import pymbar
 import pytest
 from simtk import unit
 
@@ -16,10 +18,11 @@ from propertyestimator.utils import get_data_filename
 from propertyestimator.utils.exceptions import PropertyEstimatorException
 from propertyestimator.utils.quantities import EstimatedQuantity
 from propertyestimator.utils.statistics import ObservableType
+from propertyestimator.utils.trajectory import VirtualTrajectory, TrajectorySegment
 from propertyestimator.workflow.plugins import available_protocols
 from propertyestimator.workflow.protocols import AddQuantities, BuildCoordinatesPackmol, BuildSmirnoffSystem, \
     RunEnergyMinimisation, RunOpenMMSimulation, ExtractAverageStatistic, ExtractUncorrelatedTrajectoryData, \
-    ExtractUncorrelatedStatisticsData, SubtractQuantities
+    ExtractUncorrelatedStatisticsData, ReweightWithMBARProtocol, SubtractQuantities, CalculateReducedPotentialOpenMM
 from propertyestimator.workflow.utils import ProtocolPath
 
 
@@ -199,7 +202,7 @@ def test_base_simulation_protocols():
         extract_density = ExtractAverageStatistic('extract_density')
 
         extract_density.statistics_type = ObservableType.Density
-        extract_density.statistics_path = path.join(temporary_directory, 'statistics.csv')
+        extract_density.statistics_path = path.join(temporary_directory, 'statistics.npy')
 
         result = extract_density.execute(temporary_directory, ComputeResources())
         assert not isinstance(result, PropertyEstimatorException)
@@ -229,12 +232,158 @@ def test_base_simulation_protocols():
 
         extract_uncorrelated_statistics.statistical_inefficiency = extract_density.statistical_inefficiency
         extract_uncorrelated_statistics.equilibration_index = extract_density.equilibration_index
-        extract_uncorrelated_statistics.input_statistics_path = path.join(temporary_directory, 'statistics.csv')
+        extract_uncorrelated_statistics.input_statistics_path = path.join(temporary_directory, 'statistics.npy')
 
         result = extract_uncorrelated_statistics.execute(temporary_directory, ComputeResources())
         assert not isinstance(result, PropertyEstimatorException)
 
 
+def test_calculate_reduced_potentials_multiple_systems():
+    """Tests that evaluating the reduced potentials of a trajectory against
+    multiple systems in a single pass yields the same reduced potentials as
+    evaluating each of the systems separately."""
+
+    mixed_system = Mixture()
+    mixed_system.add_component(smiles='O', mole_fraction=1.0)
+
+    thermodynamic_state = ThermodynamicState(298*unit.kelvin, 1*unit.atmosphere)
+
+    with tempfile.TemporaryDirectory() as temporary_directory:
+
+        build_coordinates = BuildCoordinatesPackmol('')
+
+        build_coordinates.max_molecules = 10
+        build_coordinates.mass_density = 0.05 * unit.grams / unit.milliliters
+        build_coordinates.substance = mixed_system
+
+        result = build_coordinates.execute(temporary_directory, None)
+        assert not isinstance(result, PropertyEstimatorException)
+
+        # Build two systems which differ only in their non-bonded cutoff.
+        system_paths = []
+
+        for index, nonbonded_cutoff in enumerate([1.0 * unit.nanometer, 0.8 * unit.nanometer]):
+
+            system_directory = path.join(temporary_directory, 'system_{}'.format(index))
+            makedirs(system_directory)
+
+            assign_force_field_parameters = BuildSmirnoffSystem('')
+
+            assign_force_field_parameters.force_field_path = get_data_filename('forcefield/smirnoff99Frosst.offxml')
+            assign_force_field_parameters.coordinate_file_path = path.join(temporary_directory, 'output.pdb')
+            assign_force_field_parameters.substance = mixed_system
+            assign_force_field_parameters.nonbonded_cutoff = nonbonded_cutoff
+
+            result = assign_force_field_parameters.execute(system_directory, None)
+            assert not isinstance(result, PropertyEstimatorException)
+
+            system_paths.append(assign_force_field_parameters.system_path)
+
+        energy_minimisation = RunEnergyMinimisation('')
+
+        energy_minimisation.input_coordinate_file = path.join(temporary_directory, 'output.pdb')
+        energy_minimisation.system_path = system_paths[0]
+
+        result = energy_minimisation.execute(temporary_directory, ComputeResources())
+        assert not isinstance(result, PropertyEstimatorException)
+
+        npt_simulation = RunOpenMMSimulation('npt_simulation')
+
+        npt_simulation.ensemble = Ensemble.NPT
+
+        npt_simulation.steps = 20
+        npt_simulation.output_frequency = 2
+
+        npt_simulation.thermodynamic_state = thermodynamic_state
+
+        npt_simulation.input_coordinate_file = path.join(temporary_directory, 'minimised.pdb')
+        npt_simulation.system_path = system_paths[0]
+
+        result = npt_simulation.execute(temporary_directory, ComputeResources())
+        assert not isinstance(result, PropertyEstimatorException)
+
+        def build_reduced_potential_protocol(system_path, additional_system_paths):
+
+            reduced_potentials = CalculateReducedPotentialOpenMM('')
+
+            reduced_potentials.thermodynamic_state = thermodynamic_state
+            reduced_potentials.system_path = system_path
+            reduced_potentials.additional_system_paths = additional_system_paths
+            reduced_potentials.coordinate_file_path = path.join(temporary_directory, 'input.pdb')
+            reduced_potentials.trajectory_file_path = path.join(temporary_directory, 'trajectory.dcd')
+
+            # Make sure that the frames are streamed over multiple chunks.
+            reduced_potentials.trajectory_chunk_size = 3
+
+            return reduced_potentials
+
+        combined_potentials = build_reduced_potential_protocol(system_paths[0], system_paths[1:])
+
+        result = combined_potentials.execute(temporary_directory, ComputeResources())
+        assert not isinstance(result, PropertyEstimatorException)
+
+        assert combined_potentials.reduced_potentials_matrix.shape[0] == len(system_paths)
+        assert np.allclose(combined_potentials.reduced_potentials,
+                           combined_potentials.reduced_potentials_matrix[0])
+
+        for index, system_path in enumerate(system_paths):
+
+            single_potentials = build_reduced_potential_protocol(system_path, [])
+
+            result = single_potentials.execute(temporary_directory, ComputeResources())
+            assert not isinstance(result, PropertyEstimatorException)
+
+            assert np.allclose(combined_potentials.reduced_potentials_matrix[index],
+                               single_potentials.reduced_potentials)
+
+
+def test_calculate_reduced_potentials_cached():
+    """Tests that cached reduced potentials are drawn from for the requested
+    frames, without needing to load the system."""
+
+    from mdtraj.formats import DCDTrajectoryFile
+
+    thermodynamic_state = ThermodynamicState(298*unit.kelvin, 1*unit.atmosphere)
+
+    with tempfile.TemporaryDirectory() as temporary_directory:
+
+        dcd_path = path.join(temporary_directory, 'trajectory.dcd')
+
+        with DCDTrajectoryFile(dcd_path, 'w') as dcd_file:
+            dcd_file.write(np.random.rand(10, 1, 3))
+
+        trajectory_path = path.join(temporary_directory, 'trajectory.json')
+        VirtualTrajectory([TrajectorySegment(dcd_path, 2, 10, 3)]).to_file(trajectory_path)
+
+        cache_directory = path.join(temporary_directory, 'cache')
+        makedirs(cache_directory)
+
+        cached_potentials_path = CalculateReducedPotentialOpenMM.get_cached_potentials_path(cache_directory,
+                                                                                            thermodynamic_state,
+                                                                                            1, dcd_path)
+
+        np.save(cached_potentials_path, np.arange(10.0)[np.newaxis, :])
+
+        reduced_potentials = CalculateReducedPotentialOpenMM('')
+
+        reduced_potentials.thermodynamic_state = thermodynamic_state
+        reduced_potentials.system_path = ''
+        reduced_potentials.coordinate_file_path = ''
+        reduced_potentials.trajectory_file_path = trajectory_path
+        reduced_potentials.cache_directory = cache_directory
+
+        result = reduced_potentials.execute(temporary_directory, ComputeResources())
+        assert not isinstance(result, PropertyEstimatorException)
+
+        assert np.allclose(reduced_potentials.reduced_potentials, [2.0, 5.0, 8.0])
+
+        # Without the cache, the missing system should be reported.
+        reduced_potentials.cache_directory = ''
+
+        result = reduced_potentials.execute(temporary_directory, ComputeResources())
+        assert isinstance(result, PropertyEstimatorException)
+
+
 def test_addition_subtract_protocols():
 
     with tempfile.TemporaryDirectory() as temporary_directory:
@@ -258,3 +407,108 @@ def test_addition_subtract_protocols():
 
         assert not isinstance(result, PropertyEstimatorException)
         assert sub_quantities.result.value == 1 * unit.kelvin
+
+
+def test_prepare_observables_array():
+
+    scalar_observables = [
+        np.array([1.0, 2.0, 3.0]) * unit.nanometer,
+        np.array([40.0, 50.0]) * unit.angstrom
+    ]
+
+    observables = ReweightWithMBARProtocol._prepare_observables_array(scalar_observables)
+
+    assert observables.shape == (1, 5)
+    assert np.allclose(observables, [[1.0, 2.0, 3.0, 4.0, 5.0]])
+
+    vector_observables = [
+        np.arange(6, dtype=float).reshape(2, 3) * unit.nanometer,
+        np.arange(6, 9, dtype=float).reshape(1, 3) * unit.nanometer
+    ]
+
+    observables = ReweightWithMBARProtocol._prepare_observables_array(vector_observables)
+
+    assert observables.shape == (3, 3)
+    assert np.allclose(observables, np.arange(9, dtype=float).reshape(3, 3).T)
+
+
+def test_reweight_with_mbar_protocol():
+
+    random_state = np.random.RandomState(1)
+
+    positions = random_state.normal(0.0, 1.0, 200)
+    centres = np.array([0.0, 0.5])
+
+    reference_reduced_potentials = 0.5 * (positions[np.newaxis, :] - centres[:, np.newaxis]) ** 2
+    target_reduced_potentials = 0.5 * (positions[np.newaxis, :] - 0.25) ** 2
+
+    observables = np.stack([positions, positions ** 2], axis=1)
+
+    mbar = pymbar.MBAR(reference_reduced_potentials, np.array([100, 100]), relative_tolerance=1e-12)
+
+    expected_values = [mbar.computeExpectations(observables[:, dimension], target_reduced_potentials,
+                                                state_dependent=True)[0][0] for dimension in range(2)]
+
+    reweight_protocol = ReweightWithMBARProtocol('reweight')
+
+    reweight_protocol.reference_reduced_potentials = list(reference_reduced_potentials)
+    reweight_protocol.target_reduced_potentials = list(target_reduced_potentials)
+    reweight_protocol.reference_observables = [observables[:100] * unit.kelvin,
+                                               observables[100:] * unit.kelvin]
+
+    reweight_protocol.required_effective_samples = 0
+
+    result = reweight_protocol.execute('', ComputeResources())
+    assert not isinstance(result, PropertyEstimatorException)
+
+    assert np.allclose(reweight_protocol.value.value.value_in_unit(unit.kelvin), expected_values)
+
+    # Bootstrapping is only supported for scalar observables.
+    reweight_protocol.reference_observables = [positions[:100] * unit.kelvin,
+                                               positions[100:] * unit.kelvin]
+
+    reweight_protocol.bootstrap_uncertainties = True
+    reweight_protocol.bootstrap_iterations = 5
+
+    result = reweight_protocol.execute('', ComputeResources())
+    assert not isinstance(result, PropertyEstimatorException)
+
+    assert reweight_protocol.bootstrap_iterations_performed == 5
+    assert np.allclose(reweight_protocol._reference_free_energies, mbar.f_k)
+
+    # Seeding the bootstrapping should make the uncertainty reproducible.
+    reweight_protocol.bootstrap_random_seed = 0
+
+    reweight_protocol.execute('', ComputeResources())
+    seeded_uncertainty = reweight_protocol.value.uncertainty
+
+    reweight_protocol.execute('', ComputeResources(number_of_threads=2))
+    assert reweight_protocol.value.uncertainty == seeded_uncertainty
+
+
+def test_reweight_to_target_state():
+
+    random_state = np.random.RandomState(1)
+
+    centres = np.array([0.0, 0.4, 0.8])
+    frame_counts = np.array([150, 100, 50])
+
+    positions = np.concatenate([random_state.normal(centre, 1.0, frame_count)
+                                for centre, frame_count in zip(centres, frame_counts)])
+
+    reference_reduced_potentials = 0.5 * (positions[np.newaxis, :] - centres[:, np.newaxis]) ** 2
+    target_reduced_potentials = 0.5 * (positions - 0.3) ** 2
+
+    observables = np.stack([positions, positions ** 2, 100.0 + 5.0 * positions])
+
+    mbar = pymbar.MBAR(reference_reduced_potentials, frame_counts, relative_tolerance=1e-12)
+    expected_values, expected_uncertainties = mbar.computeMultipleExpectations(observables,
+                                                                               target_reduced_potentials)
+
+    values, uncertainties, _, reference_effective_samples = \
+        ReweightWithMBARProtocol._reweight_to_target_state(reference_reduced_potentials, frame_counts,
+                                                           mbar.f_k, target_reduced_potentials, observables)
+
+    assert np.allclose(values, expected_values)
+    assert np.allclose(uncertainties, expected_uncertainties)
+    assert np.allclose(reference_effective_samples, mbar.computeEffectiveSampleNumber())
@@ -28,6 +28,8 @@ def create_dummy_metadata(dummy_property, calculation_layer):
             [('data_path_5', 'ff_path_5'), ('data_path_6', 'ff_path_6')]
         ]
 
+        global_metadata['cache_directory'] = 'cache_directory'
+
     return global_metadata
 
 
@@ -2,6 +2,7 @@
 A collection of classes which aid in serializing data types.
 """
 
+import base64
 import importlib
 import inspect
 import json
@@ -40,7 +41,124 @@ def _type_string_to_object(type_string):
     return class_object
 
 
-def serialize_quantity(quantity):
+# Interned tables of the base units (and the conversion factor to them) of each
+# unit which has been serialized, both as a list and as a compact code, and of
+# the unit which corresponds to each code which has been deserialized.
+_unit_base_units = {}
+_unit_codes = {}
+_units_by_code = {}
+
+
+def _get_unit_base_units(quantity_unit):
+    """Returns the list of (base unit name, power) pairs which make
+    up a unit.
+
+    Parameters
+    ----------
+    quantity_unit: simtk.unit.Unit
+        The unit to encode.
+
+    Returns
+    -------
+    list of tuple of str and float
+        The base units of the unit.
+    float
+        The factor which converts values in this unit to values
+        in the base units.
+    """
+
+    cached_value = _unit_base_units.get(quantity_unit)
+
+    if cached_value is not None:
+        return cached_value
+
+    base_units = [(base_unit.name, power) for base_unit, power in quantity_unit.iter_all_base_units()]
+
+    cached_value = (base_units, quantity_unit.get_conversion_factor_to_base_units())
+    _unit_base_units[quantity_unit] = cached_value
+
+    return cached_value
+
+
+def _get_unit_code(quantity_unit):
+    """Returns a compact string code which uniquely identifies a unit in
+    terms of the base units of the `si_unit_system`, e.g. 'kilogram:1.0;meter:-3.0'.
+    The unit is first converted into this unit system, and its base units sorted
+    by name, so that equal units which were built in different ways share the
+    same code.
+
+    Parameters
+    ----------
+    quantity_unit: simtk.unit.Unit
+        The unit to encode.
+
+    Returns
+    -------
+    str
+        The code of the unit.
+    float
+        The factor which converts values in this unit to values
+        in the base units.
+    """
+
+    cached_value = _unit_codes.get(quantity_unit)
+
+    if cached_value is not None:
+        return cached_value
+
+    canonical_unit = quantity_unit.in_unit_system(unit.si_unit_system)
+
+    base_units = sorted([(base_unit.name, float(power)) for
+                         base_unit, power in canonical_unit.iter_all_base_units() if power != 0])
+
+    unit_code = ';'.join(['{}:{}'.format(unit_name, power) for unit_name, power in base_units])
+
+    conversion_factor = (quantity_unit.conversion_factor_to(canonical_unit) *
+                         canonical_unit.get_conversion_factor_to_base_units())
+
+    cached_value = (unit_code, conversion_factor)
+    _unit_codes[quantity_unit] = cached_value
+
+    return cached_value
+
+
+def _get_unit_from_code(unit_code):
+    """Returns the unit which corresponds to a code generated
+    by the `_get_unit_code` method.
+
+    Parameters
+    ----------
+    unit_code: str
+        The code of the unit.
+
+    Returns
+    -------
+    simtk.unit.Unit, optional
+        The corresponding unit, or `None` if the code is empty.
+    """
+
+    if unit_code in _units_by_code:
+        return _units_by_code[unit_code]
+
+    quantity_unit = None
+
+    for base_unit_code in unit_code.split(';') if len(unit_code) > 0 else []:
+
+        unit_name, power = base_unit_code.split(':')
+
+        unit_name = unit_name.replace(' ', '_')  # Convert eg. 'elementary charge' to 'elementary_charge'
+        power = float(power)
+
+        if quantity_unit is None:
+            quantity_unit = (getattr(unit, unit_name) ** power)
+        else:
+            quantity_unit *= (getattr(unit, unit_name) ** power)
+
+    _units_by_code[unit_code] = quantity_unit
+    return quantity_unit
+
+
+def serialize_quantity(quantity, compact_unit=False):
     """
     Serialized a simtk.unit.Quantity into a dict of {'unitless_value': X, 'unit': Y}
 
@@ -50,11 +168,16 @@ def serialize_quantity(quantity):
     ----------
     quantity : A simtk.unit.Quantity-wrapped value or iterator over values
         The object to serialize
+    compact_unit: bool
+        If true, the unit will be stored as a compact code of its base units
+        (see `_get_unit_code`), rather than as a list of (base unit name, power)
+        pairs. Only versions of `deserialize_quantity` which support these codes
+        are able to read them.
 
     Returns
     -------
     serialzied : dict
-        The serialized object
+        The serialized object, where the value is stored in base units.
     """
 
     if not isinstance(quantity, unit.Quantity):
@@ -71,11 +194,11 @@ def serialize_quantity(quantity):
     # If it's not None, make sure it's a simtk.unit.Quantity
     assert (hasattr(quantity, 'unit'))
 
-    quantity_unit = list()
-    for base_unit in quantity.unit.iter_all_base_units():
-        quantity_unit.append((base_unit[0].name, base_unit[1]))
-
-    conversion_factor = quantity.unit.get_conversion_factor_to_base_units()
+    if compact_unit:
+        quantity_unit, conversion_factor = _get_unit_code(quantity.unit)
+    else:
+        base_units, conversion_factor = _get_unit_base_units(quantity.unit)
+        quantity_unit = list(base_units)
 
     unitless_value = (quantity / quantity.unit) * conversion_factor
     serialized['unitless_value'] = unitless_value
@@ -92,7 +215,8 @@ def deserialize_quantity(serialized):
     Parameters
     ----------
     serialized : dict
-        Serialized representation of a simtk.unit.Quantity. Must have keys ["unitless_value", "unit"]
+        Serialized representation of a simtk.unit.Quantity. Must have keys ["unitless_value", "unit"],
+        where the unit is either a compact unit code, or a list of (base unit name, power) pairs.
 
     Returns
     -------
@@ -104,14 +228,16 @@ def deserialize_quantity(serialized):
 
     if (serialized['unitless_value'] is None) and (serialized['unit'] is None):
         return None
-    quantity_unit = None
-    for unit_name, power in serialized['unit']:
-        unit_name = unit_name.replace(' ', '_')  # Convert eg. 'elementary charge' to 'elementary_charge'
-        if quantity_unit is None:
-            quantity_unit = (getattr(unit, unit_name) ** power)
-        else:
-            quantity_unit *= (getattr(unit, unit_name) ** power)
-    quantity = unit.Quantity(serialized['unitless_value'], quantity_unit)
+
+    unit_code = serialized['unit']
+
+    if not isinstance(unit_code, str):
+
+        # Convert the list of (name, power) pairs into the equivalent code.
+        unit_code = ';'.join(['{}:{}'.format(unit_name, power) for unit_name, power in
+                              sorted([(unit_name, float(power)) for unit_name, power in unit_code])])
+
+    quantity = unit.Quantity(serialized['unitless_value'], _get_unit_from_code(unit_code))
     return quantity
 
 
@@ -254,7 +380,91 @@ def deserialize_enum(enum_dictionary):
     return enum_class(enum_value)
 
 
+def serialize_numpy_array(array, binary=True, raw_bytes=False):
+    """Serializes a numpy array into a dictionary.
+
+    Parameters
+    ----------
+    array: numpy.ndarray
+        The array to serialize.
+    binary: bool
+        If true, the raw buffer of the array will be stored as a base64 encoded
+        string alongside its dtype and shape. Otherwise, the array will be stored
+        as a (nested) list of values. Arrays of python objects are always stored
+        as lists.
+    raw_bytes: bool
+        If true, and the array is stored as its raw buffer, the buffer will
+        be stored as `bytes` rather than as a base64 encoded string. This is
+        only supported by formats which can natively store binary data.
+
+    Returns
+    -------
+    dict of str and Any
+        The serialized array.
+    """
+
+    if not isinstance(array, np.ndarray):
+        raise ValueError('{} is not a numpy array'.format(type(array)))
+
+    if not binary or array.dtype.hasobject:
+        return {'value': array.tolist()}
+
+    array_buffer = np.ascontiguousarray(array).tobytes()
+
+    return {
+        'dtype': array.dtype.str,
+        'shape': list(array.shape),
+        'data': array_buffer if raw_bytes else base64.b64encode(array_buffer).decode('ascii')
+    }
+
+
+def deserialize_numpy_array(array_dictionary):
+    """Deserializes a numpy array which has been serialized
+    by the `serialize_numpy_array` method.
+
+    Parameters
+    ----------
+    array_dictionary: dict of str and Any
+        The serialized array.
+
+    Returns
+    -------
+    numpy.ndarray
+        The deserialized array.
+    """
+
+    if 'value' in array_dictionary:
+        return np.array(array_dictionary['value'])
+
+    array_buffer = array_dictionary['data']
+
+    if not isinstance(array_buffer, bytes):
+        array_buffer = base64.b64decode(array_buffer)
+
+    # Copy into a mutable buffer so that the returned array is writeable.
+    buffer = bytearray(array_buffer)
+
+    array = np.frombuffer(buffer, dtype=np.dtype(array_dictionary['dtype']))
+    return array.reshape(array_dictionary['shape'])
+
+
 class TypedJSONEncoder(json.JSONEncoder):
+    """A JSON encoder which tags any non-primitive typed values with
+    an @type entry, so that they can be rebuilt by the `TypedJSONDecoder`.
+
+    Notes
+    -----
+    By default, numpy arrays are encoded as lists of values, which any
+    version of the `TypedJSONDecoder` can read. Writers whose output is
+    only read by decoders which support it may instead opt in to encoding
+    arrays as base64 strings of their raw buffers by passing
+    `binary_arrays=True` to the encoder, e.g.
+    `json.dumps(value, cls=TypedJSONEncoder, binary_arrays=True)`.
+
+    Similarly, the units of quantities are encoded as lists of (base unit
+    name, power) pairs unless `compact_units=True` is passed, in which case
+    they are encoded as compact unit codes (see `serialize_quantity`).
+    """
 
     _natively_supported_types = [
         dict, list, tuple, str, int, float, bool
@@ -269,9 +479,24 @@ class TypedJSONEncoder(json.JSONEncoder):
         np.float64: lambda x: {'value': float(x)},
         np.int32: lambda x: {'value': int(x)},
         np.int64: lambda x: {'value': int(x)},
-        np.ndarray: lambda x: {'value': x.tolist()},
+        np.ndarray: serialize_numpy_array,
     }
 
+    # A cache of the @type tag and custom encoder of each type
+    # which has previously been serialized.
+    _resolved_types = {}
+
+    def __init__(self, *args, binary_arrays=False, compact_units=False, **kwargs):
+        super(TypedJSONEncoder, self).__init__(*args, **kwargs)
+
+        # The encoders to use in place of the default custom encoders.
+        self._encoder_overrides = {}
+
+        if not binary_arrays:
+            self._encoder_overrides[serialize_numpy_array] = self._serialize_numpy_array_as_list
+        if compact_units:
+            self._encoder_overrides[serialize_quantity] = self._serialize_quantity_with_unit_code
+
     def default(self, value_to_serialize):
 
         if value_to_serialize is None:
@@ -285,26 +510,10 @@ class TypedJSONEncoder(json.JSONEncoder):
             return super(TypedJSONEncoder, self).default(value_to_serialize)
 
         # Otherwise, we need to add a @type attribute to it.
-        qualified_name = type_to_serialize.__qualname__
-        qualified_name = qualified_name.replace('.', '->')
-
-        type_tag = '{}.{}'.format(type_to_serialize.__module__, qualified_name)
+        type_tag, custom_encoder = TypedJSONEncoder._resolve_type(type_to_serialize)
         serializable_dictionary = {}
 
-        custom_encoder = None
-
-        for encoder_type in TypedJSONEncoder._custom_supported_types:
-
-            if isinstance(encoder_type, str):
-
-                if encoder_type != qualified_name:
-                    continue
-
-            elif not issubclass(type_to_serialize, encoder_type):
-                continue
-
-            custom_encoder = TypedJSONEncoder._custom_supported_types[encoder_type]
-            break
+        custom_encoder = self._encoder_overrides.get(custom_encoder, custom_encoder)
 
         if custom_encoder is not None:
 
@@ -337,6 +546,81 @@ class TypedJSONEncoder(json.JSONEncoder):
         serializable_dictionary['@type'] = type_tag
         return serializable_dictionary
 
+    @staticmethod
+    def _resolve_type(type_to_serialize):
+        """Returns the @type tag, and the custom encoder (if any), of a type.
+        These are only computed the first time a type is encountered, after
+        which they are retrieved from a cache.
+
+        Parameters
+        ----------
+        type_to_serialize: type
+            The type to resolve.
+
+        Returns
+        -------
+        str
+            The @type tag of the type.
+        function, optional
+            The custom encoder of the type, or `None` if the type
+            should be serialized using its `__getstate__` method.
+        """
+
+        cached_value = TypedJSONEncoder._resolved_types.get(type_to_serialize)
+
+        if cached_value is not None:
+            return cached_value
+
+        qualified_name = type_to_serialize.__qualname__
+        qualified_name = qualified_name.replace('.', '->')
+
+        type_tag = '{}.{}'.format(type_to_serialize.__module__, qualified_name)
+
+        custom_encoder = None
+
+        for encoder_type in TypedJSONEncoder._custom_supported_types:
+
+            if isinstance(encoder_type, str):
+
+                if encoder_type != qualified_name:
+                    continue
+
+            elif not issubclass(type_to_serialize, encoder_type):
+                continue
+
+            custom_encoder = TypedJSONEncoder._custom_supported_types[encoder_type]
+            break
+
+        TypedJSONEncoder._resolved_types[type_to_serialize] = (type_tag, custom_encoder)
+        return type_tag, custom_encoder
+
+    @staticmethod
+    def _serialize_numpy_array_as_list(array):
+        return serialize_numpy_array(array, binary=False)
+
+    @staticmethod
+    def _serialize_quantity_with_unit_code(quantity):
+        return serialize_quantity(quantity, compact_unit=True)
+
+
+class _MessagePackEncoder(TypedJSONEncoder):
+    """A typed encoder which produces the structures to be packed by
+    `msgpack`, storing the buffers of numpy arrays as raw bytes.
+    """
+
+    def __init__(self):
+        super(_MessagePackEncoder, self).__init__(binary_arrays=True, compact_units=True)
+        self._encoder_overrides[serialize_numpy_array] = self._serialize_numpy_array_as_bytes
+
+    @staticmethod
+    def _serialize_numpy_array_as_bytes(array):
+        return serialize_numpy_array(array, raw_bytes=True)
+
+
+# The encoder is stateless, and so a single instance is shared
+# between all calls to `serialize`.
+_message_pack_encoder = _MessagePackEncoder()
+
 
 class TypedJSONDecoder(json.JSONDecoder):
 
@@ -353,19 +637,40 @@ class TypedJSONDecoder(json.JSONDecoder):
         np.float64: lambda x: np.float64(x['value']),
         np.int32: lambda x: np.int32(x['value']),
         np.int64: lambda x: np.int64(x['value']),
-        np.ndarray: lambda x: np.array(x['value'])
+        np.ndarray: deserialize_numpy_array
     }
 
+    # A cache of the class, and custom decoder, of each @type
+    # string which has previously been deserialized.
+    _resolved_types = {}
+
     @staticmethod
-    def object_hook(object_dictionary):
+    def _resolve_type(type_string):
+        """Returns the class, and the custom decoder (if any), which
+        correspond to a @type string. These are only computed the first
+        time a type string is encountered, after which they are retrieved
+        from a cache.
 
-        if '@type' not in object_dictionary:
-            return object_dictionary
+        Parameters
+        ----------
+        type_string: str
+            The @type string to resolve.
 
-        type_string = object_dictionary['@type']
-        class_type = _type_string_to_object(type_string)
+        Returns
+        -------
+        type
+            The class which the type string refers to.
+        function, optional
+            The custom decoder of the class, or `None` if the class
+            should be deserialized using its `__setstate__` method.
+        """
+
+        cached_value = TypedJSONDecoder._resolved_types.get(type_string)
 
-        deserialized_object = None
+        if cached_value is not None:
+            return cached_value
+
+        class_type = _type_string_to_object(type_string)
 
         custom_decoder = None
 
@@ -382,6 +687,40 @@ class TypedJSONDecoder(json.JSONDecoder):
             custom_decoder = TypedJSONDecoder._custom_supported_types[decoder_type]
             break
 
+        if custom_decoder is None and hasattr(class_type, '__setstate__'):
+
+            class_init_signature = inspect.signature(class_type)
+
+            for parameter in class_init_signature.parameters.values():
+
+                if (parameter.default != inspect.Parameter.empty or
+                    parameter.kind == inspect.Parameter.VAR_KEYWORD or
+                    parameter.kind == inspect.Parameter.VAR_POSITIONAL):
+
+                    continue
+
+                raise ValueError('Objects of type {} could not be deserialized using their __setstate__ '
+                                 'method: Cannot deserialize objects which have non-optional arguments {} '
+                                 'in the constructor.'.format(class_type, parameter.name))
+
+        elif custom_decoder is None:
+
+            raise ValueError('Objects of type {} are not deserializable, please either'
+                             'add a __setstate__ method, or add the object to the list'
+                             'of custom supported types.'.format(type(class_type)))
+
+        TypedJSONDecoder._resolved_types[type_string] = (class_type, custom_decoder)
+        return class_type, custom_decoder
+
+    @staticmethod
+    def object_hook(object_dictionary):
+
+        if '@type' not in object_dictionary:
+            return object_dictionary
+
+        type_string = object_dictionary['@type']
+        class_type, custom_decoder = TypedJSONDecoder._resolve_type(type_string)
+
         if custom_decoder is not None:
 
             try:
@@ -393,24 +732,10 @@ class TypedJSONDecoder(json.JSONDecoder):
                                  'using a specialized custom decoder: {}'.format(object_dictionary,
                                                                                  type(class_type), e))
 
-        elif hasattr(class_type, '__setstate__'):
+        else:
 
             try:
 
-                class_init_signature = inspect.signature(class_type)
-
-                for parameter in class_init_signature.parameters.values():
-
-                    if (parameter.default != inspect.Parameter.empty or
-                        parameter.kind == inspect.Parameter.VAR_KEYWORD or
-                        parameter.kind == inspect.Parameter.VAR_POSITIONAL):
-
-                        continue
-
-                    raise ValueError('Cannot deserialize objects which have '
-                                     'non-optional arguments {} in the constructor: {}.'.format(parameter.name,
-                                                                                                class_type))
-
                 deserialized_object = class_type()
                 deserialized_object.__setstate__(object_dictionary)
 
@@ -420,13 +745,154 @@ class TypedJSONDecoder(json.JSONDecoder):
                                  'using its __setstate__ method: {}'.format(object_dictionary,
                                                                             type(class_type), e))
 
-        else:
+        return deserialized_object
 
-            raise ValueError('Objects of type {} are not deserializable, please either'
-                             'add a __setstate__ method, or add the object to the list'
-                             'of custom supported types.'.format(type(class_type)))
 
-        return deserialized_object
+class SerializationFormat(Enum):
+    """The formats which typed objects may be serialized into. Each
+    format encodes exactly the same (@type tagged) structure, and so
+    objects may be freely converted between them.
+
+    Notes
+    -----
+    The `MessagePack` format is faster to encode and decode than the
+    `Json` format, but requires that the optional `msgpack` package
+    is installed. Unlike the `Json` format, dictionary keys which are
+    not strings are not converted into strings.
+    """
+
+    Json = 'json'
+    MessagePack = 'msgpack'
+
+
+def is_serialization_format_available(serialization_format):
+    """Returns whether the dependencies of a serialization
+    format are installed.
+
+    Parameters
+    ----------
+    serialization_format: SerializationFormat
+        The format of interest.
+
+    Returns
+    -------
+    bool
+        True if the format is available.
+    """
+
+    if serialization_format == SerializationFormat.Json:
+        return True
+
+    try:
+        import msgpack
+    except ImportError:
+        return False
+
+    return True
+
+
+def get_serialization_format(contents):
+    """Determines which format some serialized contents are in.
+
+    Notes
+    -----
+    The first byte of valid (utf8 encoded) JSON is always in the
+    ASCII range, whereas a MessagePack encoded map or array always
+    begins with a byte outside of it.
+
+    Parameters
+    ----------
+    contents: str or bytes
+        The serialized contents.
+
+    Returns
+    -------
+    SerializationFormat
+        The format of the contents.
+    """
+
+    if isinstance(contents, str) or len(contents) == 0 or contents[0] < 0x80 or contents[0] == 0xEF:
+        return SerializationFormat.Json
+
+    return SerializationFormat.MessagePack
+
+
+def serialize(value, serialization_format=SerializationFormat.Json, binary_arrays=False, compact_units=False):
+    """Serializes a value into the (@type tagged) representation
+    produced by the `TypedJSONEncoder`, encoded in a given format.
+
+    Parameters
+    ----------
+    value: Any
+        The value to serialize.
+    serialization_format: SerializationFormat
+        The format to encode the value in.
+    binary_arrays: bool
+        If true, numpy arrays will be encoded as their raw buffers rather than
+        as lists of values (see `TypedJSONEncoder`). Arrays are always encoded
+        as raw (non-base64) bytes by the `MessagePack` format, which has no
+        older readers.
+    compact_units: bool
+        If true, the units of quantities will be encoded as compact unit codes
+        rather than as lists of base units (see `TypedJSONEncoder`). Units are
+        always encoded as codes by the `MessagePack` format.
+
+    Returns
+    -------
+    bytes
+        The serialized value.
+    """
+
+    if serialization_format == SerializationFormat.Json:
+        return json.dumps(value, cls=TypedJSONEncoder, binary_arrays=binary_arrays,
+                          compact_units=compact_units).encode('utf8')
+
+    if not is_serialization_format_available(serialization_format):
+
+        raise ValueError('The {} serialization format requires the optional '
+                         'msgpack package to be installed.'.format(serialization_format.value))
+
+    import msgpack
+
+    # Primitive types (and their subclasses) are handled by msgpack in the
+    # same way as by the json module, and so only the remaining types need
+    # to be passed to the typed encoder.
+    return msgpack.packb(value, default=_message_pack_encoder.default, use_bin_type=True)
+
+
+def deserialize(contents, encoding='utf8'):
+    """Deserializes contents produced by the `serialize` method (or
+    by the `TypedJSONEncoder`) back into the corresponding class structure.
+    The format of the contents is automatically detected.
+
+    Parameters
+    ----------
+    contents: str or bytes
+        The serialized contents.
+    encoding: str
+        The encoding of the `contents` if they are JSON encoded bytes.
+
+    Returns
+    -------
+    Any
+        The deserialized value.
+    """
+
+    if get_serialization_format(contents) == SerializationFormat.Json:
+
+        if isinstance(contents, bytes):
+            contents = contents.decode(encoding)
+
+        return json.loads(contents, cls=TypedJSONDecoder)
+
+    if not is_serialization_format_available(SerializationFormat.MessagePack):
+
+        raise ValueError('Deserializing MessagePack encoded contents requires '
+                         'the optional msgpack package to be installed.')
+
+    import msgpack
+
+    return msgpack.unpackb(contents, object_hook=TypedJSONDecoder.object_hook, raw=False, strict_map_key=False)
 
 
 class TypedBaseModel(ABC):
@@ -454,8 +920,7 @@ class TypedBaseModel(ABC):
         str
             The JSON representation of this class.
         """
-        json_string = json.dumps(self, cls=TypedJSONEncoder)
-        return json_string
+        return serialize(self).decode('utf8')
 
     @classmethod
     def parse_json(cls, string_contents, encoding='utf8'):
@@ -474,8 +939,45 @@ class TypedBaseModel(ABC):
         Any
             The parsed class.
         """
-        return_object = json.loads(string_contents, encoding=encoding, cls=TypedJSONDecoder)
-        return return_object
+        return deserialize(string_contents, encoding)
+
+    def serialize(self, serialization_format=SerializationFormat.Json, binary_arrays=False, compact_units=False):
+        """Serializes this class into a given format.
+
+        Parameters
+        ----------
+        serialization_format: SerializationFormat
+            The format to serialize this class into.
+        binary_arrays: bool
+            If true, any numpy arrays will be encoded as their raw
+            buffers rather than as lists of values.
+        compact_units: bool
+            If true, the units of any quantities will be encoded as
+            compact unit codes rather than as lists of base units.
+
+        Returns
+        -------
+        bytes
+            The serialized representation of this class.
+        """
+        return serialize(self, serialization_format, binary_arrays, compact_units)
+
+    @classmethod
+    def deserialize(cls, contents):
+        """Parses serialized contents, in any of the supported
+        formats, into the corresponding class structure.
+
+        Parameters
+        ----------
+        contents: str or bytes
+            The serialized contents.
+
+        Returns
+        -------
+        Any
+            The parsed class.
+        """
+        return deserialize(contents)
 
     @abstractmethod
     def __getstate__(self):
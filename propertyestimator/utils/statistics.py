@@ -1,8 +1,9 @@
 """
 A collection of classes for loading and manipulating statistics data files.
 """
-import copy
+import csv
 import math
+import os
 from enum import Enum
 from io import StringIO
 
@@ -28,25 +29,56 @@ class ObservableType(Enum):
 class StatisticsArray:
     """
     A data object for storing and retrieving statistics generated by an OpenMM simulation.
+
+    Notes
+    -----
+    Internally the statistics are stored as a single, unitless (num_frames, num_observables)
+    array, alongside a table of the unit of each column. Units are only attached to the
+    data when it is requested through `get_observable`.
     """
 
-    def __init__(self, potential_energies, kinetic_energies, total_energies,
-                 temperatures, volumes, densities, enthalpies):
+    # The pandas csv column header, and the default unit, of each observable.
+    _observable_headers = {
+        ObservableType.PotentialEnergy: 'Potential Energy (kJ/mole)',
+        ObservableType.KineticEnergy: 'Kinetic Energy (kJ/mole)',
+        ObservableType.TotalEnergy: 'Total Energy (kJ/mole)',
+        ObservableType.Temperature: 'Temperature (K)',
+        ObservableType.Volume: 'Box Volume (nm^3)',
+        ObservableType.Density: 'Density (g/mL)',
+        ObservableType.Enthalpy: 'Enthalpy (kJ/mole)'
+    }
+
+    _default_units = {
+        ObservableType.PotentialEnergy: unit.kilojoule_per_mole,
+        ObservableType.KineticEnergy: unit.kilojoule_per_mole,
+        ObservableType.TotalEnergy: unit.kilojoule_per_mole,
+        ObservableType.Temperature: unit.kelvin,
+        ObservableType.Volume: unit.nanometer ** 3,
+        ObservableType.Density: unit.gram / unit.milliliter,
+        ObservableType.Enthalpy: unit.kilojoule_per_mole
+    }
+
+    def __init__(self, values, observable_units):
         """Constructs a new StatisticsArray object.
 
         Parameters
         ----------
+        values: np.ndarray, shape=(num_frames, num_observables), dtype=float
+            The unitless values of each of the observables.
+        observable_units: dict of ObservableType and unit.Unit
+            The unit of each of the columns of `values`, in the order in
+            which they appear.
         """
 
-        self._internal_data = {
-            ObservableType.PotentialEnergy: potential_energies,
-            ObservableType.KineticEnergy: kinetic_energies,
-            ObservableType.TotalEnergy: total_energies,
-            ObservableType.Temperature: temperatures,
-            ObservableType.Volume: volumes,
-            ObservableType.Density: densities,
-            ObservableType.Enthalpy: enthalpies,
-        }
+        values = np.asarray(values, dtype=np.float64)
+
+        if values.ndim != 2 or values.shape[1] != len(observable_units):
+            raise ValueError('The shape of the values array does not match the number of observables.')
+
+        self._values = values
+
+        self._observable_units = dict(observable_units)
+        self._observable_columns = {observable_type: index for index, observable_type in enumerate(observable_units)}
 
     def __len__(self):
         """Get the number of data items in the array.
@@ -56,7 +88,7 @@ class StatisticsArray:
         int
             The number of data items in the array.
         """
-        return len(self._internal_data[ObservableType.PotentialEnergy])
+        return self._values.shape[0]
 
     def get_observable(self, observable_type):
         """Return the data for a given observable.
@@ -75,7 +107,8 @@ class StatisticsArray:
         if not self.has_observable(observable_type):
             return None
 
-        return self._internal_data[observable_type]
+        column_index = self._observable_columns[observable_type]
+        return unit.Quantity(self._values[:, column_index], self._observable_units[observable_type])
 
     def has_observable(self, observable_type):
         """Return the data for a given statistic.
@@ -90,7 +123,32 @@ class StatisticsArray:
         bool
             True if data for the `observable_type` is available.
         """
-        return observable_type in self._internal_data
+        return observable_type in self._observable_columns
+
+    def _get_values_in_default_units(self, observable_type):
+        """Returns the unitless values of an observable in the
+        default units of that observable.
+
+        Parameters
+        ----------
+        observable_type: ObservableType
+            The type of observable to retrieve.
+
+        Returns
+        -------
+        np.ndarray, shape=(len(self)) dtype=float
+            The unitless values.
+        """
+
+        values = self._values[:, self._observable_columns[observable_type]]
+
+        observable_unit = self._observable_units[observable_type]
+        default_unit = self._default_units[observable_type]
+
+        if observable_unit == default_unit:
+            return values
+
+        return values * observable_unit.conversion_factor_to(default_unit)
 
     def save_as_pandas_csv(self, file_path):
         """Saves the `StatisticsArray` to a pandas csv file.
@@ -101,30 +159,223 @@ class StatisticsArray:
             The file path to save the csv file to.
         """
 
-        data = np.array([
-            self._internal_data[ObservableType.PotentialEnergy] / unit.kilojoule_per_mole,
-            self._internal_data[ObservableType.KineticEnergy] / unit.kilojoule_per_mole,
-            self._internal_data[ObservableType.TotalEnergy] / unit.kilojoule_per_mole,
-            self._internal_data[ObservableType.Temperature] / unit.kelvin,
-            self._internal_data[ObservableType.Volume] / unit.nanometer**3,
-            self._internal_data[ObservableType.Density] / unit.gram * unit.milliliter,
-            self._internal_data[ObservableType.Enthalpy] / unit.kilojoule_per_mole])
-
-        data = data.transpose()
-
-        columns = [
-            "Potential Energy (kJ/mole)",
-            "Kinetic Energy (kJ/mole)",
-            "Total Energy (kJ/mole)",
-            "Temperature (K)",
-            "Box Volume (nm^3)",
-            "Density (g/mL)",
-            "Enthalpy (kJ/mole)"
-        ]
+        observable_types = [observable_type for observable_type in self._observable_headers
+                            if self.has_observable(observable_type)]
+
+        data = np.column_stack([self._get_values_in_default_units(observable_type)
+                                for observable_type in observable_types])
+
+        columns = [self._observable_headers[observable_type] for observable_type in observable_types]
 
         data_frame = pd.DataFrame(data=data, columns=columns)
         data_frame.to_csv(file_path)
 
+    def _get_numpy_data_type(self):
+        """Returns the structured data type used to store this
+        array in the binary numpy format.
+
+        Returns
+        -------
+        np.dtype
+            The structured data type.
+        """
+
+        observable_types = [observable_type for observable_type in self._observable_headers
+                            if self.has_observable(observable_type)]
+
+        return np.dtype([(observable_type.value, np.float64) for observable_type in observable_types])
+
+    def _fill_numpy_data(self, data):
+        """Copies the contents of this array into a structured array
+        created with the data type returned by `_get_numpy_data_type`.
+
+        Parameters
+        ----------
+        data: np.ndarray
+            The structured array to fill.
+        """
+
+        for field_name in data.dtype.names:
+            data[field_name] = self._get_values_in_default_units(ObservableType(field_name))
+
+    def save_as_numpy(self, file_path):
+        """Saves the `StatisticsArray` to a binary numpy (.npy) file.
+
+        Notes
+        -----
+        The data is stored as a structured array, with one float64 field
+        per observable (named after the observable type and stored in
+        its default unit), so that the column layout is self-described by
+        the .npy header and the file can be memory mapped when loaded.
+
+        Parameters
+        ----------
+        file_path: str
+            The file path to save the numpy file to.
+        """
+
+        data = np.empty(len(self), dtype=self._get_numpy_data_type())
+        self._fill_numpy_data(data)
+
+        # Write to a temporary file first so that any existing memory
+        # maps of `file_path` are not invalidated by truncating it.
+        temporary_path = file_path + '.tmp'
+
+        with open(temporary_path, 'wb') as file:
+            np.save(file, data)
+
+        os.replace(temporary_path, file_path)
+
+    @classmethod
+    def from_numpy(cls, file_path, memory_map=True):
+        """Creates a new `StatisticsArray` object from a numpy file
+        created by `save_as_numpy`.
+
+        Parameters
+        ----------
+        file_path: str
+            The file path to the numpy file.
+        memory_map: bool
+            If true, the file will be memory mapped (read-only) rather
+            than read into memory.
+
+        Returns
+        -------
+        StatisticsArray
+            The loaded array.
+        """
+
+        data = np.load(file_path, mmap_mode='r' if memory_map else None)
+
+        if data.dtype.names is None:
+            raise ValueError('The statistics file does not contain named observable columns.')
+
+        observable_units = {}
+
+        for field_name in data.dtype.names:
+
+            observable_type = ObservableType(field_name)
+            observable_units[observable_type] = cls._default_units[observable_type]
+
+        # All of the fields are float64 so the structured array can be viewed
+        # (without copying) as a plain (num_frames, num_observables) array.
+        values = data.view(np.float64).reshape(len(data), len(observable_units))
+
+        return cls(values, observable_units)
+
+    @classmethod
+    def from_file(cls, file_path):
+        """Creates a new `StatisticsArray` object from either a numpy file
+        created by `save_as_numpy`, or a pandas csv file created by
+        `save_as_pandas_csv`, automatically detecting the format.
+
+        Parameters
+        ----------
+        file_path: str
+            The file path to the statistics file.
+
+        Returns
+        -------
+        StatisticsArray
+            The loaded array.
+        """
+
+        with open(file_path, 'rb') as file:
+            magic_string = file.read(len(np.lib.format.MAGIC_PREFIX))
+
+        if magic_string == np.lib.format.MAGIC_PREFIX:
+            return cls.from_numpy(file_path)
+
+        return cls.from_pandas_csv(file_path)
+
+    @classmethod
+    def _from_data_frame(cls, data, pressure=None):
+        """Creates a new `StatisticsArray` object from a pandas data frame
+        whose columns follow the OpenMM StateDataReporter naming convention.
+
+        Parameters
+        ----------
+        data: pandas.DataFrame
+            The data frame to convert.
+        pressure: unit.Quantity, optional
+            If set, the enthalpy will be computed from the total energies and
+            volumes at this pressure, otherwise it will be read from the
+            data frame when present.
+
+        Returns
+        -------
+        StatisticsArray
+            The created array.
+        """
+
+        required_types = [
+            ObservableType.PotentialEnergy,
+            ObservableType.KineticEnergy,
+            ObservableType.TotalEnergy,
+            ObservableType.Temperature,
+            ObservableType.Volume,
+            ObservableType.Density
+        ]
+
+        columns = []
+        observable_units = {}
+
+        for observable_type in required_types:
+
+            header = cls._observable_headers[observable_type]
+
+            if header not in data:
+
+                raise ValueError('The statistics file does not contain a {} '
+                                 'column.'.format(header.split(' (')[0]))
+
+            columns.append(data[header].to_numpy(dtype=np.float64))
+            observable_units[observable_type] = cls._default_units[observable_type]
+
+        enthalpy_header = cls._observable_headers[ObservableType.Enthalpy]
+
+        if pressure is not None:
+
+            # Convert the pV term into a single scalar factor so that the unit
+            # machinery is not applied across the whole volume array.
+            pressure_factor = (pressure * unit.nanometer ** 3 *
+                               unit.AVOGADRO_CONSTANT_NA).value_in_unit(unit.kilojoule_per_mole)
+
+            columns.append(columns[2] + columns[4] * pressure_factor)
+            observable_units[ObservableType.Enthalpy] = unit.kilojoule_per_mole
+
+        elif enthalpy_header in data:
+
+            columns.append(data[enthalpy_header].to_numpy(dtype=np.float64))
+            observable_units[ObservableType.Enthalpy] = unit.kilojoule_per_mole
+
+        return cls(np.column_stack(columns), observable_units)
+
+    @staticmethod
+    def _open_openmm_csv(file):
+        """Reads the header of an openmm csv file, returning the
+        column names. The file is left positioned at the first data row.
+
+        Parameters
+        ----------
+        file: file
+            The open file to read the header from.
+
+        Returns
+        -------
+        list of str
+            The column names.
+        """
+
+        header = file.readline()
+
+        if len(header) < 1:
+            raise ValueError('The statistics file is empty.')
+
+        # Strip the leading '#' which the StateDataReporter prepends to the header.
+        header = header[1:] if header.startswith('#') else header
+        return next(csv.reader([header.strip()]))
+
     @classmethod
     def from_openmm_csv(cls, file_path, pressure=None):
         """Creates a new `StatisticsArray` object from an openmm csv file.
@@ -140,57 +391,102 @@ class StatisticsArray:
         -------
 
         """
-        file_contents = None
 
         with open(file_path, 'r') as file:
 
-            file_contents = file.read()
+            column_names = cls._open_openmm_csv(file)
+            data = pd.read_csv(file, names=column_names, header=None)
 
-            if len(file_contents) < 1:
-                raise ValueError('The statistics file is empty.')
+        return cls._from_data_frame(data, pressure)
 
-            file_contents = file_contents[1:]
+    @classmethod
+    def iterate_openmm_csv(cls, file_path, pressure=None, chunk_size=10000):
+        """Reads an openmm csv file in fixed size chunks, yielding a new
+        `StatisticsArray` object for each chunk.
 
-        string_object = StringIO(file_contents)
-        data = pd.read_csv(string_object)
+        Parameters
+        ----------
+        file_path: str
+            The file path to the csv file.
+        pressure: unit.Quantity, optional
+            The pressure at which the statisitcs in the csv file were sampled,
+            if sampling was performed in a constant pressure ensemble.
+        chunk_size: int
+            The maximum number of rows to read in each chunk.
+
+        Yields
+        ------
+        StatisticsArray
+            The statistics in the next chunk of the file.
+        """
+
+        with open(file_path, 'r') as file:
+
+            column_names = cls._open_openmm_csv(file)
+
+            for data in pd.read_csv(file, names=column_names, header=None, chunksize=chunk_size):
+                yield cls._from_data_frame(data, pressure)
+
+    @classmethod
+    def convert_openmm_csv(cls, input_file_path, output_file_path, pressure=None, chunk_size=10000):
+        """Converts an openmm csv file into the binary numpy format written
+        by `save_as_numpy`, processing the csv file in fixed size chunks such
+        that the memory required is independent of the length of the file.
 
-        if 'Potential Energy (kJ/mole)' not in data:
-            raise ValueError('The statistics file does not contain a Potential Energy column.')
+        Parameters
+        ----------
+        input_file_path: str
+            The file path to the openmm csv file.
+        output_file_path: str
+            The file path to save the numpy file to.
+        pressure: unit.Quantity, optional
+            The pressure at which the statisitcs in the csv file were sampled,
+            if sampling was performed in a constant pressure ensemble.
+        chunk_size: int
+            The maximum number of rows to process at once.
 
-        potential_energies = np.array(data['Potential Energy (kJ/mole)']) * unit.kilojoule / unit.mole
+        Returns
+        -------
+        int
+            The number of frames which were converted.
+        """
 
-        if 'Kinetic Energy (kJ/mole)' not in data:
-            raise ValueError('The statistics file does not contain a Kinetic Energy column.')
+        # Count the number of rows up front so that the output file
+        # can be allocated, and then filled incrementally.
+        with open(input_file_path, 'r') as file:
 
-        kinetic_energies = np.array(data['Kinetic Energy (kJ/mole)']) * unit.kilojoule / unit.mole
+            cls._open_openmm_csv(file)
+            number_of_frames = sum(1 for line in file if len(line.strip()) > 0)
 
-        if 'Total Energy (kJ/mole)' not in data:
-            raise ValueError('The statistics file does not contain a Total Energy column.')
+        temporary_path = output_file_path + '.tmp'
 
-        total_energies = np.array(data['Total Energy (kJ/mole)']) * unit.kilojoule / unit.mole
+        output_data = None
+        start_index = 0
 
-        if 'Temperature (K)' not in data:
-            raise ValueError('The statistics file does not contain a Temperature column.')
+        for chunk in cls.iterate_openmm_csv(input_file_path, pressure, chunk_size):
 
-        temperatures = np.array(data['Temperature (K)']) * unit.kelvin
+            if output_data is None:
 
-        if 'Box Volume (nm^3)' not in data:
-            raise ValueError('The statistics file does not contain a Box Volume column.')
+                output_data = np.lib.format.open_memmap(temporary_path, mode='w+',
+                                                        dtype=chunk._get_numpy_data_type(),
+                                                        shape=(number_of_frames,))
 
-        volumes = np.array(data['Box Volume (nm^3)']) * unit.nanometer * unit.nanometer * unit.nanometer
+            chunk._fill_numpy_data(output_data[start_index: start_index + len(chunk)])
+            start_index += len(chunk)
 
-        if 'Density (g/mL)' not in data:
-            raise ValueError('The statistics file does not contain a Density column.')
+        if output_data is None:
 
-        densities = np.array(data['Density (g/mL)']) * unit.gram / unit.milliliter
+            # The file only contained a header.
+            cls._from_data_frame(pd.DataFrame(columns=list(cls._observable_headers.values())[:-1]),
+                                 pressure).save_as_numpy(output_file_path)
 
-        enthalpies = None
+            return 0
 
-        if pressure is not None:
-            enthalpies = total_energies + volumes * pressure * unit.AVOGADRO_CONSTANT_NA
+        output_data.flush()
+        del output_data
 
-        return cls(potential_energies, kinetic_energies, total_energies,
-                   temperatures, volumes, densities, enthalpies)
+        os.replace(temporary_path, output_file_path)
+        return start_index
 
     @classmethod
     def from_pandas_csv(cls, file_path):
@@ -213,43 +509,7 @@ class StatisticsArray:
         string_object = StringIO(file_contents)
         data = pd.read_csv(string_object)
 
-        if 'Potential Energy (kJ/mole)' not in data:
-            raise ValueError('The statistics file does not contain a Potential Energy column.')
-
-        potential_energies = np.array(data['Potential Energy (kJ/mole)']) * unit.kilojoule / unit.mole
-
-        if 'Kinetic Energy (kJ/mole)' not in data:
-            raise ValueError('The statistics file does not contain a Kinetic Energy column.')
-
-        kinetic_energies = np.array(data['Kinetic Energy (kJ/mole)']) * unit.kilojoule / unit.mole
-
-        if 'Total Energy (kJ/mole)' not in data:
-            raise ValueError('The statistics file does not contain a Total Energy column.')
-
-        total_energies = np.array(data['Total Energy (kJ/mole)']) * unit.kilojoule / unit.mole
-
-        if 'Temperature (K)' not in data:
-            raise ValueError('The statistics file does not contain a Temperature column.')
-
-        temperatures = np.array(data['Temperature (K)']) * unit.kelvin
-
-        if 'Box Volume (nm^3)' not in data:
-            raise ValueError('The statistics file does not contain a Box Volume column.')
-
-        volumes = np.array(data['Box Volume (nm^3)']) * unit.nanometer * unit.nanometer * unit.nanometer
-
-        if 'Density (g/mL)' not in data:
-            raise ValueError('The statistics file does not contain a Density column.')
-
-        densities = np.array(data['Density (g/mL)']) * unit.gram / unit.milliliter
-
-        enthalpies = None
-
-        if 'Enthalpy (kJ/mole)' in data:
-            enthalpies = np.array(data['Enthalpy (kJ/mole)']) * unit.kilojoule_per_mole
-
-        return cls(potential_energies, kinetic_energies, total_energies,
-                   temperatures, volumes, densities, enthalpies)
+        return cls._from_data_frame(data)
 
     @classmethod
     def from_statistics_array(cls, existing_instance, data_indices=None):
@@ -257,11 +517,16 @@ class StatisticsArray:
         a set of data indices are provided, only a subset of data will
         be copied across from the existing instance.
 
+        Notes
+        -----
+        If `data_indices` is None or a slice, the new array will be a view
+        of the existing array's data rather than a copy.
+
         Parameters
         ----------
         existing_instance: `StatisticsArray`
             The existing array to clone
-        data_indices: list of int, optional
+        data_indices: list of int or slice, optional
             A set of indices, which indicate which data points to copy
             from the original objext. If None, all data points will be
             copied.
@@ -272,26 +537,159 @@ class StatisticsArray:
             The created array object.
         """
 
-        potential_energies = copy.deepcopy(existing_instance.get_observable(ObservableType.PotentialEnergy))
-        kinetic_energies = copy.deepcopy(existing_instance.get_observable(ObservableType.KineticEnergy))
-        total_energies = copy.deepcopy(existing_instance.get_observable(ObservableType.TotalEnergy))
-        temperatures = copy.deepcopy(existing_instance.get_observable(ObservableType.Temperature))
-        volumes = copy.deepcopy(existing_instance.get_observable(ObservableType.Volume))
-        densities = copy.deepcopy(existing_instance.get_observable(ObservableType.Density))
-        enthalpies = copy.deepcopy(existing_instance.get_observable(ObservableType.Enthalpy))
+        values = existing_instance._values
+
+        if isinstance(data_indices, slice):
+            values = values[data_indices]
+        elif data_indices is not None:
+            values = np.take(values, data_indices, axis=0)
+
+        observable_units = {observable_type: existing_instance._observable_units[observable_type]
+                            for observable_type in existing_instance._observable_columns}
+
+        return cls(values, observable_units)
+
+
+# The number of consecutive bootstrap iterations whose sample indices
+# are drawn from the same (independently seeded) random stream.
+_bootstrap_block_size = 16
+
+
+def _generate_bootstrap_indices(seed_sequence, start_iteration, end_iteration, data_sub_counts,
+                                relative_sample_size):
+    """Draws, with replacement, the indices of the data points which make up
+    a range of bootstrap samples, such that each sample contains the correct
+    proportion of data from each subset of the data.
+
+    Notes
+    -----
+    The iterations are divided into fixed blocks of `_bootstrap_block_size`,
+    and the indices of each block are drawn from an independent random stream
+    spawned from `seed_sequence`. The indices of a given iteration therefore
+    do not depend on how (or in what order) the iterations are evaluated, while
+    only the indices of the requested iterations need to be held in memory.
+
+    Parameters
+    ----------
+    seed_sequence: np.random.SeedSequence
+        The sequence from which the random stream of each block is spawned.
+    start_iteration: int
+        The index of the first iteration to draw the samples of.
+    end_iteration: int
+        The index after the last iteration to draw the samples of.
+    data_sub_counts: np.ndarray of int
+        The number of data points which belong to each subset of the data.
+    relative_sample_size: float
+        The sample size, relative to the size of each subset of the data.
+
+    Returns
+    -------
+    np.ndarray, shape=(end_iteration - start_iteration, sample_size), dtype=int
+        The indices of the data points in each bootstrap sample.
+    """
+
+    sample_sizes = [min(math.floor(sub_count * relative_sample_size), sub_count) for sub_count in data_sub_counts]
 
-        return_object = StatisticsArray(potential_energies[data_indices],
-                                        kinetic_energies[data_indices],
-                                        total_energies[data_indices],
-                                        temperatures[data_indices],
-                                        volumes[data_indices],
-                                        densities[data_indices],
-                                        enthalpies[data_indices])
+    first_block = start_iteration // _bootstrap_block_size
+    last_block = -(-end_iteration // _bootstrap_block_size)
 
-        return return_object
+    sample_indices = np.empty(((last_block - first_block) * _bootstrap_block_size, sum(sample_sizes)),
+                              dtype=np.int64)
 
+    for block_index in range(first_block, last_block):
 
-def bootstrap(bootstrap_function, iterations=200, relative_sample_size=1.0, data_sub_counts=None, **data_kwargs):
+        # Equivalent to the `block_index`th child of `seed_sequence.spawn`,
+        # but without needing to spawn all of the preceding children.
+        block_seed_sequence = np.random.SeedSequence(seed_sequence.entropy,
+                                                     spawn_key=seed_sequence.spawn_key + (block_index,))
+
+        random_generator = np.random.default_rng(block_seed_sequence)
+
+        block_start = (block_index - first_block) * _bootstrap_block_size
+        block_indices = sample_indices[block_start: block_start + _bootstrap_block_size]
+
+        start_index = 0
+        sample_index = 0
+
+        for sub_count, sample_size in zip(data_sub_counts, sample_sizes):
+
+            block_indices[:, sample_index: sample_index + sample_size] = \
+                start_index + random_generator.integers(0, sub_count, (_bootstrap_block_size, sample_size))
+
+            start_index += sub_count
+            sample_index += sample_size
+
+    offset = start_iteration - first_block * _bootstrap_block_size
+    return sample_indices[offset: offset + end_iteration - start_iteration]
+
+
+def _evaluate_bootstrap_samples(bootstrap_function, data_to_bootstrap, seed_sequence, start_iteration,
+                                end_iteration, data_sub_counts, relative_sample_size, batched):
+    """Evaluates the bootstrap function for each of a range of bootstrap iterations.
+
+    Parameters
+    ----------
+    bootstrap_function: function
+        The function to evaluate for each sample.
+    data_to_bootstrap: dict of str and np.ndarray
+        The full data set to draw the samples from.
+    seed_sequence: np.random.SeedSequence
+        The sequence from which the samples are drawn. See `_generate_bootstrap_indices`.
+    start_iteration: int
+        The index of the first iteration to evaluate.
+    end_iteration: int
+        The index after the last iteration to evaluate.
+    data_sub_counts: np.ndarray of int
+        The number of data points which belong to each subset of the data.
+    relative_sample_size: float
+        The sample size, relative to the size of each subset of the data.
+    batched: bool
+        If true, the bootstrap function will be evaluated once for
+        all of the samples. See `bootstrap`.
+
+    Returns
+    -------
+    np.ndarray, shape=(end_iteration - start_iteration,), dtype=float
+        The value of the bootstrap function for each sample.
+    """
+
+    if batched:
+
+        sample_indices = _generate_bootstrap_indices(seed_sequence, start_iteration, end_iteration,
+                                                     data_sub_counts, relative_sample_size)
+
+        sample_data = {keyword: np.take(data_to_bootstrap[keyword], sample_indices, axis=0)
+                       for keyword in data_to_bootstrap}
+
+        return np.asarray(bootstrap_function(**sample_data))
+
+    values = np.zeros(end_iteration - start_iteration)
+
+    # Only draw the indices of one block of iterations at a time.
+    block_start = start_iteration
+
+    while block_start < end_iteration:
+
+        block_end = min(end_iteration, (block_start // _bootstrap_block_size + 1) * _bootstrap_block_size)
+
+        sample_indices = _generate_bootstrap_indices(seed_sequence, block_start, block_end,
+                                                     data_sub_counts, relative_sample_size)
+
+        for sample_index, indices in enumerate(sample_indices):
+
+            sample_data = {keyword: np.take(data_to_bootstrap[keyword], indices, axis=0)
+                           for keyword in data_to_bootstrap}
+
+            values[block_start - start_iteration + sample_index] = bootstrap_function(**sample_data)
+
+        block_start = block_end
+
+    return values
+
+
+def bootstrap(bootstrap_function, iterations=200, relative_sample_size=1.0, data_sub_counts=None,
+              batched=False, random_seed=None, number_of_workers=1, use_processes=False,
+              convergence_tolerance=None, convergence_batch_size=20, return_iterations=False, **data_kwargs):
     """Performs bootstrapping on a data set to calculate the
     average value, and the standard error in the average,
     bootstrapping.
@@ -302,7 +700,8 @@ def bootstrap(bootstrap_function, iterations=200, relative_sample_size=1.0, data
         The function to evaluate at each bootstrap iteration. The function
         should take a kwargs array as input, and return a float.
     iterations: int
-        The number of bootstrap iterations to perform.
+        The number of bootstrap iterations to perform. If a `convergence_tolerance`
+        is set, this is the maximum number of iterations to perform.
     relative_sample_size: float
         The percentage sample size to bootstrap over, relative to the
         size of the full data set.
@@ -316,6 +715,31 @@ def bootstrap(bootstrap_function, iterations=200, relative_sample_size=1.0, data
         If the data to bootstrap is of the form [x0, x1, x2, y0, y1] for example,
         then `data_sub_counts=[3, 2]` and a possible sample may look like
         [x0, x0, x2, y0, y0], but never [x0, x1, y0, y1, y1].
+    batched: bool
+        If true, the bootstrap function will be called only once (per worker), with
+        all of the bootstrap samples stacked along a new leading axis (i.e. each kwargs
+        argument will have shape=(iterations, num_frames, num_dimensions)), and
+        should return an array of the evaluated values. The average value of the
+        full data set is evaluated by passing a stack of one sample.
+    random_seed: int, optional
+        The seed used to draw the bootstrap samples. The samples drawn for a given
+        seed are identical regardless of the number of workers used.
+    number_of_workers: int
+        The number of workers over which to spread the bootstrap iterations.
+    use_processes: bool
+        If true, the iterations will be spread over a pool of processes rather
+        than threads, in which case the bootstrap function and data must be
+        picklable.
+    convergence_tolerance: float, optional
+        If set to a positive value, the iterations will be performed in batches of
+        `convergence_batch_size`, stopping once the relative change in the uncertainty
+        after a batch falls below this tolerance, or once `iterations` iterations have
+        been performed. Otherwise, all `iterations` iterations are performed.
+    convergence_batch_size: int
+        The number of iterations to perform between each check for convergence.
+    return_iterations: bool
+        If true, the number of iterations which were actually performed will
+        also be returned.
     data_kwargs: np.ndarray, shape=(num_frames, num_dimensions), dtype=float
         A key words dictionary of the data which will be passed to the
          bootstrap function. Each kwargs argument should be a numpy array.
@@ -326,9 +750,11 @@ def bootstrap(bootstrap_function, iterations=200, relative_sample_size=1.0, data
         The average of the data.
     float
         The uncertainty in the average.
+    int, optional
+        The number of iterations performed, if `return_iterations` is true.
     """
 
-    if len(data_kwargs) is 0:
+    if len(data_kwargs) == 0:
         raise ValueError('There is no data to bootstrap')
 
     # Make a copy of the data so we don't accidentally destroy anything.
@@ -350,35 +776,88 @@ def bootstrap(bootstrap_function, iterations=200, relative_sample_size=1.0, data
 
     assert data_sub_counts.sum() == data_size
 
+    seed_sequence = np.random.SeedSequence(random_seed)
+
+    if convergence_tolerance is not None and convergence_tolerance <= 0.0:
+        convergence_tolerance = None
+
+    if convergence_tolerance is None:
+        convergence_batch_size = iterations
+
+    assert convergence_batch_size > 0
+
+    number_of_workers = max(1, min(number_of_workers, convergence_batch_size, iterations))
+    executor = None
+
+    if number_of_workers > 1:
+
+        from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+        executor_type = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+        executor = executor_type(max_workers=number_of_workers)
+
     average_values = np.zeros(iterations)
 
-    for bootstrap_iteration in range(iterations):
+    iterations_performed = 0
+    previous_uncertainty = None
 
-        sample_data = {}
+    try:
 
-        for keyword in data_to_bootstrap:
-            sample_data[keyword] = np.zeros(data_to_bootstrap[keyword].shape)
+        while iterations_performed < iterations:
 
-        start_index = 0
+            batch_end = min(iterations, iterations_performed + convergence_batch_size)
 
-        for sub_count in data_sub_counts:
+            if executor is None:
 
-            # Choose the sample size as a percentage of the full data set.
-            sample_size = min(math.floor(sub_count * relative_sample_size), sub_count)
-            sample_indices = np.random.choice(sub_count, sample_size)
+                batch_values = _evaluate_bootstrap_samples(bootstrap_function, data_to_bootstrap, seed_sequence,
+                                                           iterations_performed, batch_end, data_sub_counts,
+                                                           relative_sample_size, batched)
 
-            for keyword in data_to_bootstrap:
+            else:
 
-                sub_data = data_to_bootstrap[keyword][start_index: start_index + sub_count]
+                worker_iterations = [iteration_range for iteration_range in
+                                     np.array_split(np.arange(iterations_performed, batch_end), number_of_workers)
+                                     if len(iteration_range) > 0]
 
-                for index in range(sub_count):
-                    sample_data[keyword][index + start_index] = sub_data[sample_indices][index]
+                futures = [executor.submit(_evaluate_bootstrap_samples, bootstrap_function, data_to_bootstrap,
+                                           seed_sequence, int(iteration_range[0]), int(iteration_range[-1]) + 1,
+                                           data_sub_counts, relative_sample_size, batched)
+                           for iteration_range in worker_iterations]
 
-            start_index += sub_count
+                batch_values = np.concatenate([future.result() for future in futures])
+
+            average_values[iterations_performed: batch_end] = batch_values
+            iterations_performed = batch_end
+
+            if convergence_tolerance is None:
+                continue
+
+            current_uncertainty = average_values[:iterations_performed].std()
+
+            if previous_uncertainty is not None:
+
+                uncertainty_change = abs(current_uncertainty - previous_uncertainty)
+
+                if uncertainty_change <= convergence_tolerance * abs(previous_uncertainty):
+                    break
 
-        average_values[bootstrap_iteration] = bootstrap_function(**sample_data)
+            previous_uncertainty = current_uncertainty
+
+    finally:
+
+        if executor is not None:
+            executor.shutdown()
+
+    average_values = average_values[:iterations_performed]
+
+    if batched:
+
+        average_value = bootstrap_function(**{keyword: data_to_bootstrap[keyword][np.newaxis]
+                                              for keyword in data_to_bootstrap})[0]
+
+    else:
+        average_value = bootstrap_function(**data_to_bootstrap)
 
-    average_value = bootstrap_function(**data_to_bootstrap)
     uncertainty = average_values.std()
 
     if isinstance(average_value, np.float32) or isinstance(average_value, np.float64):
@@ -387,4 +866,7 @@ def bootstrap(bootstrap_function, iterations=200, relative_sample_size=1.0, data
     if isinstance(uncertainty, np.float32) or isinstance(uncertainty, np.float64):
         uncertainty = uncertainty.item()
 
+    if return_iterations:
+        return average_value, uncertainty, iterations_performed
+
     return average_value, uncertainty
@@ -12,7 +12,7 @@ import numpy as np
 from pymbar.utils import ParameterError
 
 
-def calculate_statistical_inefficiency(time_series, minimum_samples=3):
+def calculate_statistical_inefficiency(time_series, minimum_samples=3, fft=True):
     """Calculates the statistical inefficiency of a time series.
 
     Notes
@@ -20,6 +20,11 @@ def calculate_statistical_inefficiency(time_series, minimum_samples=3):
     The statistical inefficiency g, is related to the autocorrelation time
     by g = 1+2*tau
 
+    When `fft` is True, the full autocorrelation function is evaluated in one
+    pass using fast Fourier transforms, and then truncated at the first non-positive
+    value exactly as in the direct (lag by lag) implementation. The direct
+    implementation is retained for reference when `fft` is False.
+
     This method is based on the paper by J. D. Chodera [1], and the implementation at
     https://github.com/choderalab/pymbar - extending the code to support multidimensional data.
 
@@ -35,6 +40,9 @@ def calculate_statistical_inefficiency(time_series, minimum_samples=3):
         The time series to calculate the statistical inefficiency of.
     minimum_samples: int
         The minimum number of data points to consider in the calculation.
+    fft: bool
+        If true, the autocorrelation function will be computed using fast
+        Fourier transforms rather than by a direct summation over each lag time.
 
     Returns
     -------
@@ -42,6 +50,9 @@ def calculate_statistical_inefficiency(time_series, minimum_samples=3):
         The statistical inefficiency.
     """
 
+    if fft:
+        return _calculate_statistical_inefficiency_fft(time_series, minimum_samples)
+
     number_of_timesteps = time_series.shape[0]
     time_series_dimension = 1 if len(time_series.shape) == 1 else time_series.shape[1]
 
@@ -94,7 +105,98 @@ def calculate_statistical_inefficiency(time_series, minimum_samples=3):
     return statistical_inefficiency
 
 
-def calculate_autocorrelation_time(time_series, minimum_samples=3):
+def _calculate_autocorrelation_function_fft(shifted_data):
+    """Computes the un-normalised autocorrelation function of a mean
+    shifted time series at every lag time using fast Fourier transforms.
+
+    Parameters
+    ----------
+    shifted_data: np.ndarray, shape=(num_frames, num_dimensions), dtype=float
+        The time series, with its mean already subtracted.
+
+    Returns
+    -------
+    np.ndarray, shape=(num_frames), dtype=float
+        The sum over all time origins (and dimensions) of the products
+        of the data points separated by each lag time.
+    """
+
+    number_of_timesteps = shifted_data.shape[0]
+
+    # Pad the data with zeros to prevent the periodicity of the
+    # discrete transform from wrapping the signal back onto itself.
+    fft_size = 2 ** int(math.ceil(math.log2(2 * number_of_timesteps - 1))) if number_of_timesteps > 1 else 1
+
+    transformed_data = np.fft.rfft(shifted_data, n=fft_size, axis=0)
+    power_spectrum = (transformed_data * transformed_data.conjugate()).real
+
+    autocorrelation_function = np.fft.irfft(power_spectrum, n=fft_size, axis=0)[:number_of_timesteps]
+
+    if autocorrelation_function.ndim > 1:
+        autocorrelation_function = autocorrelation_function.sum(axis=1)
+
+    return autocorrelation_function
+
+
+def _calculate_statistical_inefficiency_fft(time_series, minimum_samples=3):
+    """Calculates the statistical inefficiency of a time series using an
+    autocorrelation function computed by fast Fourier transforms.
+
+    Parameters
+    ----------
+    time_series: np.ndarray, shape=(num_frames, num_dimensions), dtype=float
+        The time series to calculate the statistical inefficiency of.
+    minimum_samples: int
+        The minimum number of data points to consider in the calculation.
+
+    Returns
+    -------
+    float:
+        The statistical inefficiency.
+    """
+
+    number_of_timesteps = time_series.shape[0]
+
+    shifted_data = time_series.astype(np.float64) - time_series.mean(0)
+
+    if shifted_data.ndim > 2:
+        shifted_data = shifted_data.reshape(number_of_timesteps, -1)
+
+    autocorrelation_sums = _calculate_autocorrelation_function_fft(shifted_data)
+
+    sigma_squared = autocorrelation_sums[0] / number_of_timesteps
+
+    if sigma_squared == 0:
+        raise ParameterError('Sample covariance sigma_AB^2 = 0 -- cannot compute statistical inefficiency')
+
+    if number_of_timesteps < 3:
+        return 1.0
+
+    timesteps = np.arange(1, number_of_timesteps - 1)
+
+    autocorrelation_function = (autocorrelation_sums[1:number_of_timesteps - 1] /
+                                (number_of_timesteps - timesteps) / sigma_squared)
+
+    # Truncate the sum at the first lag time (beyond the minimum) at which
+    # the autocorrelation function is no longer positive.
+    cutoff_indices = np.flatnonzero((autocorrelation_function <= 0.0) & (timesteps > minimum_samples))
+
+    if len(cutoff_indices) > 0:
+
+        autocorrelation_function = autocorrelation_function[:cutoff_indices[0]]
+        timesteps = timesteps[:cutoff_indices[0]]
+
+    statistical_inefficiency = 1.0 + (2.0 * autocorrelation_function *
+                                      (1.0 - timesteps / float(number_of_timesteps))).sum()
+
+    # Enforce a minimum autocorrelation time of 0.
+    if statistical_inefficiency < 1.0:
+        statistical_inefficiency = 1.0
+
+    return float(statistical_inefficiency)
+
+
+def calculate_autocorrelation_time(time_series, minimum_samples=3, fft=True):
     """Calculates the autocorrelation time of a time series via its
     statistical inefficiency.
 
@@ -104,6 +206,9 @@ def calculate_autocorrelation_time(time_series, minimum_samples=3):
         The time series to calculate the autocorrelation time of.
     minimum_samples: int
         The minimum number of data points to consider in the calculation.
+    fft: bool
+        If true, the autocorrelation function will be computed using fast
+        Fourier transforms rather than by a direct summation over each lag time.
 
     Returns
     -------
@@ -111,11 +216,48 @@ def calculate_autocorrelation_time(time_series, minimum_samples=3):
         The autocorrelation time.
     """
 
-    statistical_inefficiency = calculate_statistical_inefficiency(time_series, minimum_samples)
+    statistical_inefficiency = calculate_statistical_inefficiency(time_series, minimum_samples, fft)
     return (statistical_inefficiency - 1.0) / 2.0
 
 
-def detect_equilibration(time_series, minimum_samples=3):
+def _get_equilibration_origins(number_of_timesteps, nskip=1, geometric_origins=False):
+    """Returns the indices of the candidate time origins which should be
+    considered when detecting equilibration.
+
+    Parameters
+    ----------
+    number_of_timesteps: int
+        The length of the time series.
+    nskip: int
+        The spacing between (the first two) candidate time origins.
+    geometric_origins: bool
+        If true, the spacing between successive candidate time origins
+        will double each time, rather than remain fixed at `nskip`.
+
+    Returns
+    -------
+    np.ndarray of int
+        The indices of the candidate time origins.
+    """
+
+    if nskip < 1:
+        raise ValueError('The spacing between time origins (nskip) must be at least one.')
+
+    if not geometric_origins:
+        return np.arange(0, number_of_timesteps - 1, nskip)
+
+    origins = [0]
+    spacing = nskip
+
+    while origins[-1] + spacing < number_of_timesteps - 1:
+
+        origins.append(origins[-1] + spacing)
+        spacing *= 2
+
+    return np.array(origins)
+
+
+def detect_equilibration(time_series, minimum_samples=3, nskip=1, geometric_origins=False, fft=True):
     """Detect when a time series set has effectively become stationary (i.e has reached equilibrium).
 
     Notes
@@ -123,6 +265,12 @@ def detect_equilibration(time_series, minimum_samples=3):
     This method is based on the paper by J. D. Chodera [1], and the implementation at
     https://github.com/choderalab/pymbar - extending the code to support multidimensional data.
 
+    By default every possible time origin is considered, which scales poorly with the
+    length of the time series. The number of origins which are considered may be reduced
+    by either only considering every `nskip`-th origin, or by placing the origins on a
+    geometric grid (i.e. 0, `nskip`, 3*`nskip`, 7*`nskip`, ...), which is dense close to
+    the start of the series where equilibration is most likely to be found.
+
     References
     ----------
     [1] J. D. Chodera, W. C. Swope, J. W. Pitera, C. Seok, and K. A. Dill. Use of the weighted
@@ -135,6 +283,14 @@ def detect_equilibration(time_series, minimum_samples=3):
         The time series to analyse.
     minimum_samples: int
         The minimum number of data points to consider in the calculation.
+    nskip: int
+        The spacing between the time origins which are considered.
+    geometric_origins: bool
+        If true, the spacing between the considered time origins will double
+        after each origin, starting from `nskip`.
+    fft: bool
+        If true, the statistical inefficiencies will be computed using fast
+        Fourier transforms.
 
     Returns
     -------
@@ -147,39 +303,49 @@ def detect_equilibration(time_series, minimum_samples=3):
     """
 
     number_of_timesteps = time_series.shape[0]
-    statistical_inefficiency_array = np.ones([number_of_timesteps - 1], np.float32)
 
     # Special case if the time series is constant.
     if time_series.std() == 0.0:
         return 0, 1, 1
 
-    effect_samples_array = np.ones([number_of_timesteps - 1], np.float32)
+    origins = _get_equilibration_origins(number_of_timesteps, nskip, geometric_origins)
+
+    statistical_inefficiency_array = np.ones([len(origins)], np.float32)
+    effect_samples_array = np.ones([len(origins)], np.float32)
 
-    for current_timestep in range(0, number_of_timesteps - 1):
+    for origin_index, current_timestep in enumerate(origins):
 
         try:
-            statistical_inefficiency_array[current_timestep] = calculate_statistical_inefficiency(
-                time_series[current_timestep:number_of_timesteps], minimum_samples)
+            statistical_inefficiency_array[origin_index] = calculate_statistical_inefficiency(
+                time_series[current_timestep:number_of_timesteps], minimum_samples, fft)
         except ParameterError:  # Fix for issue https://github.com/choderalab/pymbar/issues/122
-            statistical_inefficiency_array[current_timestep] = (number_of_timesteps - current_timestep + 1)
+            statistical_inefficiency_array[origin_index] = (number_of_timesteps - current_timestep + 1)
+
+        effect_samples_array[origin_index] = (number_of_timesteps - current_timestep + 1) / \
+                                             statistical_inefficiency_array[origin_index]
 
-        effect_samples_array[current_timestep] = (number_of_timesteps - current_timestep + 1) / \
-                                                 statistical_inefficiency_array[current_timestep]
+    maximum_index = effect_samples_array.argmax()
 
-    maximum_effective_samples = effect_samples_array.max()
-    equilibration_time = effect_samples_array.argmax()
-    statistical_inefficiency = statistical_inefficiency_array[equilibration_time]
+    maximum_effective_samples = effect_samples_array[maximum_index]
+    equilibration_time = origins[maximum_index]
+    statistical_inefficiency = statistical_inefficiency_array[maximum_index]
 
     return equilibration_time, statistical_inefficiency, maximum_effective_samples
 
 
-def decorrelate_time_series(time_series):
+def decorrelate_time_series(time_series, nskip=1, geometric_origins=False):
     """Extracts an uncorrelated sub-time series from a possibly correlated one.
 
     Parameters
     ----------
     time_series : np.ndarray, shape=(num_frames, num_dimensions), dtype=float
         The possibly correlated time series.
+    nskip: int
+        The spacing between the time origins which are considered when
+        detecting equilibration.
+    geometric_origins: bool
+        If true, the time origins considered when detecting equilibration
+        will be placed on a geometric grid. See `detect_equilibration`.
 
     Returns
     -------
@@ -192,7 +358,9 @@ def decorrelate_time_series(time_series):
     """
 
     # Compute the indices of the uncorrelated time series
-    [equilibration_index, inefficiency, effective_samples] = detect_equilibration(time_series)
+    [equilibration_index, inefficiency, effective_samples] = detect_equilibration(time_series,
+                                                                                  nskip=nskip,
+                                                                                  geometric_origins=geometric_origins)
     equilibrated_data = time_series[equilibration_index:]
 
     # Extract a set of uncorrelated data points.
@@ -202,6 +370,23 @@ def decorrelate_time_series(time_series):
     return uncorrelated_time_series, equilibration_index, inefficiency
 
 
+def get_uncorrelated_stride(statistical_inefficiency):
+    """Returns the stride with which the uncorrelated frames should be
+    taken from a time series.
+
+        Parameters
+        ----------
+        statistical_inefficiency: float
+            The statistical inefficiency of the time series.
+
+        Returns
+        -------
+        int
+            The stride between uncorrelated frames.
+        """
+    return max(1, int(math.ceil(statistical_inefficiency)))
+
+
 def get_uncorrelated_indices(time_series_length, statistical_inefficiency):
     """Returns the indices of the uncorrelated frames of a time series.
 
@@ -219,5 +404,344 @@ def get_uncorrelated_indices(time_series_length, statistical_inefficiency):
         """
 
     # Extract a set of uncorrelated data points.
-    stride = int(math.ceil(statistical_inefficiency))
+    stride = get_uncorrelated_stride(statistical_inefficiency)
     return [index for index in range(0, time_series_length, stride)]
+
+
+class BlockAveragingAccumulator:
+    """Incrementally accumulates a (possibly multidimensional) time series,
+    so that its statistical inefficiency, equilibration time and number of
+    effective samples may be estimated while the series is still being
+    generated, without needing to store the full series.
+
+    Notes
+    -----
+    The series is stored as a fixed number of block averages. Each time the
+    maximum number of blocks is reached, neighbouring blocks are merged and
+    the block size is doubled, so that the memory required is independent of
+    the length of the series.
+
+    The statistical inefficiency of the full series is estimated from that
+    of the block averages as g = g_block * block_size * var(block) / var(frame),
+    and equilibration is detected from the series of block averages, such that
+    the equilibration time can only be resolved to within one block.
+
+    Examples
+    --------
+    >>> accumulator = BlockAveragingAccumulator()
+    >>> for chunk in np.array_split(np.random.rand(10000), 10):
+    ...     accumulator.add_samples(chunk)
+    ...     equilibration_index, inefficiency, effective_samples = accumulator.detect_equilibration()
+    """
+
+    @property
+    def number_of_samples(self):
+        """int: The total number of samples which have been accumulated."""
+        return self._number_of_samples
+
+    @property
+    def block_size(self):
+        """int: The current number of samples averaged over in each block."""
+        return self._block_size
+
+    @property
+    def block_averages(self):
+        """np.ndarray: The averages of each of the currently complete blocks."""
+        if self._block_means is None:
+            return None
+
+        return self._block_means[:self._number_of_blocks]
+
+    @property
+    def mean(self):
+        """np.ndarray: The mean of each dimension of the accumulated samples."""
+        mean, _ = self._get_mean_and_deviation()
+        return mean
+
+    @property
+    def variance(self):
+        """np.ndarray: The (population) variance of each dimension of the accumulated samples."""
+        _, deviation = self._get_mean_and_deviation()
+        return None if deviation is None else deviation / self._number_of_samples
+
+    def __init__(self, maximum_blocks=256, minimum_samples=3):
+        """Constructs a new BlockAveragingAccumulator object.
+
+        Parameters
+        ----------
+        maximum_blocks: int
+            The maximum number of blocks to store. This must be an even number.
+        minimum_samples: int
+            The minimum number of data points to consider when calculating
+            the statistical inefficiency of the block averages.
+        """
+
+        if maximum_blocks < 4 or maximum_blocks % 2 != 0:
+            raise ValueError('The maximum number of blocks must be an even number greater than two.')
+
+        self._maximum_blocks = maximum_blocks
+        self._minimum_samples = minimum_samples
+
+        self._number_of_samples = 0
+
+        self._block_size = 1
+        self._number_of_blocks = 0
+
+        # The mean, and sum of squared deviations from the mean, of each
+        # dimension of each complete block.
+        self._block_means = None
+        self._block_deviations = None
+
+        # The number of samples in, and the running mean and sum of squared
+        # deviations from the mean of, the current (incomplete) block.
+        self._partial_count = 0
+        self._partial_mean = None
+        self._partial_deviation = 0.0
+
+    def add_samples(self, values):
+        """Adds a chunk of consecutive samples to the accumulated series.
+
+        Parameters
+        ----------
+        values: np.ndarray, shape=(num_frames, num_dimensions), dtype=float
+            The samples to add.
+        """
+
+        values = np.asarray(values, dtype=np.float64)
+
+        if values.ndim == 1:
+            values = values.reshape(-1, 1)
+
+        if self._block_means is None:
+
+            self._block_means = np.zeros((self._maximum_blocks, values.shape[1]))
+            self._block_deviations = np.zeros((self._maximum_blocks, values.shape[1]))
+
+        if values.shape[1] != self._block_means.shape[1]:
+            raise ValueError('The dimensions of the samples do not match those already accumulated.')
+
+        self._number_of_samples += len(values)
+
+        start_index = 0
+
+        while start_index < len(values):
+
+            remaining_samples = len(values) - start_index
+
+            if self._partial_count > 0 or remaining_samples < self._block_size:
+
+                # Fold the samples into the running statistics of the incomplete block.
+                number_of_samples = min(self._block_size - self._partial_count, remaining_samples)
+                end_index = start_index + number_of_samples
+
+                self._add_to_partial_block(values[start_index:end_index])
+                start_index = end_index
+
+                if self._partial_count < self._block_size:
+                    continue
+
+                self._append_blocks(self._partial_mean[np.newaxis, :], self._partial_deviation[np.newaxis, :])
+
+                self._partial_count = 0
+                self._partial_mean = None
+                self._partial_deviation = 0.0
+
+                continue
+
+            available_blocks = self._maximum_blocks - self._number_of_blocks
+            number_of_blocks = min(available_blocks, remaining_samples // self._block_size)
+
+            end_index = start_index + number_of_blocks * self._block_size
+            blocks = values[start_index:end_index].reshape(number_of_blocks, self._block_size, -1)
+
+            block_means = blocks.mean(axis=1)
+            block_deviations = ((blocks - block_means[:, np.newaxis, :]) ** 2).sum(axis=1)
+
+            self._append_blocks(block_means, block_deviations)
+            start_index = end_index
+
+    def _add_to_partial_block(self, values):
+        """Combines the statistics of a set of samples with those of the
+        current incomplete block, using the pairwise update of Chan et al.
+
+        Parameters
+        ----------
+        values: np.ndarray, shape=(num_frames, num_dimensions), dtype=float
+            The samples to add, which must not complete more than one block.
+        """
+
+        values_mean = values.mean(axis=0)
+        values_deviation = ((values - values_mean) ** 2).sum(axis=0)
+
+        if self._partial_count == 0:
+
+            self._partial_count = len(values)
+            self._partial_mean = values_mean
+            self._partial_deviation = values_deviation
+
+            return
+
+        total_count = self._partial_count + len(values)
+        mean_difference = values_mean - self._partial_mean
+
+        self._partial_deviation = self._partial_deviation + (values_deviation + mean_difference ** 2 *
+                                                             self._partial_count * len(values) / total_count)
+        self._partial_mean = self._partial_mean + mean_difference * len(values) / total_count
+
+        self._partial_count = total_count
+
+    def _append_blocks(self, block_means, block_deviations):
+        """Appends a set of complete blocks, merging the stored blocks
+        whenever the maximum number is reached.
+
+        Parameters
+        ----------
+        block_means: np.ndarray, shape=(num_blocks, num_dimensions)
+            The mean of each block.
+        block_deviations: np.ndarray, shape=(num_blocks, num_dimensions)
+            The sum of squared deviations from the mean of each block.
+        """
+
+        number_of_blocks = len(block_means)
+
+        self._block_means[self._number_of_blocks:self._number_of_blocks + number_of_blocks] = block_means
+        self._block_deviations[self._number_of_blocks:self._number_of_blocks + number_of_blocks] = block_deviations
+
+        self._number_of_blocks += number_of_blocks
+
+        if self._number_of_blocks == self._maximum_blocks:
+            self._merge_blocks()
+
+    def _merge_blocks(self):
+        """Merges each pair of neighbouring blocks, doubling the block size."""
+
+        left_means = self._block_means[0::2]
+        right_means = self._block_means[1::2]
+
+        mean_differences = (left_means - right_means) ** 2
+
+        half_blocks = self._maximum_blocks // 2
+
+        self._block_deviations[:half_blocks] = (self._block_deviations[0::2] +
+                                                self._block_deviations[1::2] +
+                                                mean_differences * self._block_size / 2.0)
+        self._block_means[:half_blocks] = (left_means + right_means) / 2.0
+
+        self._block_means[half_blocks:] = 0.0
+        self._block_deviations[half_blocks:] = 0.0
+
+        self._number_of_blocks = half_blocks
+        self._block_size *= 2
+
+    def _get_mean_and_deviation(self):
+        """Combines the statistics of the complete blocks and of the
+        incomplete block into those of all of the accumulated samples.
+
+        Returns
+        -------
+        np.ndarray, shape=(num_dimensions,), optional
+            The mean of each dimension, or None if no samples have been added.
+        np.ndarray, shape=(num_dimensions,), optional
+            The sum of squared deviations from the mean of each dimension,
+            or None if no samples have been added.
+        """
+
+        if self._number_of_samples == 0:
+            return None, None
+
+        number_of_samples = self._number_of_blocks * self._block_size
+
+        mean = np.zeros(self._block_means.shape[1])
+        deviation = np.zeros(self._block_means.shape[1])
+
+        if self._number_of_blocks > 0:
+
+            block_means = self._block_means[:self._number_of_blocks]
+
+            mean = block_means.mean(axis=0)
+            deviation = (self._block_deviations[:self._number_of_blocks].sum(axis=0) +
+                         ((block_means - mean) ** 2).sum(axis=0) * self._block_size)
+
+        if self._partial_count == 0:
+            return mean, deviation
+
+        total_count = number_of_samples + self._partial_count
+        mean_difference = self._partial_mean - mean
+
+        deviation = deviation + self._partial_deviation + (mean_difference ** 2 * number_of_samples *
+                                                           self._partial_count / total_count)
+        mean = mean + mean_difference * self._partial_count / total_count
+
+        return mean, deviation
+
+    def _calculate_statistical_inefficiency(self, start_block):
+        """Estimates the statistical inefficiency of the accumulated
+        series, starting from a given block.
+
+        Parameters
+        ----------
+        start_block: int
+            The index of the first block to include.
+
+        Returns
+        -------
+        float
+            The statistical inefficiency.
+        """
+
+        block_means = self._block_means[start_block:self._number_of_blocks]
+        block_deviations = self._block_deviations[start_block:self._number_of_blocks]
+
+        number_of_blocks = len(block_means)
+
+        if number_of_blocks < 2:
+            return 1.0
+
+        overall_mean = block_means.mean(axis=0)
+        block_variance = ((block_means - overall_mean) ** 2).sum(axis=1).mean()
+
+        sample_variance = (block_deviations.sum() / (number_of_blocks * self._block_size)) + block_variance
+
+        if sample_variance == 0.0 or block_variance == 0.0:
+            return 1.0
+
+        try:
+            block_inefficiency = calculate_statistical_inefficiency(block_means, self._minimum_samples)
+        except ParameterError:
+            block_inefficiency = 1.0
+
+        statistical_inefficiency = block_inefficiency * self._block_size * block_variance / sample_variance
+        return max(1.0, statistical_inefficiency)
+
+    def detect_equilibration(self):
+        """Estimates the equilibration time, statistical inefficiency and
+        number of effective samples of the series accumulated so far.
+
+        Returns
+        -------
+        int:
+            The index of the sample at which the data has reached equilibrium.
+        float:
+            The statistical inefficiency of the equilibrated data.
+        float:
+            The effective number of uncorrelated samples.
+        """
+
+        if self._number_of_blocks == 0:
+            return 0, 1.0, float(self._number_of_samples)
+
+        block_means = self._block_means[:self._number_of_blocks]
+
+        start_block = 0
+
+        if self._number_of_blocks > 2:
+            start_block, _, _ = detect_equilibration(block_means, self._minimum_samples)
+
+        start_block = int(start_block)
+
+        statistical_inefficiency = self._calculate_statistical_inefficiency(start_block)
+
+        equilibration_index = start_block * self._block_size
+        effective_samples = (self._number_of_samples - equilibration_index) / statistical_inefficiency
+
+        return equilibration_index, statistical_inefficiency, effective_samples
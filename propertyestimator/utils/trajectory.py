@@ -0,0 +1,388 @@
+"""
+A collection of utilities for lazily reading (possibly virtual) trajectories.
+"""
+import json
+from os import path
+
+from propertyestimator.utils.serialization import TypedJSONEncoder, TypedJSONDecoder
+
+
+class TrajectorySegment:
+    """A (optionally strided) range of frames which are stored in
+    a DCD trajectory file.
+    """
+
+    @property
+    def trajectory_path(self):
+        """str: The path to the DCD file which contains the frames."""
+        return self._trajectory_path
+
+    @property
+    def start_frame(self):
+        """int: The index of the first frame in the segment."""
+        return self._start_frame
+
+    @property
+    def end_frame(self):
+        """int, optional: The index of the frame at which the segment ends (exclusive).
+        If `None`, the segment extends to the end of the file."""
+        return self._end_frame
+
+    @property
+    def stride(self):
+        """int: Only every `stride`-th frame between `start_frame` and
+        `end_frame` is included in the segment."""
+        return self._stride
+
+    def __init__(self, trajectory_path=None, start_frame=0, end_frame=None, stride=1):
+        """Constructs a new TrajectorySegment object.
+
+        Parameters
+        ----------
+        trajectory_path: str
+            The path to the DCD file which contains the frames.
+        start_frame: int
+            The index of the first frame in the segment.
+        end_frame: int, optional
+            The index of the frame at which the segment ends (exclusive).
+        stride: int
+            Only every `stride`-th frame will be included in the segment.
+        """
+
+        if start_frame < 0 or (end_frame is not None and end_frame < start_frame):
+            raise ValueError('The frame range of a trajectory segment is invalid.')
+
+        if stride < 1:
+            raise ValueError('The stride of a trajectory segment must be at least one.')
+
+        self._trajectory_path = trajectory_path
+
+        self._start_frame = start_frame
+        self._end_frame = end_frame
+
+        self._stride = stride
+
+    def get_frame_indices(self):
+        """Returns the indices of the frames in the underlying DCD
+        file which make up this segment.
+
+        Returns
+        -------
+        range
+            The frame indices.
+        """
+        from mdtraj.formats import DCDTrajectoryFile
+
+        # Only the header of the file needs to be read to find its length.
+        with DCDTrajectoryFile(self._trajectory_path) as dcd_file:
+            number_of_frames = len(dcd_file)
+
+        end_frame = number_of_frames if self._end_frame is None else min(self._end_frame, number_of_frames)
+        return range(self._start_frame, end_frame, self._stride)
+
+    def __getstate__(self):
+
+        return {
+            'trajectory_path': self._trajectory_path,
+
+            'start_frame': self._start_frame,
+            'end_frame': self._end_frame,
+
+            'stride': self._stride
+        }
+
+    def __setstate__(self, state):
+
+        self._trajectory_path = state['trajectory_path']
+
+        self._start_frame = state['start_frame']
+        self._end_frame = state['end_frame']
+
+        self._stride = state['stride']
+
+
+class VirtualTrajectory:
+    """A trajectory which is composed of segments of frames taken
+    from one or more DCD files.
+
+    Notes
+    -----
+    A virtual trajectory is stored as a light weight JSON index of its segments,
+    rather than as a copy of the frames themselves. The frames are only read
+    from the underlying DCD files, a chunk at a time, when the trajectory is
+    iterated over.
+    """
+
+    @property
+    def segments(self):
+        """list of TrajectorySegment: The segments which make up the trajectory."""
+        return self._segments
+
+    @property
+    def source_paths(self):
+        """list of str: The unique paths to the DCD files which the frames of
+        this trajectory are drawn from."""
+        source_paths = []
+
+        for segment in self._segments:
+
+            if segment.trajectory_path in source_paths:
+                continue
+
+            source_paths.append(segment.trajectory_path)
+
+        return source_paths
+
+    def __init__(self, segments=None):
+        """Constructs a new VirtualTrajectory object.
+
+        Parameters
+        ----------
+        segments: list of TrajectorySegment, optional
+            The segments which make up the trajectory.
+        """
+
+        self._segments = [] if segments is None else list(segments)
+
+    @staticmethod
+    def is_virtual_trajectory_file(file_path):
+        """Returns whether a file path points to a virtual trajectory
+        index, rather than to a DCD file.
+
+        Parameters
+        ----------
+        file_path: str
+            The file path to check.
+
+        Returns
+        -------
+        bool
+            True if the path points to a virtual trajectory index.
+        """
+        return path.splitext(file_path)[1].lower() == '.json'
+
+    @classmethod
+    def from_file(cls, file_path):
+        """Creates a virtual trajectory from either a virtual trajectory
+        index file, or from a DCD file, in which case the trajectory will
+        contain all of the frames in that file.
+
+        Parameters
+        ----------
+        file_path: str
+            The path to the index or DCD file.
+
+        Returns
+        -------
+        VirtualTrajectory
+            The loaded trajectory.
+        """
+
+        if not cls.is_virtual_trajectory_file(file_path):
+            return cls([TrajectorySegment(file_path)])
+
+        with open(file_path, 'r') as file:
+            return json.load(file, cls=TypedJSONDecoder)
+
+    def to_file(self, file_path):
+        """Saves the index of this trajectory to a JSON file.
+
+        Parameters
+        ----------
+        file_path: str
+            The path to save the index to. This should have a `.json` extension.
+        """
+
+        if not self.is_virtual_trajectory_file(file_path):
+            raise ValueError('Virtual trajectories must be saved to files with a .json extension.')
+
+        with open(file_path, 'w') as file:
+            json.dump(self, file, cls=TypedJSONEncoder)
+
+    def get_number_of_frames(self):
+        """Returns the total number of frames in the trajectory.
+
+        Returns
+        -------
+        int
+            The number of frames.
+        """
+        return sum([len(segment.get_frame_indices()) for segment in self._segments])
+
+    def subsample(self, start_frame, stride):
+        """Creates a new virtual trajectory which contains only every
+        `stride`-th frame of this trajectory, beginning at `start_frame`.
+
+        Parameters
+        ----------
+        start_frame: int
+            The index of the first frame of this trajectory to include.
+        stride: int
+            The number of frames between each included frame.
+
+        Returns
+        -------
+        VirtualTrajectory
+            The subsampled trajectory.
+        """
+
+        if start_frame < 0 or stride < 1:
+            raise ValueError('The start frame must be positive, and the stride at least one.')
+
+        subsampled_segments = []
+        segment_offset = 0
+
+        for segment in self._segments:
+
+            frame_indices = segment.get_frame_indices()
+
+            # Find the first frame of this segment which lies on the stride.
+            first_index = start_frame - segment_offset
+
+            if first_index < 0:
+                first_index %= stride
+
+            segment_offset += len(frame_indices)
+            subsampled_indices = frame_indices[first_index::stride]
+
+            if len(subsampled_indices) == 0:
+                continue
+
+            subsampled_segments.append(TrajectorySegment(segment.trajectory_path,
+                                                         subsampled_indices.start,
+                                                         subsampled_indices.stop,
+                                                         subsampled_indices.step))
+
+        return VirtualTrajectory(subsampled_segments)
+
+    def iterate(self, topology_path, chunk_size=1000):
+        """Lazily iterates over the frames of the trajectory.
+
+        Parameters
+        ----------
+        topology_path: str
+            The path to a coordinate file (e.g. a PDB file) which
+            contains the topology of the trajectory.
+        chunk_size: int
+            The maximum number of frames to hold in memory at any one time.
+
+        Yields
+        ------
+        mdtraj.Trajectory
+            Consecutive chunks of the trajectory.
+        """
+        import mdtraj
+        from mdtraj.formats import DCDTrajectoryFile
+
+        topology = mdtraj.load_topology(topology_path)
+
+        for segment in self._segments:
+
+            frame_indices = segment.get_frame_indices()
+
+            with DCDTrajectoryFile(segment.trajectory_path) as dcd_file:
+
+                for chunk_start in range(0, len(frame_indices), chunk_size):
+
+                    chunk_indices = frame_indices[chunk_start:chunk_start + chunk_size]
+
+                    # The frames of a DCD file all have the same size, so we can seek
+                    # straight to the first needed frame without reading those before it.
+                    dcd_file.seek(chunk_indices[0])
+
+                    yield dcd_file.read_as_traj(topology, n_frames=len(chunk_indices), stride=segment.stride)
+
+    def load(self, topology_path):
+        """Loads all of the frames of the trajectory into memory.
+
+        Parameters
+        ----------
+        topology_path: str
+            The path to a coordinate file (e.g. a PDB file) which
+            contains the topology of the trajectory.
+
+        Returns
+        -------
+        mdtraj.Trajectory
+            The loaded trajectory.
+        """
+        import mdtraj
+
+        trajectory_chunks = list(self.iterate(topology_path))
+
+        if len(trajectory_chunks) == 0:
+            raise ValueError('The virtual trajectory does not contain any frames.')
+
+        if len(trajectory_chunks) == 1:
+            return trajectory_chunks[0]
+
+        return mdtraj.join(trajectory_chunks, check_topology=False, discard_overlapping_frames=False)
+
+    def save_as_dcd(self, topology_path, file_path):
+        """Writes the frames of this trajectory out to a new DCD file, for
+        example so that they may be stored independently of the files the
+        frames were originally drawn from.
+
+        Parameters
+        ----------
+        topology_path: str
+            The path to a coordinate file (e.g. a PDB file) which
+            contains the topology of the trajectory.
+        file_path: str
+            The path to save the DCD file to.
+        """
+        from mdtraj.formats import DCDTrajectoryFile
+
+        with DCDTrajectoryFile(file_path, 'w') as dcd_file:
+
+            for trajectory_chunk in self.iterate(topology_path):
+
+                # DCD files are stored in units of angstrom, while mdtraj uses nm.
+                dcd_file.write(trajectory_chunk.xyz * 10.0,
+                               cell_lengths=trajectory_chunk.unitcell_lengths * 10.0,
+                               cell_angles=trajectory_chunk.unitcell_angles)
+
+    def __getstate__(self):
+        return {'segments': self._segments}
+
+    def __setstate__(self, state):
+        self._segments = state['segments']
+
+
+def load_trajectory(trajectory_path, topology_path):
+    """Loads either a virtual trajectory or a DCD file into memory.
+
+    Parameters
+    ----------
+    trajectory_path: str
+        The path to the virtual trajectory index, or DCD file, to load.
+    topology_path: str
+        The path to a coordinate file which contains the topology of the trajectory.
+
+    Returns
+    -------
+    mdtraj.Trajectory
+        The loaded trajectory.
+    """
+    return VirtualTrajectory.from_file(trajectory_path).load(topology_path)
+
+
+def iterate_trajectory(trajectory_path, topology_path, chunk_size=1000):
+    """Lazily iterates over the frames of either a virtual
+    trajectory or a DCD file.
+
+    Parameters
+    ----------
+    trajectory_path: str
+        The path to the virtual trajectory index, or DCD file, to iterate over.
+    topology_path: str
+        The path to a coordinate file which contains the topology of the trajectory.
+    chunk_size: int
+        The maximum number of frames to hold in memory at any one time.
+
+    Yields
+    ------
+    mdtraj.Trajectory
+        Consecutive chunks of the trajectory.
+    """
+    yield from VirtualTrajectory.from_file(trajectory_path).iterate(topology_path, chunk_size)
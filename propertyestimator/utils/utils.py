@@ -3,6 +3,7 @@ A collection of general utilities.
 """
 import abc
 import copy
+import hashlib
 import logging
 import os
 import sys
@@ -68,6 +69,38 @@ def get_data_filename(relative_path):
     return fn
 
 
+def get_cache_key(file_paths, *values):
+    """Computes a key which uniquely identifies the contents of a set of
+    files, and the string representation of a set of additional values,
+    for use when caching quantities derived from them.
+
+    Parameters
+    ----------
+    file_paths: list of str
+        The paths to the files whose contents should be hashed.
+    values: Any
+        Any additional values which the cached quantity depends upon.
+
+    Returns
+    -------
+    str
+        The sha256 hex digest of the files and values.
+    """
+    hash_object = hashlib.sha256()
+
+    for file_path in file_paths:
+
+        with open(file_path, 'rb') as file:
+
+            for chunk in iter(lambda: file.read(1 << 20), b''):
+                hash_object.update(chunk)
+
+    for value in values:
+        hash_object.update(str(value).encode('utf-8'))
+
+    return hash_object.hexdigest()
+
+
 _cached_molecules = {}
 
 
@@ -7,8 +7,11 @@ import copy
 import json
 import logging
 import pickle
+import shutil
 import sys
-from os import path
+import threading
+import uuid
+from os import path, makedirs, stat
 
 import numpy as np
 import pymbar
@@ -23,7 +26,8 @@ from propertyestimator.utils.openmm import setup_platform_with_resources
 from propertyestimator.utils.quantities import EstimatedQuantity
 from propertyestimator.utils.serialization import deserialize_quantity, deserialize_force_field, TypedJSONDecoder
 from propertyestimator.utils.statistics import StatisticsArray, bootstrap
-from propertyestimator.utils.utils import get_nested_attribute, set_nested_attribute
+from propertyestimator.utils.trajectory import VirtualTrajectory, load_trajectory, iterate_trajectory
+from propertyestimator.utils.utils import get_nested_attribute, set_nested_attribute, get_cache_key
 from propertyestimator.workflow.decorators import protocol_input, protocol_output, MergeBehaviour
 from propertyestimator.workflow.plugins import register_calculation_protocol
 from propertyestimator.workflow.schemas import ProtocolSchema
@@ -670,6 +674,13 @@ class BuildSmirnoffSystem(BaseProtocol):
         """The cutoff after which non-bonded interactions are truncated."""
         pass
 
+    @protocol_input(str)
+    def cache_directory(self):
+        """An optional directory in which to cache the assigned system. If a system
+        has previously been assigned from identical inputs, it will be reused
+        rather than being regenerated. If empty, the system will not be cached."""
+        pass
+
     @protocol_output(str)
     def system_path(self):
         """The assigned system."""
@@ -686,11 +697,32 @@ class BuildSmirnoffSystem(BaseProtocol):
 
         self._nonbonded_cutoff = 1.0 * unit.nanometer
 
+        self._cache_directory = ''
+
         # outputs
         self._system_path = None
 
     def execute(self, directory, available_resources):
 
+        self._system_path = path.join(directory, 'system.xml')
+
+        cached_system_path = None
+
+        if self._cache_directory:
+
+            cache_key = get_cache_key([self._force_field_path, self._coordinate_file_path],
+                                      self._substance.identifier,
+                                      self._nonbonded_cutoff.value_in_unit(unit.nanometer))
+
+            cached_system_path = path.join(self._cache_directory, 'system_{}.xml'.format(cache_key))
+
+            if path.isfile(cached_system_path):
+
+                logging.info('Using cached topology: ' + self.id)
+
+                shutil.copyfile(cached_system_path, self._system_path)
+                return self._get_output_dictionary()
+
         logging.info('Generating topology: ' + self.id)
 
         pdb_file = app.PDBFile(self._coordinate_file_path)
@@ -743,11 +775,19 @@ class BuildSmirnoffSystem(BaseProtocol):
         from simtk.openmm import XmlSerializer
         system_xml = XmlSerializer.serialize(system)
 
-        self._system_path = path.join(directory, 'system.xml')
-
         with open(self._system_path, 'wb') as file:
             file.write(system_xml.encode('utf-8'))
 
+        if cached_system_path is not None:
+
+            makedirs(self._cache_directory, exist_ok=True)
+
+            # Copy via a temporary file so that concurrent readers never see a partial file.
+            temporary_path = '{}.{}.tmp'.format(cached_system_path, uuid.uuid4().hex)
+
+            shutil.copyfile(self._system_path, temporary_path)
+            shutil.move(temporary_path, cached_system_path)
+
         logging.info('Topology generated: ' + self.id)
 
         return self._get_output_dictionary()
@@ -954,11 +994,14 @@ class RunOpenMMSimulation(BaseProtocol):
             return PropertyEstimatorException(directory=directory,
                                               message='Simulation failed: {}'.format(e))
 
-        # Save the newly generated statistics data as a pandas csv file.
+        # Convert the newly generated statistics data into a binary numpy file. The
+        # reporter output is streamed in chunks so that long runs are never fully
+        # loaded into memory.
         pressure = None if self._ensemble == Ensemble.NVT else self._thermodynamic_state.pressure
 
-        working_statistics = statistics.StatisticsArray.from_openmm_csv(self._temporary_statistics_path, pressure)
-        working_statistics.save_as_pandas_csv(self._statistics_file_path)
+        statistics.StatisticsArray.convert_openmm_csv(self._temporary_statistics_path,
+                                                      self._statistics_file_path,
+                                                      pressure)
 
         positions = self._simulation_object.context.getState(getPositions=True).getPositions()
 
@@ -1034,7 +1077,7 @@ class RunOpenMMSimulation(BaseProtocol):
             simulation.context.setVelocitiesToTemperature(temperature)
 
         trajectory_path = path.join(directory, 'trajectory.dcd')
-        statistics_path = path.join(directory, 'statistics.csv')
+        statistics_path = path.join(directory, 'statistics.npy')
 
         self._temporary_statistics_path = path.join(directory, 'temp_statistics.csv')
 
@@ -1076,11 +1119,29 @@ class AveragePropertyProtocol(BaseProtocol):
         """The relative sample size to use for bootstrapping."""
         pass
 
+    @protocol_input(float)
+    def bootstrap_convergence_tolerance(self):
+        """If positive, bootstrapping will stop early (with `bootstrap_iterations` as the
+        maximum) once the relative change in the uncertainty falls below this tolerance.
+        The default of zero performs all `bootstrap_iterations` iterations."""
+        pass
+
+    @protocol_input(int)
+    def bootstrap_random_seed(self):
+        """The seed used to draw the bootstrap samples, so that the estimated
+        uncertainty is reproducible. If negative, the samples will differ between runs."""
+        pass
+
     @protocol_output(EstimatedQuantity)
     def value(self):
         """The averaged value."""
         pass
 
+    @protocol_output(int)
+    def bootstrap_iterations_performed(self):
+        """The number of bootstrap iterations which were actually performed."""
+        pass
+
     @protocol_output(int)
     def equilibration_index(self):
         """The index in the data set after which the data is stationary."""
@@ -1102,8 +1163,11 @@ class AveragePropertyProtocol(BaseProtocol):
 
         self._bootstrap_iterations = 250
         self._bootstrap_sample_size = 1.0
+        self._bootstrap_convergence_tolerance = 0.0
+        self._bootstrap_random_seed = -1
 
         self._value = None
+        self._bootstrap_iterations_performed = None
 
         self._equilibration_index = None
         self._statistical_inefficiency = None
@@ -1163,15 +1227,13 @@ class AverageTrajectoryProperty(AveragePropertyProtocol):
 
     def execute(self, directory, available_resources):
 
-        import mdtraj
-
         if self._trajectory_path is None:
 
             return PropertyEstimatorException(directory=directory,
                                               message='The AverageTrajectoryProperty protocol '
                                                        'requires a previously calculated trajectory')
 
-        self.trajectory = mdtraj.load_dcd(filename=self._trajectory_path, top=self._input_coordinate_file)
+        self.trajectory = load_trajectory(self._trajectory_path, self._input_coordinate_file)
 
         return self._get_output_dictionary()
 
@@ -1211,7 +1273,7 @@ class ExtractAverageStatistic(AveragePropertyProtocol):
                                               message='The ExtractAverageStatistic protocol '
                                                        'requires a previously calculated statistics file')
 
-        self._statistics = statistics.StatisticsArray.from_pandas_csv(self.statistics_path)
+        self._statistics = statistics.StatisticsArray.from_file(self.statistics_path)
 
         values = self._statistics.get_observable(self._statistics_type)
 
@@ -1221,18 +1283,20 @@ class ExtractAverageStatistic(AveragePropertyProtocol):
                                               message='The {} statistics file contains no '
                                                       'data.'.format(self._statistics_path))
 
-        statistics_unit = values[0].unit
-        values.value_in_unit(statistics_unit)
-
-        values = np.array(values)
+        statistics_unit = values.unit
+        values = values.value_in_unit(statistics_unit)
 
         values, self._equilibration_index, self._statistical_inefficiency = \
             timeseries.decorrelate_time_series(values)
 
-        final_value, final_uncertainty = bootstrap(self._bootstrap_function,
-                                                   self._bootstrap_iterations,
-                                                   self._bootstrap_sample_size,
-                                                   values=values)
+        final_value, final_uncertainty, self._bootstrap_iterations_performed = \
+            bootstrap(self._bootstrap_function,
+                      self._bootstrap_iterations,
+                      self._bootstrap_sample_size,
+                      convergence_tolerance=self._bootstrap_convergence_tolerance,
+                      random_seed=None if self._bootstrap_random_seed < 0 else self._bootstrap_random_seed,
+                      return_iterations=True,
+                      values=values)
 
         self._uncorrelated_values = values * statistics_unit
 
@@ -1281,6 +1345,11 @@ class ExtractUncorrelatedData(BaseProtocol):
 class ExtractUncorrelatedTrajectoryData(ExtractUncorrelatedData):
     """A protocol which will subsample frames from a trajectory, yielding only uncorrelated 
     frames as determined from a provided statistical inefficiency and equilibration time.
+
+    Notes
+    -----
+    The frames are not copied - rather, the subsampled trajectory is stored as a
+    `VirtualTrajectory` index of the uncorrelated frames of the input trajectory.
     """
 
     @protocol_input(str)
@@ -1295,7 +1364,7 @@ class ExtractUncorrelatedTrajectoryData(ExtractUncorrelatedData):
 
     @protocol_output(str)
     def output_trajectory_path(self):
-        """The file path to the subsampled trajectory."""
+        """The file path to the index of the subsampled (virtual) trajectory."""
         pass
 
     def __init__(self, protocol_id):
@@ -1309,8 +1378,6 @@ class ExtractUncorrelatedTrajectoryData(ExtractUncorrelatedData):
 
     def execute(self, directory, available_resources):
 
-        import mdtraj
-
         logging.info('Subsampling trajectory: {}'.format(self.id))
 
         if self._input_trajectory_path is None:
@@ -1319,16 +1386,16 @@ class ExtractUncorrelatedTrajectoryData(ExtractUncorrelatedData):
                                               message='The ExtractUncorrelatedTrajectoryData protocol '
                                                        'requires a previously calculated trajectory')
 
-        trajectory = mdtraj.load_dcd(filename=self._input_trajectory_path, top=self._input_coordinate_file)
-        trajectory = trajectory[self._equilibration_index:]
+        trajectory = VirtualTrajectory.from_file(self._input_trajectory_path)
 
-        uncorrelated_indices = timeseries.get_uncorrelated_indices(trajectory.n_frames, self._statistical_inefficiency)
-        uncorrelated_trajectory = trajectory[uncorrelated_indices]
+        uncorrelated_trajectory = trajectory.subsample(self._equilibration_index,
+                                                       timeseries.get_uncorrelated_stride(
+                                                           self._statistical_inefficiency))
 
-        self._output_trajectory_path = path.join(directory, 'uncorrelated_trajectory.dcd')
-        uncorrelated_trajectory.save_dcd(self._output_trajectory_path)
+        self._output_trajectory_path = path.join(directory, 'uncorrelated_trajectory.json')
+        uncorrelated_trajectory.to_file(self._output_trajectory_path)
 
-        self._number_of_uncorrelated_samples = len(trajectory)
+        self._number_of_uncorrelated_samples = uncorrelated_trajectory.get_number_of_frames()
 
         logging.info('Trajectory subsampled: {}'.format(self.id))
 
@@ -1368,7 +1435,7 @@ class ExtractUncorrelatedStatisticsData(ExtractUncorrelatedData):
                                               message='The ExtractUncorrelatedStatisticsData protocol '
                                                        'requires a previously calculated statisitics file')
 
-        statistics = StatisticsArray.from_pandas_csv(self._input_statistics_path)
+        statistics = StatisticsArray.from_file(self._input_statistics_path)
 
         uncorrelated_indices = timeseries.get_uncorrelated_indices(len(statistics) - self._equilibration_index,
                                                                    self._statistical_inefficiency)
@@ -1376,8 +1443,8 @@ class ExtractUncorrelatedStatisticsData(ExtractUncorrelatedData):
         uncorrelated_indices = [index + self._equilibration_index for index in uncorrelated_indices]
         uncorrelated_statistics = statistics.from_statistics_array(statistics, uncorrelated_indices)
 
-        self._output_statistics_path = path.join(directory, 'uncorrelated_statistics.csv')
-        uncorrelated_statistics.save_as_pandas_csv(self._output_statistics_path)
+        self._output_statistics_path = path.join(directory, 'uncorrelated_statistics.npy')
+        uncorrelated_statistics.save_as_numpy(self._output_statistics_path)
 
         logging.info('Statistics subsampled: {}'.format(self.id))
 
@@ -1478,6 +1545,13 @@ class UnpackStoredSimulationData(BaseProtocol):
         and the force field which was used to generate the stored data."""
         pass
 
+    @protocol_input(str)
+    def cache_root_directory(self):
+        """An optional directory, outside of the stored data, under which quantities
+        derived from the stored data may be cached. If empty, no `cache_directory`
+        will be provided."""
+        pass
+
     @protocol_output(Substance)
     def substance(self):
         """The substance which was stored."""
@@ -1514,11 +1588,20 @@ class UnpackStoredSimulationData(BaseProtocol):
         the stored data."""
         pass
 
+    @protocol_output(str)
+    def cache_directory(self):
+        """The directory under `cache_root_directory` in which quantities derived
+        from this piece of stored data (such as reference reduced potentials) may be
+        cached, or None if no `cache_root_directory` was provided. See
+        `get_cache_directory`."""
+        pass
+
     def __init__(self, protocol_id):
         """Constructs a new UnpackStoredSimulationData object."""
         super().__init__(protocol_id)
 
         self._simulation_data_path = None
+        self._cache_root_directory = ''
 
         self._substance = None
         self._thermodynamic_state = None
@@ -1531,6 +1614,36 @@ class UnpackStoredSimulationData(BaseProtocol):
         self._statistics_file_path = None
 
         self._force_field_path = None
+        self._cache_directory = None
+
+    @staticmethod
+    def get_cache_directory(cache_root_directory, data_directory, data_object, force_field_path):
+        """Returns the directory in which quantities derived from a piece of stored
+        data may be cached. The directory is unique to both the stored data, through
+        its unique id, and to the force field used to generate it, through the hash of
+        the force field file.
+
+        Parameters
+        ----------
+        cache_root_directory: str
+            The directory under which to cache the derived quantities.
+        data_directory: str
+            The path to the stored data directory.
+        data_object: StoredSimulationData
+            The object which describes the stored data.
+        force_field_path: str
+            The path to the force field used to generate the stored data.
+
+        Returns
+        -------
+        str
+            The path to the cache directory.
+        """
+
+        # The stored data itself is never modified, so that it may be
+        # retrieved from read-only or non-local storage backends.
+        cache_name = data_object.unique_id or path.basename(path.normpath(data_directory))
+        return path.join(cache_root_directory, cache_name, get_cache_key([force_field_path]))
 
     def execute(self, directory, available_resources):
 
@@ -1573,6 +1686,13 @@ class UnpackStoredSimulationData(BaseProtocol):
 
         self._force_field_path = force_field_path
 
+        self._cache_directory = None
+
+        if self._cache_root_directory:
+
+            self._cache_directory = self.get_cache_directory(self._cache_root_directory, data_directory,
+                                                             data_object, force_field_path)
+
         return self._get_output_dictionary()
 
 
@@ -1580,6 +1700,11 @@ class UnpackStoredSimulationData(BaseProtocol):
 class ConcatenateTrajectories(BaseProtocol):
     """A protocol which concatenates multiple trajectories into
     a single one.
+
+    Notes
+    -----
+    The trajectories are not copied - rather, the concatenated trajectory is
+    stored as a `VirtualTrajectory` index of the frames of the input trajectories.
     """
 
     @protocol_input(list)
@@ -1600,7 +1725,7 @@ class ConcatenateTrajectories(BaseProtocol):
 
     @protocol_output(str)
     def output_trajectory_path(self):
-        """The path to the concatenated trajectory."""
+        """The path to the index of the concatenated (virtual) trajectory."""
         pass
 
     def __init__(self, protocol_id):
@@ -1615,8 +1740,6 @@ class ConcatenateTrajectories(BaseProtocol):
 
     def execute(self, directory, available_resources):
 
-        import mdtraj
-
         if len(self._input_coordinate_paths) != len(self._input_trajectory_paths):
 
             return PropertyEstimatorException(directory=directory, message='There should be the same number of '
@@ -1627,18 +1750,16 @@ class ConcatenateTrajectories(BaseProtocol):
             return PropertyEstimatorException(directory=directory, message='No trajectories were '
                                                                            'given to concatenate.')
 
-        trajectories = []
+        segments = []
 
         for coordinate_path, trajectory_path in zip(self._input_coordinate_paths,
                                                     self._input_trajectory_paths):
 
             self._output_coordinate_path = self._output_coordinate_path or coordinate_path
-            trajectories.append(mdtraj.load_dcd(trajectory_path, coordinate_path))
-
-        output_trajectory = trajectories[0] if len(trajectories) == 1 else mdtraj.join(trajectories, True, False)
+            segments.extend(VirtualTrajectory.from_file(trajectory_path).segments)
 
-        self._output_trajectory_path = path.join(directory, 'output_trajectory.dcd')
-        output_trajectory.save_dcd(self._output_trajectory_path)
+        self._output_trajectory_path = path.join(directory, 'output_trajectory.json')
+        VirtualTrajectory(segments).to_file(self._output_trajectory_path)
 
         return self._get_output_dictionary()
 
@@ -1649,12 +1770,23 @@ class CalculateReducedPotentialOpenMM(BaseProtocol):
     set of configurations.
     """
 
+    # Idle context caches, keyed by the resources they were created with, which
+    # may be checked out by any execution in this process. Only a bounded number
+    # are kept idle, so that unused contexts (which may be allocated on a GPU)
+    # are not kept alive indefinitely.
+    _idle_context_caches = {}
+    _idle_context_caches_lock = threading.Lock()
+
+    _maximum_idle_context_caches = 1
+
     @protocol_input(ThermodynamicState)
     def thermodynamic_state(self):
         pass
 
     @protocol_input(str)
     def system_path(self):
+        """The path to the serialized system to evaluate the reduced potentials using.
+        The system is only loaded if the reduced potentials have not been cached."""
         pass
 
     @protocol_input(str)
@@ -1663,10 +1795,44 @@ class CalculateReducedPotentialOpenMM(BaseProtocol):
 
     @protocol_input(str)
     def trajectory_file_path(self):
+        """The path to the trajectory (either a DCD file or a
+        `VirtualTrajectory` index) to evaluate."""
+        pass
+
+    @protocol_input(list)
+    def additional_system_paths(self):
+        """An optional list of paths to additional serialized systems (e.g. those
+        parameterised with a set of candidate force fields). The reduced potentials
+        of each frame are evaluated against `system_path` and each of these systems
+        in a single pass over the trajectory."""
+        pass
+
+    @protocol_input(str)
+    def cache_directory(self):
+        """An optional directory in which to cache the calculated reduced potentials,
+        which must be unique to the systems being evaluated (such as the directory
+        provided by `UnpackStoredSimulationData`). The reduced potentials of every
+        frame of each DCD file which the trajectory draws frames from are cached
+        (see `get_cached_potentials_path`), so that they may be reused regardless
+        of which of the frames are requested. If empty, nothing will be cached."""
+        pass
+
+    @protocol_input(int)
+    def trajectory_chunk_size(self):
+        """The number of trajectory frames to load into memory at any one time."""
         pass
 
     @protocol_output(np.ndarray)
     def reduced_potentials(self):
+        """The reduced potentials of each frame evaluated using
+        the system at `system_path`."""
+        pass
+
+    @protocol_output(np.ndarray)
+    def reduced_potentials_matrix(self):
+        """The reduced potentials of each frame evaluated using each of the
+        systems, with shape=(1 + len(additional_system_paths), num_frames). The
+        first row corresponds to the system at `system_path`."""
         pass
 
     def __init__(self, protocol_id):
@@ -1681,48 +1847,329 @@ class CalculateReducedPotentialOpenMM(BaseProtocol):
         self._coordinate_file_path = None
         self._trajectory_file_path = None
 
+        self._additional_system_paths = []
+
+        self._cache_directory = ''
+
+        self._trajectory_chunk_size = 1000
+
         self._reduced_potentials = None
+        self._reduced_potentials_matrix = None
 
-    def execute(self, directory, available_resources):
+    @staticmethod
+    def _get_context_cache_key(available_resources):
+        """Returns the key of the resources which a context cache was created with.
+
+        Parameters
+        ----------
+        available_resources: ComputeResources
+            The resources which the contexts should be created with.
 
+        Returns
+        -------
+        tuple
+            The key.
+        """
+        return (available_resources.number_of_threads,
+                available_resources.number_of_gpus,
+                available_resources.preferred_gpu_toolkit,
+                available_resources.gpu_device_indices)
+
+    @staticmethod
+    def _checkout_context_cache(available_resources, capacity):
+        """Checks out a context cache for the exclusive use of a single execution,
+        reusing an idle one created with the same resources where possible. The
+        cache should be returned with `_return_context_cache` once finished with.
+
+        Parameters
+        ----------
+        available_resources: ComputeResources
+            The resources which the contexts should be created with.
+        capacity: int
+            The number of contexts which the cache should hold, i.e. one
+            per system which will be evaluated.
+
+        Returns
+        -------
+        openmmtools.cache.ContextCache
+            The context cache.
+        """
         import openmmtools
-        import mdtraj
 
-        from simtk.openmm import XmlSerializer
+        cache_key = CalculateReducedPotentialOpenMM._get_context_cache_key(available_resources)
 
-        with open(self._system_path, 'rb') as file:
-            self._system = XmlSerializer.deserialize(file.read().decode())
+        with CalculateReducedPotentialOpenMM._idle_context_caches_lock:
 
-        trajectory = mdtraj.load_dcd(self._trajectory_file_path, self._coordinate_file_path)
-        self._system.setDefaultPeriodicBoxVectors(*trajectory.openmm_boxes(0))
+            idle_caches = CalculateReducedPotentialOpenMM._idle_context_caches.get(cache_key, [])
 
-        openmm_state = openmmtools.states.ThermodynamicState(system=self._system,
-                                                             temperature=self._thermodynamic_state.temperature,
-                                                             pressure=self._thermodynamic_state.pressure)
+            if len(idle_caches) > 0:
+
+                context_cache = idle_caches.pop()
+                context_cache.capacity = capacity
 
-        integrator = openmmtools.integrators.VelocityVerletIntegrator(0.01*unit.femtoseconds)
+                return context_cache
 
-        # Setup the requested platform:
         platform = setup_platform_with_resources(available_resources)
+        return openmmtools.cache.ContextCache(platform, capacity=capacity)
+
+    @staticmethod
+    def _return_context_cache(available_resources, context_cache):
+        """Returns a context cache checked out by `_checkout_context_cache`
+        so that it may be reused by later executions. If the maximum number
+        of idle caches has been reached, the cache and its contexts are
+        discarded instead.
+
+        Parameters
+        ----------
+        available_resources: ComputeResources
+            The resources which the contexts were created with.
+        context_cache: openmmtools.cache.ContextCache
+            The cache to return.
+        """
+
+        cache_key = CalculateReducedPotentialOpenMM._get_context_cache_key(available_resources)
+
+        with CalculateReducedPotentialOpenMM._idle_context_caches_lock:
+
+            idle_caches = CalculateReducedPotentialOpenMM._idle_context_caches.setdefault(cache_key, [])
+
+            if len(idle_caches) < CalculateReducedPotentialOpenMM._maximum_idle_context_caches:
+                idle_caches.append(context_cache)
+                return
+
+        context_cache.empty()
+
+    @staticmethod
+    def get_cached_potentials_path(cache_directory, thermodynamic_state, number_of_systems, trajectory_path):
+        """Returns the path to the file in which the reduced potentials of every frame
+        of a DCD file are cached.
+
+        Notes
+        -----
+        The DCD file is identified by its path, size and modification time, rather than
+        by hashing its contents, so that the cache may be cheaply checked for before any
+        protocols are executed. The systems are identified only by the `cache_directory`.
+
+        Parameters
+        ----------
+        cache_directory: str
+            The directory in which the reduced potentials are cached.
+        thermodynamic_state: ThermodynamicState
+            The state at which the reduced potentials are evaluated.
+        number_of_systems: int
+            The number of systems which the reduced potentials are evaluated using.
+        trajectory_path: str
+            The path to the DCD file.
+
+        Returns
+        -------
+        str
+            The path to the cached reduced potentials.
+        """
+
+        file_stats = stat(trajectory_path)
+        pressure = thermodynamic_state.pressure
+
+        cache_key = get_cache_key([], path.abspath(trajectory_path), file_stats.st_size, file_stats.st_mtime_ns,
+                                  thermodynamic_state.temperature.value_in_unit(unit.kelvin),
+                                  None if pressure is None else pressure.value_in_unit(unit.atmosphere),
+                                  number_of_systems)
+
+        return path.join(cache_directory, 'reduced_potentials_{}.npy'.format(cache_key))
+
+    def _evaluate_reduced_potentials(self, systems, context_cache, trajectory_path):
+        """Evaluates the reduced potential of each frame of a trajectory
+        using each of a set of systems.
+
+        Parameters
+        ----------
+        systems: list of simtk.openmm.System
+            The systems to evaluate the reduced potentials using.
+        context_cache: openmmtools.cache.ContextCache
+            The cache to draw the OpenMM contexts from.
+        trajectory_path: str
+            The path to the trajectory (either a DCD file or a
+            `VirtualTrajectory` index) to evaluate.
+
+        Returns
+        -------
+        list of np.ndarray
+            The reduced potentials of each chunk of the trajectory, each
+            with shape=(len(systems), num_chunk_frames). The list will be empty
+            if the trajectory does not contain any frames.
+        """
+        import openmmtools
+
+        temperature = self._thermodynamic_state.temperature
+        pressure = self._thermodynamic_state.pressure
+
+        openmm_states = None
+        openmm_contexts = None
+
+        reduced_potential_chunks = []
 
-        context_cache = openmmtools.cache.ContextCache(platform)
-        openmm_context, openmm_context_integrator = context_cache.get_context(openmm_state,
-                                                                              integrator)
+        # Stream the trajectory in chunks rather than loading it all into memory, and
+        # only make a single pass over it, evaluating each frame against all of the
+        # systems before moving on to the next.
+        for trajectory_chunk in iterate_trajectory(trajectory_path,
+                                                   self._coordinate_file_path,
+                                                   self._trajectory_chunk_size):
 
-        reduced_potentials = np.zeros(trajectory.n_frames)
+            if trajectory_chunk.n_frames == 0:
+                continue
+
+            if openmm_contexts is None:
+
+                openmm_states = []
+                openmm_contexts = []
+
+                for system in systems:
+
+                    system.setDefaultPeriodicBoxVectors(*trajectory_chunk.openmm_boxes(0))
+
+                    openmm_state = openmmtools.states.ThermodynamicState(system=system,
+                                                                         temperature=temperature,
+                                                                         pressure=pressure)
+
+                    integrator = openmmtools.integrators.VelocityVerletIntegrator(0.01*unit.femtoseconds)
+
+                    openmm_context, _ = context_cache.get_context(openmm_state, integrator)
+
+                    openmm_states.append(openmm_state)
+                    openmm_contexts.append(openmm_context)
+
+            # mdtraj stores the positions and box vectors in units of nm, which
+            # OpenMM will assume when passed raw arrays.
+            positions = trajectory_chunk.xyz.astype(np.float64)
+            box_vectors = trajectory_chunk.unitcell_vectors.astype(np.float64)
+
+            reduced_potential_chunk = np.zeros((len(systems), trajectory_chunk.n_frames))
+
+            for frame_index in range(trajectory_chunk.n_frames):
+
+                frame_box_vectors = [openmm.Vec3(*box_vector) for box_vector in box_vectors[frame_index]]
+
+                for system_index, openmm_context in enumerate(openmm_contexts):
+
+                    openmm_context.setPeriodicBoxVectors(*frame_box_vectors)
+                    openmm_context.setPositions(positions[frame_index])
+
+                    reduced_potential_chunk[system_index, frame_index] = \
+                        openmm_states[system_index].reduced_potential(openmm_context)
+
+            reduced_potential_chunks.append(reduced_potential_chunk)
+
+        return reduced_potential_chunks
+
+    def execute(self, directory, available_resources):
+
+        from simtk.openmm import XmlSerializer
+
+        system_paths = [self._system_path]
+
+        if self._additional_system_paths is not None:
+            system_paths.extend(self._additional_system_paths)
+
+        trajectory = None
+        cached_potentials_paths = {}
+
+        trajectory_paths = [self._trajectory_file_path]
+
+        if self._cache_directory:
+
+            trajectory = VirtualTrajectory.from_file(self._trajectory_file_path)
+
+            for source_path in trajectory.source_paths:
+
+                cached_potentials_paths[source_path] = self.get_cached_potentials_path(self._cache_directory,
+                                                                                       self._thermodynamic_state,
+                                                                                       len(system_paths),
+                                                                                       source_path)
+
+            # Only the files whose reduced potentials have not been cached need evaluating.
+            trajectory_paths = [source_path for source_path in trajectory.source_paths
+                                if not path.isfile(cached_potentials_paths[source_path])]
+
+        evaluated_potentials = {}
+
+        if len(trajectory_paths) > 0:
+
+            systems = []
+
+            for system_path in system_paths:
 
-        for frame_index in range(trajectory.n_frames):
+                if not path.isfile(system_path):
 
-            positions = trajectory.openmm_positions(frame_index)
-            box_vectors = trajectory.openmm_boxes(frame_index)
+                    return PropertyEstimatorException(directory=directory,
+                                                      message='The system at {} could not be '
+                                                              'found.'.format(system_path))
 
-            openmm_context.setPeriodicBoxVectors(*box_vectors)
-            openmm_context.setPositions(positions)
+                with open(system_path, 'rb') as file:
+                    systems.append(XmlSerializer.deserialize(file.read().decode()))
 
-            # set box vectors
-            reduced_potentials[frame_index] = openmm_state.reduced_potential(openmm_context)
+            self._system = systems[0]
 
-        self._reduced_potentials = reduced_potentials
+            context_cache = self._checkout_context_cache(available_resources, len(systems))
+
+            try:
+
+                for trajectory_path in trajectory_paths:
+
+                    reduced_potential_chunks = self._evaluate_reduced_potentials(systems, context_cache,
+                                                                                 trajectory_path)
+
+                    evaluated_potentials[trajectory_path] = np.zeros((len(systems), 0))
+
+                    if len(reduced_potential_chunks) > 0:
+                        evaluated_potentials[trajectory_path] = np.concatenate(reduced_potential_chunks, axis=1)
+
+            finally:
+                self._return_context_cache(available_resources, context_cache)
+
+        if trajectory is None:
+
+            reduced_potentials = evaluated_potentials[self._trajectory_file_path]
+
+        else:
+
+            makedirs(self._cache_directory, exist_ok=True)
+
+            for source_path, source_potentials in evaluated_potentials.items():
+
+                # Save via a temporary file so that concurrent readers never see a partial file.
+                temporary_path = '{}.{}.tmp.npy'.format(cached_potentials_paths[source_path], uuid.uuid4().hex)
+
+                np.save(temporary_path, source_potentials)
+                shutil.move(temporary_path, cached_potentials_paths[source_path])
+
+            for source_path in cached_potentials_paths:
+
+                if source_path in evaluated_potentials:
+                    continue
+
+                logging.info('Using cached reduced potentials of {}: {}'.format(source_path, self.id))
+                evaluated_potentials[source_path] = np.load(cached_potentials_paths[source_path])
+
+            # Draw the requested frames from the reduced potentials of each file.
+            segment_potentials = [np.zeros((len(system_paths), 0))]
+
+            for segment in trajectory.segments:
+
+                frame_indices = segment.get_frame_indices()
+                source_potentials = evaluated_potentials[segment.trajectory_path]
+
+                segment_potentials.append(source_potentials[:, list(frame_indices)])
+
+            reduced_potentials = np.concatenate(segment_potentials, axis=1)
+
+        if reduced_potentials.shape[1] == 0:
+
+            return PropertyEstimatorException(directory=directory,
+                                              message='The trajectory at {} does not contain any '
+                                                      'frames.'.format(self._trajectory_file_path))
+
+        self._reduced_potentials_matrix = reduced_potentials
+        self._reduced_potentials = reduced_potentials[0]
 
         return self._get_output_dictionary()
 
@@ -1766,6 +2213,19 @@ class ReweightWithMBARProtocol(BaseProtocol):
         uncertainties have been requested"""
         pass
 
+    @protocol_input(float)
+    def bootstrap_convergence_tolerance(self):
+        """If positive, bootstrapping will stop early (with `bootstrap_iterations` as the
+        maximum) once the relative change in the uncertainty falls below this tolerance.
+        The default of zero performs all `bootstrap_iterations` iterations."""
+        pass
+
+    @protocol_input(int)
+    def bootstrap_random_seed(self):
+        """The seed used to draw the bootstrap samples, so that the estimated
+        uncertainty is reproducible. If negative, the samples will differ between runs."""
+        pass
+
     @protocol_input(int)
     def required_effective_samples(self):
         """The minimum number of MBAR effective samples for the reweighted
@@ -1777,6 +2237,11 @@ class ReweightWithMBARProtocol(BaseProtocol):
     def value(self):
         pass
 
+    @protocol_output(int)
+    def bootstrap_iterations_performed(self):
+        """The number of bootstrap iterations which were actually performed."""
+        pass
+
     def __init__(self, protocol_id):
         """Constructs a new ReweightWithMBARProtocol object."""
         super().__init__(protocol_id)
@@ -1789,10 +2254,15 @@ class ReweightWithMBARProtocol(BaseProtocol):
         self._bootstrap_uncertainties = False
         self._bootstrap_iterations = 1
         self._bootstrap_sample_size = 1.0
+        self._bootstrap_convergence_tolerance = 0.0
+        self._bootstrap_random_seed = -1
 
         self._required_effective_samples = 50
 
         self._value = None
+        self._bootstrap_iterations_performed = None
+
+        self._reference_free_energies = None
 
     def execute(self, directory, available_resources):
 
@@ -1817,19 +2287,27 @@ class ReweightWithMBARProtocol(BaseProtocol):
 
             frame_counts = np.array([len(observable) for observable in self._reference_observables])
 
-            # Construct an mbar object to get out the number of effective samples.
-            mbar = pymbar.MBAR(self._reference_reduced_potentials,
-                               frame_counts, verbose=False, relative_tolerance=1e-12)
+            # Construct an mbar object to get out the number of effective samples,
+            # and cache its converged free energies so that the MBAR solve of each
+            # bootstrap iteration can be warm started from them.
+            self._reference_free_energies = None
+
+            mbar = self._construct_mbar(self._reference_reduced_potentials, frame_counts)
+            self._reference_free_energies = mbar.f_k
 
             effective_samples = mbar.computeEffectiveSampleNumber().max()
 
-            value, uncertainty = bootstrap(self._bootstrap_function,
-                                           self._bootstrap_iterations,
-                                           self._bootstrap_sample_size,
-                                           frame_counts,
-                                           reference_reduced_potentials=reference_potentials,
-                                           target_reduced_potentials=target_potentials,
-                                           observables=np.transpose(observables))
+            value, uncertainty, self._bootstrap_iterations_performed = \
+                bootstrap(self._bootstrap_function,
+                          self._bootstrap_iterations,
+                          self._bootstrap_sample_size,
+                          frame_counts,
+                          convergence_tolerance=self._bootstrap_convergence_tolerance,
+                          random_seed=None if self._bootstrap_random_seed < 0 else self._bootstrap_random_seed,
+                          return_iterations=True,
+                          reference_reduced_potentials=reference_potentials,
+                          target_reduced_potentials=target_potentials,
+                          observables=np.transpose(observables))
 
             if effective_samples < self._required_effective_samples:
 
@@ -1877,35 +2355,23 @@ class ReweightWithMBARProtocol(BaseProtocol):
 
         Returns
         -------
-        np.ndarray
+        np.ndarray, shape=(num_dimensions, num_configurations), dtype=float
             A unitless numpy array of all of the observables.
         """
-        frame_counts = np.array([len(observable) for observable in reference_observables])
-        number_of_configurations = frame_counts.sum()
-
-        observable_dimensions = 1 if len(reference_observables[0].shape) == 1 else reference_observables[0].shape[1]
         observable_unit = reference_observables[0].unit
 
-        observables = np.zeros((observable_dimensions, number_of_configurations))
-
-        # Build up an array which contains the observables from all
-        # of the reference states.
-        for index_k, observables_k in enumerate(reference_observables):
-
-            start_index = np.array(frame_counts[0:index_k]).sum()
+        # Strip the units from each reference array in one go, rather
+        # than converting each frame (and dimension) individually.
+        unitless_observables = []
 
-            for index in range(0, frame_counts[index_k]):
+        for observables_k in reference_observables:
 
-                value = observables_k[index].value_in_unit(observable_unit)
+            values = np.asarray(observables_k.value_in_unit(observable_unit), dtype=np.float64)
+            unitless_observables.append(values.reshape(len(values), -1))
 
-                if not isinstance(value, np.ndarray):
-                    observables[0][start_index + index] = value
-                    continue
-
-                for dimension in range(observable_dimensions):
-                    observables[dimension][start_index + index] = value[dimension]
-
-        return observables
+        # Build up an array which contains the observables from all
+        # of the reference states.
+        return np.ascontiguousarray(np.concatenate(unitless_observables).T)
 
     def _bootstrap_function(self, reference_reduced_potentials, target_reduced_potentials, **reference_observables):
         """The function which will be called after each bootstrap
@@ -1936,6 +2402,170 @@ class ReweightWithMBARProtocol(BaseProtocol):
 
         return next(iter(values.values()))
 
+    def _construct_mbar(self, reference_reduced_potentials, frame_counts):
+        """Constructs and solves an MBAR object for a set of reference
+        reduced potentials. If the converged free energies of the reference
+        states have already been cached, they are used as the initial guess.
+
+        Parameters
+        ----------
+        reference_reduced_potentials: array_like, shape=(num_reference_states, num_configurations)
+            The reduced potentials of each configuration evaluated at each
+            of the reference states.
+        frame_counts: np.ndarray, shape=(num_reference_states,)
+            The number of configurations sampled from each reference state.
+
+        Returns
+        -------
+        pymbar.MBAR
+            The solved MBAR object.
+        """
+        return pymbar.MBAR(reference_reduced_potentials,
+                           frame_counts,
+                           verbose=False,
+                           relative_tolerance=1e-12,
+                           initial_f_k=self._reference_free_energies)
+
+    @staticmethod
+    def _compute_reweighting_weights(reference_reduced_potentials, frame_counts, reference_free_energies,
+                                     target_reduced_potentials):
+        """Computes the normalised MBAR weights of each configuration at each of the
+        reference states, and at a single (unsampled) target state, from the converged
+        free energies of the reference states.
+
+        Parameters
+        ----------
+        reference_reduced_potentials: np.ndarray, shape=(num_reference_states, num_configurations)
+            The reduced potentials of each configuration evaluated at each
+            of the reference states.
+        frame_counts: np.ndarray, shape=(num_reference_states,)
+            The number of configurations sampled from each reference state.
+        reference_free_energies: np.ndarray, shape=(num_reference_states,)
+            The converged (reduced) free energies of the reference states.
+        target_reduced_potentials: np.ndarray, shape=(num_configurations,)
+            The reduced potentials of each configuration evaluated at the
+            target state.
+
+        Returns
+        -------
+        np.ndarray, shape=(num_configurations, num_reference_states)
+            The weights of each configuration at each of the reference states.
+        np.ndarray, shape=(num_configurations,)
+            The weights of each configuration at the target state.
+        """
+
+        # log_denominators[n] = ln sum_k N_k exp(f_k - u_k(x_n)), evaluated
+        # stably by shifting out the maximum exponent of each configuration.
+        log_numerators = (reference_free_energies[:, np.newaxis] - reference_reduced_potentials +
+                          np.log(frame_counts)[:, np.newaxis])
+
+        maximum_log_numerators = log_numerators.max(axis=0)
+
+        log_denominators = maximum_log_numerators + np.log(np.exp(log_numerators -
+                                                                  maximum_log_numerators).sum(axis=0))
+
+        reference_weights = np.exp(reference_free_energies[np.newaxis, :] -
+                                   reference_reduced_potentials.T -
+                                   log_denominators[:, np.newaxis])
+
+        log_target_weights = -target_reduced_potentials - log_denominators
+        log_target_weights -= log_target_weights.max()
+
+        target_weights = np.exp(log_target_weights)
+        target_weights /= target_weights.sum()
+
+        return reference_weights, target_weights
+
+    @staticmethod
+    def _reweight_to_target_state(reference_reduced_potentials, frame_counts, reference_free_energies,
+                                  target_reduced_potentials, observables):
+        """Reweights a set of observables to a single target state, from the converged
+        free energies of the reference states.
+
+        The uncertainties are the MBAR asymptotic uncertainties, and are
+        equivalent to those returned by `pymbar.MBAR.computeExpectations`.
+
+        Parameters
+        ----------
+        reference_reduced_potentials: np.ndarray, shape=(num_reference_states, num_configurations)
+            The reduced potentials of each configuration evaluated at each
+            of the reference states.
+        frame_counts: np.ndarray, shape=(num_reference_states,)
+            The number of configurations sampled from each reference state.
+        reference_free_energies: np.ndarray, shape=(num_reference_states,)
+            The converged (reduced) free energies of the reference states.
+        target_reduced_potentials: np.ndarray, shape=(num_configurations,)
+            The reduced potentials of each configuration evaluated at the
+            target state.
+        observables: np.ndarray, shape=(num_observables, num_configurations)
+            The observables to reweight.
+
+        Returns
+        -------
+        np.ndarray, shape=(num_observables,)
+            The reweighted values of the observables.
+        np.ndarray, shape=(num_observables,)
+            The uncertainties in the reweighted values.
+        float
+            The number of effective samples at the target state.
+        np.ndarray, shape=(num_reference_states,)
+            The number of effective samples at each of the reference states.
+        """
+
+        reference_reduced_potentials = np.ascontiguousarray(reference_reduced_potentials, dtype=np.float64)
+        reference_free_energies = np.asarray(reference_free_energies, dtype=np.float64)
+        target_reduced_potentials = np.asarray(target_reduced_potentials, dtype=np.float64)
+        observables = np.atleast_2d(np.asarray(observables, dtype=np.float64))
+
+        number_of_states = len(frame_counts)
+        number_of_observables = observables.shape[0]
+
+        reference_weights, target_weights = \
+            ReweightWithMBARProtocol._compute_reweighting_weights(reference_reduced_potentials,
+                                                                  frame_counts,
+                                                                  reference_free_energies,
+                                                                  target_reduced_potentials)
+
+        values = observables @ target_weights
+
+        # Shift the observables to be strictly positive, so that the weighted
+        # observables may be treated as the weights of additional (augmented)
+        # states when computing the asymptotic covariance matrix.
+        shifted_observables = observables - observables.min(axis=1)[:, np.newaxis] + 1.0
+        shifted_values = shifted_observables @ target_weights
+
+        observable_weights = shifted_observables * target_weights[np.newaxis, :] / shifted_values[:, np.newaxis]
+
+        augmented_weights = np.hstack([reference_weights, target_weights[:, np.newaxis], observable_weights.T])
+        augmented_counts = np.zeros(augmented_weights.shape[1])
+        augmented_counts[:number_of_states] = frame_counts
+
+        # Compute the asymptotic covariance matrix of the (augmented) log weights
+        # from the eigendecomposition of W^T W, rather than from the much larger
+        # N x N matrices.
+        eigenvalues, eigenvectors = np.linalg.eigh(augmented_weights.T @ augmented_weights)
+        singular_values = np.sqrt(np.clip(eigenvalues, 0.0, None))
+
+        sigma_v = eigenvectors * singular_values[np.newaxis, :]
+        inner_matrix = (np.identity(len(singular_values)) -
+                        sigma_v.T @ (augmented_counts[:, np.newaxis] * sigma_v))
+
+        theta = sigma_v @ np.linalg.pinv(inner_matrix, rcond=1e-10) @ sigma_v.T
+
+        target_index = number_of_states
+        observable_indices = number_of_states + 1 + np.arange(number_of_observables)
+
+        variances = shifted_values ** 2 * (theta[observable_indices, observable_indices] +
+                                           theta[target_index, target_index] -
+                                           2.0 * theta[observable_indices, target_index])
+
+        uncertainties = np.sqrt(np.clip(variances, 0.0, None))
+
+        target_effective_samples = 1.0 / (target_weights ** 2).sum()
+        reference_effective_samples = 1.0 / (reference_weights ** 2).sum(axis=0)
+
+        return values, uncertainties, target_effective_samples, reference_effective_samples
+
     def _reweight_observables(self, reference_reduced_potentials, target_reduced_potentials, **reference_observables):
         """Reweights a set of reference observables to
         the target state.
@@ -1952,44 +2582,42 @@ class ReweightWithMBARProtocol(BaseProtocol):
 
         frame_counts = np.array([len(observable) for observable in self._reference_observables])
 
-        # Construct the mbar object.
-        mbar = pymbar.MBAR(reference_reduced_potentials,
-                           frame_counts, verbose=False, relative_tolerance=1e-12)
+        # Solve for the free energies of the reference states.
+        mbar = self._construct_mbar(reference_reduced_potentials, frame_counts)
 
-        max_effective_samples = mbar.computeEffectiveSampleNumber().max()
+        # Stack every dimension of every observable into a single array so
+        # that all of the expectations can be computed in one batched call.
+        observable_keys = list(reference_observables.keys())
+        observable_dimensions = [np.atleast_2d(reference_observables[key]).shape[0] for key in observable_keys]
 
-        values = {}
-        uncertainties = {}
+        stacked_observables = np.vstack([np.atleast_2d(reference_observables[key]) for key in observable_keys])
+        target_potentials = np.atleast_2d(target_reduced_potentials)[0]
 
-        for observable_key in reference_observables:
+        results = self._reweight_to_target_state(mbar.u_kn, frame_counts, mbar.f_k,
+                                                 target_potentials, stacked_observables)
 
-            observable = reference_observables[observable_key]
-            observable_dimensions = observable.shape[0]
+        reweighted_values, reweighted_uncertainties, _, reference_effective_samples = results
+        max_effective_samples = reference_effective_samples.max()
 
-            if observable_dimensions == 1:
+        values = {}
+        uncertainties = {}
 
-                results = mbar.computeExpectations(observable,
-                                                   target_reduced_potentials,
-                                                   state_dependent=True)
+        start_index = 0
 
-                values[observable_key] = results[0][0]
-                uncertainties[observable_key] = results[1][0]
+        for observable_key, dimensions in zip(observable_keys, observable_dimensions):
 
-            else:
+            end_index = start_index + dimensions
 
-                value = []
-                uncertainty = []
+            if dimensions == 1:
 
-                for dimension in range(observable_dimensions):
+                values[observable_key] = reweighted_values[start_index]
+                uncertainties[observable_key] = reweighted_uncertainties[start_index]
 
-                    results = mbar.computeExpectations(observable[dimension],
-                                                       target_reduced_potentials,
-                                                       state_dependent=True)
+            else:
 
-                    value.append(results[0][0])
-                    uncertainty.append(results[1][0])
+                values[observable_key] = reweighted_values[start_index:end_index]
+                uncertainties[observable_key] = reweighted_uncertainties[start_index:end_index]
 
-                values[observable_key] = np.array(value)
-                uncertainties[observable_key] = np.array(uncertainty)
+            start_index = end_index
 
         return values, uncertainties, max_effective_samples
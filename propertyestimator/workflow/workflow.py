@@ -18,7 +18,8 @@ from propertyestimator.properties.properties import PropertyWorkflowOptions
 from propertyestimator.storage import StoredSimulationData
 from propertyestimator.utils import graph
 from propertyestimator.utils.exceptions import PropertyEstimatorException
-from propertyestimator.utils.serialization import TypedBaseModel, TypedJSONEncoder, TypedJSONDecoder
+from propertyestimator.utils.serialization import TypedBaseModel, TypedJSONEncoder, serialize, deserialize
+from propertyestimator.utils.trajectory import VirtualTrajectory
 from propertyestimator.utils.utils import SubhookedABCMeta, get_nested_attribute
 from propertyestimator.workflow.plugins import available_protocols
 from propertyestimator.workflow.protocols import BaseProtocol
@@ -578,6 +579,8 @@ class Workflow:
         which must be ran after the protocol identified by the key.
         """
 
+        self.dependants_graph = {}
+
         for protocol_name in self.protocols:
             self.dependants_graph[protocol_name] = []
 
@@ -605,6 +608,32 @@ class Workflow:
 
         self.starting_protocols = graph.find_root_nodes(self.dependants_graph)
 
+    def remove_protocol(self, protocol):
+        """Removes a protocol from the workflow, for example when its
+        outputs are no longer required by any of the other protocols.
+
+        Parameters
+        ----------
+        protocol : protocols.BaseProtocol or str
+            The protocol (or its id) to remove.
+        """
+
+        protocol_id = protocol
+
+        if isinstance(protocol, BaseProtocol):
+            protocol_id = protocol.id
+
+        # Make sure the graph reflects any changes made to the inputs of the protocols.
+        self._build_dependants_graph()
+
+        if len(self.dependants_graph[protocol_id]) > 0:
+
+            raise ValueError('The {} protocol cannot be removed as other protocols '
+                             'take input from it.'.format(protocol_id))
+
+        self.protocols.pop(protocol_id)
+        self._build_dependants_graph()
+
     def replace_protocol(self, old_protocol, new_protocol):
         """Replaces an existing protocol with a new one, while
         updating all input and local references to point to the
@@ -1003,8 +1032,8 @@ class WorkflowGraph:
             by the `TypedJSONEncoder`
         """
 
-        with open(file_path, 'w') as file:
-            json.dump(output_dictionary, file, cls=TypedJSONEncoder)
+        with open(file_path, 'wb') as file:
+            file.write(serialize(output_dictionary, binary_arrays=True, compact_units=True))
 
     @staticmethod
     def _execute_protocol(directory, protocol_schema, *previous_output_paths, available_resources, **kwargs):
@@ -1048,8 +1077,8 @@ class WorkflowGraph:
 
                 try:
 
-                    with open(previous_output_path, 'r') as file:
-                        parent_output = json.load(file, cls=TypedJSONDecoder)
+                    with open(previous_output_path, 'rb') as file:
+                        parent_output = deserialize(file.read())
 
                 except json.JSONDecodeError as e:
 
@@ -1182,8 +1211,8 @@ class WorkflowGraph:
 
                 try:
 
-                    with open(protocol_result_path, 'r') as file:
-                        protocol_results = json.load(file, cls=TypedJSONDecoder)
+                    with open(protocol_result_path, 'rb') as file:
+                        protocol_results = deserialize(file.read())
 
                 except json.JSONDecodeError as e:
 
@@ -1294,7 +1323,21 @@ class WorkflowGraph:
         _, statistics_file_name = path.split(results_by_id[output_to_store.statistics_file_path])
 
         file_copy(results_by_id[output_to_store.coordinate_file_path], storage_directory)
-        file_copy(results_by_id[output_to_store.trajectory_file_path], storage_directory)
+
+        trajectory_file_path = results_by_id[output_to_store.trajectory_file_path]
+
+        if VirtualTrajectory.is_virtual_trajectory_file(trajectory_file_path):
+
+            # Virtual trajectories only reference frames in files which will not
+            # outlive the calculation, so the frames themselves need to be stored.
+            trajectory_file_name = '{}.dcd'.format(path.splitext(trajectory_file_name)[0])
+
+            VirtualTrajectory.from_file(trajectory_file_path).save_as_dcd(
+                results_by_id[output_to_store.coordinate_file_path],
+                path.join(storage_directory, trajectory_file_name))
+
+        else:
+            file_copy(trajectory_file_path, storage_directory)
 
         file_copy(results_by_id[output_to_store.statistics_file_path], storage_directory)
 
@@ -1306,4 +1349,4 @@ class WorkflowGraph:
         stored_object.statistical_inefficiency = results_by_id[output_to_store.statistical_inefficiency]
 
         with open(path.join(storage_directory, 'data.json'), 'w') as file:
-            json.dump(stored_object, file, cls=TypedJSONEncoder)
+            json.dump(stored_object, file, cls=TypedJSONEncoder, binary_arrays=True)